@@ -113,26 +113,36 @@ void desligarEsteira() {
 // ======================================================
 // === Enviar comandos I2C e ler resposta ===
 // ======================================================
-void enviaComando(String cmd) {
+void escreveComando(String cmd) {
   Wire.beginTransmission(8);
   Wire.write(cmd.c_str());
   Wire.endTransmission();
-  delay(10);
+}
 
+String lerStatus() {
   Wire.requestFrom(8, 32);
   String resposta = "";
   while (Wire.available()) {
     char c = Wire.read();
-    resposta += c;
+    // o slave manda menos de 32 bytes: o resto chega como 0xFF e só
+    // aumentaria o "Status recebido" na serial
+    if (c != (char)0xFF) resposta += c;
   }
 
   if (resposta.length() > 0) {
-    Serial.print("Status recebido: ");
-    Serial.println(resposta);
+    parseStatus(resposta);
   }
+  return resposta;
+}
 
-  if (cmd == CMD_STATUS && resposta.length() > 0) {
-    parseStatus(resposta);
+void enviaComando(String cmd) {
+  escreveComando(cmd);
+  delay(10);
+
+  String resposta = lerStatus();
+  if (resposta.length() > 0) {
+    Serial.print("Status recebido: ");
+    Serial.println(resposta);
   }
 }
 
@@ -150,66 +160,101 @@ void parseStatus(String s) {
 }
 
 // ======================================================
-// === VERIFICAÇÃO DOS ATUADORES (lógica original) ===
+// === VERIFICAÇÃO DOS ATUADORES (sem delay) ===
+// Máquina de estados com millis(): cada chamada faz no máximo
+// uma etapa (pedir status, ler as chaves, mandar retornar/parar)
+// e volta, então o loop() lê a serial a cada poucos ms. Com a
+// esteira contínua o Python manda A2A..A5A na hora exata e o
+// comando não pode esperar um verificarAtuador() inteiro.
 // ======================================================
-void verificarAtuador(String nome, int status, int pinoC1, int pinoC2, String cmdRetornar, String cmdParar, int &statusRef) {
-  delay(100);
-  enviaComando(CMD_STATUS);
-  delay(50);
-
-  bool c1 = (digitalRead(pinoC1) == LOW);
-  bool c2 = (digitalRead(pinoC2) == LOW);
-
-  if (status == PARADO && !c1 && !c2) {
-    Serial.println("⚠️ " + nome + " está parado no meio do curso — retornando à base...");
-    enviaComando(cmdRetornar);
-    delay(50);
-    return;
-  }
+#define ETAPA_STATUS  0   // pede o status ao slave
+#define ETAPA_CHAVES  1   // lê status + chaves de fim de curso e decide
+#define ETAPA_COMANDO 2   // envia retornar/parar
+
+const char* nomesAtuadores[] = {"A2", "A3", "A4", "A5"};
+const int pinosC1[] = {A2C1, A3C1, A4C1, A5C1};
+const int pinosC2[] = {A2C2, A3C2, A4C2, A5C2};
+const char* cmdsRetornar[] = {CMD_A2R, CMD_A3R, CMD_A4R, CMD_A5R};
+const char* cmdsParar[] = {CMD_A2P, CMD_A3P, CMD_A4P, CMD_A5P};
+
+int atuadorAtual = 0;
+int etapa = ETAPA_STATUS;
+unsigned long inicioEspera = 0;
+unsigned long esperaMs = 0;
+String comandoPendente = "";
+
+void aguardar(unsigned long ms) {
+  inicioEspera = millis();
+  esperaMs = ms;
+}
 
-  if (status == PARADO && c2) {
-    Serial.println("⚠️ " + nome + " está parado no topo — retornando à base...");
-    enviaComando(cmdRetornar);
-    delay(50);
+int statusDe(int i) {
+  if (i == 0) return statusA2;
+  if (i == 1) return statusA3;
+  if (i == 2) return statusA4;
+  return statusA5;
+}
+
+void proximoAtuador() {
+  atuadorAtual = (atuadorAtual + 1) % 4;
+  etapa = ETAPA_STATUS;
+  // mesma cadência do loop original: 100 ms entre atuadores, 300 ms no fim da volta
+  aguardar(atuadorAtual == 0 ? 300 : 100);
+}
+
+void verificarAtuador() {
+  if (millis() - inicioEspera < esperaMs) return;
+
+  int i = atuadorAtual;
+  String nome = nomesAtuadores[i];
+
+  if (etapa == ETAPA_STATUS) {
+    escreveComando(CMD_STATUS);
+    etapa = ETAPA_CHAVES;
+    aguardar(50);
     return;
   }
 
-  if (status == RETORNANDO) {
-    if (c1) {
+  if (etapa == ETAPA_CHAVES) {
+    lerStatus();
+    int status = statusDe(i);
+    bool c1 = (digitalRead(pinosC1[i]) == LOW);
+    bool c2 = (digitalRead(pinosC2[i]) == LOW);
+
+    // só imprime quando há algo a fazer: a 9600 baud as mensagens de
+    // repouso a cada volta ocupavam a serial mais que os comandos
+    comandoPendente = "";
+    if (status == PARADO && !c1 && !c2) {
+      Serial.println("⚠️ " + nome + " está parado no meio do curso — retornando à base...");
+      comandoPendente = cmdsRetornar[i];
+    }
+    else if (status == PARADO && c2) {
+      Serial.println("⚠️ " + nome + " está parado no topo — retornando à base...");
+      comandoPendente = cmdsRetornar[i];
+    }
+    else if (status == RETORNANDO && c1) {
       Serial.println("✅ " + nome + " chegou à base — enviando comando de PARADA...");
-      delay(120);
-      enviaComando(cmdParar);
-      delay(120);
-    } else {
-      Serial.println("↩️ " + nome + " ainda retornando...");
+      comandoPendente = cmdsParar[i];
+    }
+    else if (status == AVANCANDO && c2) {
+      Serial.println("🏁 " + nome + " chegou ao topo — enviando comando para RETORNAR...");
+      comandoPendente = cmdsRetornar[i];
     }
-    return;
-  }
-
-  if (status == RETORNANDO && c1) {
-    Serial.println("✅ " + nome + " retornou à base — parando...");
-    delay(120);
-    enviaComando(cmdParar);
-    delay(120);
-    enviaComando(CMD_STATUS);
-    delay(120);
-    return;
-  }
 
-  if (status == PARADO && c1) {
-    Serial.println("🟢 " + nome + " OK — em repouso na base.");
+    if (comandoPendente.length() > 0) {
+      etapa = ETAPA_COMANDO;
+      aguardar(100);
+    } else {
+      proximoAtuador();
+    }
     return;
   }
 
-  if (status == AVANCANDO && c2) {
-    Serial.println("🏁 " + nome + " chegou ao topo — enviando comando para RETORNAR...");
-    delay(100);
-    enviaComando(cmdRetornar);
-    delay(100);
-    return;
+  if (etapa == ETAPA_COMANDO) {
+    // o status novo é lido na próxima volta
+    escreveComando(comandoPendente);
+    proximoAtuador();
   }
-
-  if (status == AVANCANDO || status == RETORNANDO) return;
 }
 
 // ======================================================
@@ -248,14 +293,9 @@ void setup() {
 }
 
 // ======================================================
-void loop() {
-
- 
-
-  verificarAtuador("A2", statusA2, A2C1, A2C2, CMD_A2R, CMD_A2P, statusA2);
-  verificarAtuador("A3", statusA3, A3C1, A3C2, CMD_A3R, CMD_A3P, statusA3);
-  verificarAtuador("A4", statusA4, A4C1, A4C2, CMD_A4R, CMD_A4P, statusA4);
-  verificarAtuador("A5", statusA5, A5C1, A5C2, CMD_A5R, CMD_A5P, statusA5);
+// === COMANDOS DA SERIAL (um por chamada) ===
+// ======================================================
+void tratarComando() {
 
   String comando = lerComandoSerial();
 
@@ -326,11 +366,31 @@ void loop() {
       enviaComando(CMD_A2R);
     }
 
+    // ===== ESTEIRA CONTÍNUA (agendador do Python) =====
+    else if (comando.equalsIgnoreCase("Ligar")) {
+      ligarEsteira();
+    }
+
+    else if (comando.equalsIgnoreCase("Desligar")) {
+      desligarEsteira();
+    }
+
+    else if (comando.equalsIgnoreCase(CMD_A2A) || comando.equalsIgnoreCase(CMD_A3A) ||
+             comando.equalsIgnoreCase(CMD_A4A) || comando.equalsIgnoreCase(CMD_A5A)) {
+      // o Python já esperou o item chegar ao atuador: só dispara
+      comando.toUpperCase();
+      enviaComando(comando);
+    }
+
     else {
       Serial.println("Comando inválido.");
     }
 
   }
+}
 
-  delay(300);
-}
\ No newline at end of file
+// ======================================================
+void loop() {
+  tratarComando();
+  verificarAtuador();
+}
@@ -29,6 +29,7 @@ const int RPWM[] = {4, 9, 13, A3};
 // Variáveis globais
 String ultimoComando = "";
 String respostaStatus = "";
+volatile bool comandoNovo = false;
 
 // --- Classe Atuador ---
 class Atuador {
@@ -87,10 +88,10 @@ void atualizaStatus() {
   respostaStatus += "A3:" + String(atuador3.estado) + ",";
   respostaStatus += "A4:" + String(atuador4.estado) + ",";
   respostaStatus += "A5:" + String(atuador5.estado);
-  Serial.print("Status pronto: ");
-  Serial.println(respostaStatus);
 }
 
+// Roda na interrupção do I2C: sem delay nem Serial aqui, senão o
+// barramento (e o loop do master) fica preso até o fim da impressão
 void recebeDados(int quantidade) {
   ultimoComando = "";
 
@@ -99,9 +100,6 @@ void recebeDados(int quantidade) {
     ultimoComando += c;
   }
 
-  Serial.print("Comando recebido: ");
-  Serial.println(ultimoComando);
-
   // === Executa ação ===
   if (ultimoComando == CMD_A2A) atuador2.avancar();
   else if (ultimoComando == CMD_A2R) atuador2.retornar();
@@ -116,8 +114,8 @@ void recebeDados(int quantidade) {
   else if (ultimoComando == CMD_A5R) atuador5.retornar();
   else if (ultimoComando == CMD_A5P) atuador5.parar();
 
-  delay(150);
   atualizaStatus();
+  comandoNovo = true;
 }
 
 void enviaDados() {
@@ -135,4 +133,18 @@ void setup() {
   atualizaStatus();
 }
 
-void loop() {}
+void loop() {
+  if (comandoNovo) {
+    // cópia sem interrupção: o recebeDados() pode reescrever as Strings
+    noInterrupts();
+    String comando = ultimoComando;
+    String status = respostaStatus;
+    comandoNovo = false;
+    interrupts();
+
+    Serial.print("Comando recebido: ");
+    Serial.println(comando);
+    Serial.print("Status pronto: ");
+    Serial.println(status);
+  }
+}
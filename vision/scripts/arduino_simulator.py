@@ -0,0 +1,520 @@
+# =============================================================
+#  SIMULADOR DO ARDUINO MASTER/SLAVE (SEM HARDWARE)
+#  Emula o protocolo de texto do master.ino/slave.ino num
+#  pseudo-terminal (Linux) que o SerialHandler consegue abrir.
+#
+#  Uso:
+#    python arduino_simulator.py                 → imprime a porta /dev/pts/N
+#    (coloque essa porta em arduino.port e rode o main.py)
+#
+#    python arduino_simulator.py --load-test 40  → dispara 40 itens pelo
+#    SerialHandler e mede quantos itens/minuto a atuação absorve
+#
+#    python arduino_simulator.py --belt-test 40  → esteira contínua pelo
+#    BeltController e compara com a simulação no host dos mesmos atrasos
+# =============================================================
+
+import os
+import pty
+import tty
+import time
+import queue
+import random
+import argparse
+import threading
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+# estados do atuador (enum do slave.ino)
+AVANCANDO, RETORNANDO, PARADO = 0, 1, 2
+
+# atraso da esteira até cada atuador (master.ino), em ms
+CLASS_ROUTES = {
+    "VIDRO": ("A2", 4700),
+    "PAPEL": ("A3", 6260),
+    "PLASTICO": ("A4", 7900),
+    "METAL": ("A5", 9000),
+}
+
+# etapas do verificarAtuador() (máquina de estados do master.ino)
+ETAPA_STATUS, ETAPA_CHAVES, ETAPA_COMANDO = 0, 1, 2
+
+I2C_BYTE_S = 9 / 100_000  # I2C a 100 kHz: 8 bits + ack por byte
+
+
+# =============================================================
+#  1) SLAVE: ATUADORES LINEARES + FIM DE CURSO
+# =============================================================
+
+class SimulatedActuator:
+    """Atuador com posição 0 (base, chave C1) a 1 (topo, chave C2)."""
+
+    def __init__(self, stroke_time):
+        self.stroke_time = stroke_time
+        self.state = PARADO
+        self.pos = 0.0
+        self.t0 = time.monotonic()
+
+    def position(self):
+        dt = (time.monotonic() - self.t0) / self.stroke_time
+        if self.state == AVANCANDO:
+            return min(1.0, self.pos + dt)
+        if self.state == RETORNANDO:
+            return max(0.0, self.pos - dt)
+        return self.pos
+
+    def set_state(self, state):
+        self.pos = self.position()
+        self.t0 = time.monotonic()
+        self.state = state
+
+    @property
+    def c1(self):
+        return self.position() <= 0.0
+
+    @property
+    def c2(self):
+        return self.position() >= 1.0
+
+
+class SimulatedSlave:
+    def __init__(self, stroke_time):
+        self.actuators = {name: SimulatedActuator(stroke_time) for name in ("A2", "A3", "A4", "A5")}
+        self.fired = {name: [] for name in self.actuators}  # instante real de cada A2A..A5A
+
+    def receive(self, cmd):
+        """recebeDados(): executa A2A/A2R/A2P... e atualiza o status na hora (sem delay)."""
+        if len(cmd) == 3 and cmd[:2] in self.actuators:
+            state = {"A": AVANCANDO, "R": RETORNANDO, "P": PARADO}.get(cmd[2])
+            if state is not None:
+                self.actuators[cmd[:2]].set_state(state)
+            if state == AVANCANDO:
+                self.fired[cmd[:2]].append(time.monotonic())
+
+    def status(self):
+        return ",".join(f"{name}:{a.state}" for name, a in self.actuators.items())
+
+
+# =============================================================
+#  2) MASTER: LOOP DO master.ino COM OS MESMOS ATRASOS
+# =============================================================
+
+class SimulatedMaster:
+    """
+    loop() do master.ino: tratarComando() e uma etapa do verificarAtuador()
+    por volta. delay() e millis() são escalados por time_scale; a UART
+    (9600 baud, buffers de 64 bytes) e o I2C não.
+    """
+
+    def __init__(self, fd, slave, baudrate=9600, time_scale=1.0, rx_buffer=64, tx_buffer=64):
+        self.fd = fd
+        self.slave = slave
+        self.baudrate = baudrate
+        self.time_scale = time_scale
+        self.rx_size = rx_buffer
+        self.tx_size = tx_buffer
+
+        self.rx = bytearray()
+        self.rx_lock = threading.Lock()
+        self.rx_free = 0.0  # quando o último byte recebido termina de chegar
+        self.tx_queue = queue.Queue()
+        self.tx_lock = threading.Lock()
+        self.tx_free = 0.0  # quando a UART termina de mandar o que já está no buffer
+        self.status = {name: PARADO for name in slave.actuators}
+        self.running = True
+
+        # verificarAtuador() sem delay
+        self.atuador = 0
+        self.etapa = ETAPA_STATUS
+        self.espera_ate = 0.0
+        self.comando_pendente = ""
+
+        # métricas
+        self.t_start = time.monotonic()
+        self.received = 0
+        self.completed = 0
+        self.busy = 0.0
+        self.rx_overflow = 0
+        self.rx_peak = 0
+        self.service_times = []
+        self.read_gaps = []  # intervalo entre leituras da serial fora dos comandos
+
+    # --------- primitivas do Arduino ---------
+
+    def delay(self, ms):
+        time.sleep(ms / 1000 * self.time_scale)
+
+    def aguardar(self, ms):
+        self.espera_ate = time.monotonic() + ms / 1000 * self.time_scale
+
+    def println(self, text):
+        """Serial.println(): vai para o buffer de TX e só bloqueia quando ele enche."""
+        data = (text + "\r\n").encode()
+        byte_time = 10 / self.baudrate  # 10 bits por byte na UART
+        with self.tx_lock:
+            now = time.monotonic()
+            self.tx_free = max(now, self.tx_free) + len(data) * byte_time
+            t_out = self.tx_free
+            wait = t_out - now - self.tx_size * byte_time
+        self.tx_queue.put((t_out, data))
+        if wait > 0:
+            time.sleep(wait)
+
+    def _tx_loop(self):
+        """Buffer de TX → host: cada linha chega quando o último byte sai da UART."""
+        while self.running:
+            try:
+                t_out, data = self.tx_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            time.sleep(max(0.0, t_out - time.monotonic()))
+            try:
+                os.write(self.fd, data)
+            except OSError:
+                pass
+
+    def _rx_loop(self):
+        """UART → buffer de 64 bytes do Arduino (o excesso é perdido)."""
+        while self.running:
+            try:
+                data = os.read(self.fd, 256)
+            except OSError:
+                time.sleep(0.05)
+                continue
+            # os bytes chegam no ritmo da UART (10 bits por byte), não na hora do write()
+            now = time.monotonic()
+            self.rx_free = max(now, self.rx_free) + len(data) * 10 / self.baudrate
+            time.sleep(self.rx_free - now)
+            with self.rx_lock:
+                room = self.rx_size - len(self.rx)
+                self.rx += data[:room]
+                self.rx_overflow += max(0, len(data) - room)
+                self.rx_peak = max(self.rx_peak, len(self.rx))
+
+    def ler_comando_serial(self):
+        with self.rx_lock:
+            if b"\n" not in self.rx:
+                return ""
+            line, _, rest = self.rx.partition(b"\n")
+            self.rx = bytearray(rest)
+        return line.decode(errors="ignore").strip()
+
+    # --------- I2C + lógica do master ---------
+
+    def escreve_comando(self, cmd):
+        time.sleep((len(cmd) + 1) * I2C_BYTE_S)  # endereço + comando
+        self.slave.receive(cmd)
+
+    def ler_status(self):
+        time.sleep(33 * I2C_BYTE_S)  # Wire.requestFrom(8, 32)
+        resposta = self.slave.status()
+        for item in resposta.split(","):
+            name, value = item.split(":")
+            self.status[name] = int(value)
+        return resposta
+
+    def envia_comando(self, cmd):
+        self.escreve_comando(cmd)
+        self.delay(10)
+        self.println(f"Status recebido: {self.ler_status()}")
+
+    def proximo_atuador(self):
+        self.atuador = (self.atuador + 1) % 4
+        self.etapa = ETAPA_STATUS
+        self.aguardar(300 if self.atuador == 0 else 100)
+
+    def verificar_atuador(self):
+        """Uma etapa por chamada; sem nada a fazer volta na hora para a serial."""
+        if time.monotonic() < self.espera_ate:
+            return
+        name = ("A2", "A3", "A4", "A5")[self.atuador]
+
+        if self.etapa == ETAPA_STATUS:
+            self.escreve_comando("STATUS_REQ")
+            self.etapa = ETAPA_CHAVES
+            self.aguardar(50)
+            return
+
+        if self.etapa == ETAPA_CHAVES:
+            self.ler_status()
+            status = self.status[name]
+            act = self.slave.actuators[name]
+            c1, c2 = act.c1, act.c2
+
+            self.comando_pendente = ""
+            if status == PARADO and not c1 and not c2:
+                self.println(f"⚠️ {name} está parado no meio do curso — retornando à base...")
+                self.comando_pendente = name + "R"
+            elif status == PARADO and c2:
+                self.println(f"⚠️ {name} está parado no topo — retornando à base...")
+                self.comando_pendente = name + "R"
+            elif status == RETORNANDO and c1:
+                self.println(f"✅ {name} chegou à base — enviando comando de PARADA...")
+                self.comando_pendente = name + "P"
+            elif status == AVANCANDO and c2:
+                self.println(f"🏁 {name} chegou ao topo — enviando comando para RETORNAR...")
+                self.comando_pendente = name + "R"
+
+            if self.comando_pendente:
+                self.etapa = ETAPA_COMANDO
+                self.aguardar(100)
+            else:
+                self.proximo_atuador()
+            return
+
+        self.escreve_comando(self.comando_pendente)
+        self.proximo_atuador()
+
+    def ligar_esteira(self):
+        self.println("[ESTEIRA] Rampa iniciada - Sentido Normal")
+        self.delay(30)  # pwmInicial == pwmFinal: um passo da rampa
+        self.println("[ESTEIRA] Velocidade final atingida.")
+
+    def desligar_esteira(self):
+        self.println("[ESTEIRA] Desaceleração...")
+        self.delay(30 * (150 // 5 + 1))  # rampa de 150 até 0, passo 5, 30 ms
+        self.println("[ESTEIRA] Motor parado.")
+
+    def executar(self, comando):
+        upper = comando.upper()
+        if upper in CLASS_ROUTES:
+            name, atraso = CLASS_ROUTES[upper]
+            if upper == "VIDRO":
+                self.println("Comando: VIDRO → Atuador A2")
+                self.envia_comando("STATUS_REQ")
+                self.delay(30)
+                act = self.slave.actuators["A2"]
+                if not (self.status["A2"] == PARADO and act.c1 and not act.c2):
+                    return False
+                self.delay(30)
+            self.println("Esteira Ligada")
+            self.ligar_esteira()
+            self.delay(atraso)
+            self.envia_comando(name + "A")
+            self.desligar_esteira()
+            return True
+        if upper == "STATUS":
+            self.envia_comando("STATUS_REQ")
+        elif upper == "PARAR":
+            self.envia_comando("A2P")
+        elif upper == "RETORNAR":
+            self.envia_comando("A2R")
+        elif upper == "LIGAR":
+            self.ligar_esteira()
+        elif upper == "DESLIGAR":
+            self.desligar_esteira()
+        elif upper in ("A2A", "A3A", "A4A", "A5A"):
+            self.envia_comando(upper)  # disparo agendado pelo Python com a esteira andando
+            return True
+        else:
+            self.println("Comando inválido.")
+        return False
+
+    def tratar_comando(self):
+        comando = self.ler_comando_serial()
+        if comando:
+            self.received += 1
+            self.println(f"ARDUINO: Recebi comando -> {comando}")
+            t0 = time.monotonic()
+            if self.executar(comando):
+                self.completed += 1
+                self.service_times.append(time.monotonic() - t0)
+            self.busy += time.monotonic() - t0
+
+    def loop(self):
+        threading.Thread(target=self._rx_loop, daemon=True).start()
+        threading.Thread(target=self._tx_loop, daemon=True).start()
+        self.desligar_esteira()  # setup()
+
+        t_read = None
+        while self.running:
+            t0 = time.monotonic()
+            if t_read is not None:
+                self.read_gaps.append(t0 - t_read)
+            self.tratar_comando()
+            t_read = time.monotonic()
+            self.verificar_atuador()
+            time.sleep(0.0005)  # volta do loop() (no host: não girar em vazio)
+
+    # --------- métricas ---------
+
+    def print_stats(self):
+        elapsed = time.monotonic() - self.t_start
+        mean_service = sum(self.service_times) / len(self.service_times) if self.service_times else 0.0
+        print("\n📊 Simulador do Arduino:")
+        print(f"   comandos recebidos: {self.received} | itens atuados: {self.completed}")
+        print(f"   itens/minuto: {60 * self.completed / elapsed:.1f} "
+              f"(máximo teórico: {60 / mean_service if mean_service else 0:.1f})")
+        print(f"   tempo médio por item: {mean_service:.2f} s | ocupado {100 * self.busy / elapsed:.0f}% do tempo")
+        print(f"   buffer serial: pico {self.rx_peak}/{self.rx_size} bytes | bytes perdidos: {self.rx_overflow}")
+        if self.read_gaps:
+            gaps = sorted(self.read_gaps)
+            print(f"   leitura da serial a cada {1000 * sum(gaps) / len(gaps):.1f} ms "
+                  f"(p99 {1000 * gaps[int(0.99 * (len(gaps) - 1))]:.1f} ms, pior {1000 * gaps[-1]:.1f} ms)")
+
+
+def open_virtual_port():
+    """Cria o pseudo-terminal: o fd mestre é o 'Arduino', o nome do escravo vai para o SerialHandler."""
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(slave_fd)
+    return master_fd, os.ttyname(slave_fd)
+
+
+# =============================================================
+#  3) TESTE DE CARGA PELO SERIALHANDLER
+# =============================================================
+
+def load_test(port, n_items, rate, seed):
+    from modules.serial_handler import make_serial_handler
+
+    handler = make_serial_handler(cfg["arduino"], port=port, boot_delay=0.0)
+    handler.start()
+
+    rng = random.Random(seed)
+    interval = 60.0 / rate if rate else 0.0
+    commands = []
+    t0 = time.monotonic()
+    for _ in range(n_items):
+        commands.append(handler.send(rng.choice(list(CLASS_ROUTES))))
+        time.sleep(interval)
+
+    for cmd in commands:
+        if cmd is not None:
+            cmd.wait()
+    elapsed = time.monotonic() - t0
+
+    done = sum(c is not None and c.status == "done" for c in commands)
+    print(f"\n🚚 Teste de carga: {n_items} itens oferecidos a {rate or 'máx.'} itens/min")
+    print(f"   atuados: {done} em {elapsed:.1f} s → {60 * done / elapsed:.1f} itens/min")
+    handler.print_stats()
+    handler.stop()
+
+
+def print_real_firing(items, slave, tolerance):
+    """
+    Acionamento real no slave (não a estimativa t_done - command_time do
+    BeltController): k-ésimo disparo do atuador = k-ésimo item enviado a ele.
+    """
+    errors, to_done = [], []
+    for name, fired in slave.fired.items():
+        sent = sorted((i for i in items if i.actuator == name and i.command is not None), key=lambda i: i.t_fire)
+        for item, t_real in zip(sent, fired):
+            errors.append(t_real - item.t_arrive)
+            if item.t_done is not None:
+                to_done.append(item.t_done - t_real)
+    if not errors:
+        print("   real (slave): nenhum disparo")
+        return
+    inside = sum(abs(e) <= tolerance for e in errors)
+    print(f"   real (slave): {inside}/{len(items)} itens acionados dentro de ±{1000 * tolerance:.0f} ms "
+          f"({100 * inside / len(items):.0f}%) | erro médio {1000 * sum(errors) / len(errors):.0f} ms | "
+          f"pior {1000 * max(errors, key=abs):.0f} ms")
+    if to_done:
+        print(f"   acionamento → término na serial: média {1000 * sum(to_done) / len(to_done):.0f} ms "
+              f"(firmware.command_ms)")
+
+
+def belt_test(port, slave, n_items, rate, seed, time_scale):
+    """
+    Mesma linha do tempo de itens pelo BeltController (serial real no
+    simulador) e pela simulate_continuous (só contas): os números de vazão
+    e fila devem bater. time_scale escala a esteira, o atuador e os delay()
+    do firmware; a serial (comando, eco, "Status recebido") e o I2C não, nos
+    dois lados. Com time_scale < 1 a janela de tolerância encolhe e o tempo
+    da serial pesa mais: o teste confere o modelo, não a folga em escala real.
+    """
+    from bench_belt_timing import make_arrivals
+    from modules.belt_controller import BeltController, firmware_timing, print_summary, simulate_continuous, summarize
+    from modules.scheduler import ActuationScheduler
+    from modules.serial_handler import make_serial_handler
+
+    sched_cfg = cfg["realtime"]["scheduler"]
+    timing = firmware_timing(sched_cfg, cfg["arduino"]["baudrate"])
+    belt_speed = sched_cfg["belt_speed"] / time_scale
+    routes = sched_cfg["routes"]
+    travel = {label.upper(): route["distance"] / belt_speed for label, route in routes.items()}
+    lead_time = sched_cfg.get("lead_time", 0.0)  # compensa serial + loop(): não escala
+    tolerance = sched_cfg.get("late_tolerance", 0.25) * time_scale
+    cycle_time = sched_cfg.get("cycle_time", 3.0) * time_scale
+
+    handler = make_serial_handler(cfg["arduino"], port=port, boot_delay=0.0)
+    handler.start()
+    scheduler = ActuationScheduler(handler.send, belt_speed, routes, lead_time=lead_time, late_tolerance=tolerance)
+    controller = BeltController(handler, scheduler, cycle_time=cycle_time,
+                                command_time=timing["command_s"], tolerance=tolerance)
+    controller.start().wait(5)
+
+    arrivals = make_arrivals(list(travel), n_items, rate / time_scale, seed)
+    t0 = time.monotonic()
+    for t_ref, label in arrivals:
+        time.sleep(max(0.0, t0 + t_ref - time.monotonic()))
+        controller.item(label, t0 + t_ref)
+
+    # espera o último item chegar ao atuador e o comando terminar
+    time.sleep(max(travel.values()) + 2 * time_scale)
+    for item in list(controller.items):
+        if item.command is not None:
+            item.command.wait(cfg["arduino"].get("done_timeout", 15.0))
+
+    print(f"\n🏭 Esteira contínua: {n_items} itens a {rate:.0f} itens/min (escala de tempo {time_scale})")
+    # cada disparo ocupa a saída da serial com eco + status e os dois avisos de retorno/parada
+    uart = rate / 60 / time_scale * (timing["command_s"] + 2 * timing["notice_s"])
+    print(f"   saída da serial do master ocupada ~{100 * uart:.0f}% do tempo")
+    if uart > 0.5:
+        print("   ⚠ serial perto da saturação: as filas dominam e medido x simulado não vale como validação "
+              "(use --time-scale maior ou --rate menor)")
+    print_summary(controller.stats(), "   medido ")
+    print_real_firing(list(controller.items), slave, tolerance)
+    # poll/return/command/notice são I2C e UART no firmware sem delay: não escalam
+    simulated = simulate_continuous(
+        [(t, label) for t, label in arrivals], travel, lead_time, cycle_time,
+        timing["poll_s"], timing["command_s"], timing["return_s"], timing["wire_s"],
+        tolerance=tolerance, notice_s=timing["notice_s"],
+    )
+    print_summary(summarize(simulated), "   simulado")
+    scheduler.print_stats()
+    handler.print_stats()
+    controller.stop()
+    handler.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplica todos os delay() (0.1 = 10x mais rápido)")
+    parser.add_argument("--stroke-time", type=float, default=1.5, help="segundos para o atuador ir da base ao topo")
+    parser.add_argument("--load-test", type=int, default=0, metavar="N", help="dispara N itens pelo SerialHandler")
+    parser.add_argument("--belt-test", type=int, default=0, metavar="N", help="N itens pela esteira contínua")
+    parser.add_argument("--rate", type=float, default=0.0, help="itens/min oferecidos no teste de carga (0 = máximo)")
+    parser.add_argument("--seed", type=int, default=0)
+    opt = parser.parse_args()
+
+    fd, port = open_virtual_port()
+    slave = SimulatedSlave(opt.stroke_time * opt.time_scale)
+    master = SimulatedMaster(fd, slave, cfg["arduino"]["baudrate"], opt.time_scale)
+    threading.Thread(target=master.loop, daemon=True).start()
+
+    print(f"🤖 Arduino simulado em: {port}")
+
+    try:
+        if opt.load_test:
+            load_test(port, opt.load_test, opt.rate, opt.seed)
+        elif opt.belt_test:
+            belt_test(port, slave, opt.belt_test, opt.rate or 20.0, opt.seed, opt.time_scale)
+        else:
+            print("   (Ctrl+C para encerrar)")
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        master.running = False
+        master.print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# =============================================================
+#  BENCHMARK DAS AUGMENTATIONS DO TREINO (CPU)
+#  Mesmo dataset e mesmos hiperparâmetros do train.py, com e sem
+#  --fast-augment: tempo por etapa (load, mosaico, perspectiva,
+#  albumentations, HSV, flip) e conferência de que as duas formas
+#  geram as mesmas labels e as mesmas imagens para a mesma semente.
+#  O HSV com LUT de 3 canais vale nas duas colunas; o ganho dele é
+#  medido à parte contra a versão antiga (split, 3 LUTs, merge)
+# =============================================================
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+YOLOV5_DIR = os.path.join(BASE_DIR, cfg["paths"]["yolov5"])
+DATASET_DIR = os.path.join(BASE_DIR, cfg["paths"]["dataset"])
+
+sys.path.insert(0, YOLOV5_DIR)
+
+import cv2
+import numpy as np
+
+from utils.augmentations import augment_hsv
+from utils.dataloaders import LoadImagesAndLabels
+
+STAGES = ["load", "mosaic", "perspective", "letterbox", "albumentations", "hsv", "flip", "convert"]
+
+
+def seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def run(dataset, n, seed):
+    """Gera n amostras (semente fixa por amostra); devolve segundos totais e ms/amostra de cada etapa."""
+    dataset.timings = {}
+    t0 = time.perf_counter()
+    for i in range(n):
+        seed_all(seed + i)
+        dataset[i % len(dataset)]
+    total = time.perf_counter() - t0
+    return total, {k: 1000 * p.t / n for k, p in dataset.timings.items()}
+
+
+def compare(legacy, fast, n, seed):
+    """Mesma semente nas duas formas: labels iguais e diferença de pixels (arredondamento da interpolação)."""
+    same_labels, diffs = 0, []
+    for i in range(n):
+        seed_all(seed + i)
+        im_a, labels_a, *_ = legacy[i % len(legacy)]
+        seed_all(seed + i)
+        im_b, labels_b, *_ = fast[i % len(fast)]
+        if labels_a.shape == labels_b.shape and np.allclose(labels_a.numpy(), labels_b.numpy(), atol=1e-5):
+            same_labels += 1
+        if im_a.shape == im_b.shape:
+            diffs.append(np.abs(im_a.numpy().astype(np.int16) - im_b.numpy().astype(np.int16)))
+    if not diffs:
+        return same_labels, float("nan"), float("nan"), 0.0
+    d = np.stack([x.max() for x in diffs])
+    mean = float(np.mean([x.mean() for x in diffs]))
+    changed = float(np.mean([(x > 1).mean() for x in diffs]))
+    return same_labels, mean, float(d.max()), changed
+
+
+def augment_hsv_split(im, hgain=0.5, sgain=0.5, vgain=0.5):
+    """augment_hsv() antes do LUT de 3 canais: split, um LUT por canal e merge (mesmos sorteios)."""
+    if hgain or sgain or vgain:
+        r = np.random.uniform(-1, 1, 3) * [hgain, sgain, vgain] + 1
+        hue, sat, val = cv2.split(cv2.cvtColor(im, cv2.COLOR_BGR2HSV))
+        dtype = im.dtype
+
+        x = np.arange(0, 256, dtype=r.dtype)
+        lut_hue = ((x * r[0]) % 180).astype(dtype)
+        lut_sat = np.clip(x * r[1], 0, 255).astype(dtype)
+        lut_val = np.clip(x * r[2], 0, 255).astype(dtype)
+
+        im_hsv = cv2.merge((cv2.LUT(hue, lut_hue), cv2.LUT(sat, lut_sat), cv2.LUT(val, lut_val)))
+        cv2.cvtColor(im_hsv, cv2.COLOR_HSV2BGR, dst=im)
+
+
+def bench_hsv(dataset, hyp, n, seed):
+    """ms/imagem do HSV antigo x LUT de 3 canais nas mesmas imagens e ganhos; True se as saídas são iguais."""
+    images = [dataset.load_image(i % len(dataset))[0] for i in range(n)]
+    gains = hyp["hsv_h"], hyp["hsv_s"], hyp["hsv_v"]
+    times, outputs = {}, {}
+    for name, fn in (("split/merge", augment_hsv_split), ("LUT 3 canais", augment_hsv)):
+        seed_all(seed)
+        ims = [im.copy() for im in images]
+        t0 = time.perf_counter()
+        for im in ims:
+            fn(im, *gains)
+        times[name] = 1000 * (time.perf_counter() - t0) / n
+        outputs[name] = ims
+    same = all(np.array_equal(a, b) for a, b in zip(*outputs.values()))
+    return times, same
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--img-size", type=int, default=cfg["training"]["img_size"])
+    parser.add_argument("--hyp", default=os.path.join(YOLOV5_DIR, "data", "hyps", "hyp.scratch-low.yaml"))
+    parser.add_argument("--seed", type=int, default=0)
+    opt = parser.parse_args()
+
+    with open(opt.hyp, "r", encoding="utf-8") as f:
+        hyp = yaml.safe_load(f)
+
+    images = os.path.join(DATASET_DIR, opt.split, "images")
+    datasets = {
+        "atual": LoadImagesAndLabels(images, opt.img_size, augment=True, hyp=hyp),
+        "rápido": LoadImagesAndLabels(images, opt.img_size, augment=True, hyp=hyp, fast_augment=True),
+    }
+    n = opt.samples
+    print(f"🖼 {n} amostras de {images} | {os.path.basename(opt.hyp)} | img {opt.img_size}\n")
+
+    # aquecimento (leitura do disco / page cache)
+    for dataset in datasets.values():
+        run(dataset, min(n, 20), opt.seed)
+
+    results = {name: run(dataset, n, opt.seed) for name, dataset in datasets.items()}
+    stages = [s for s in STAGES if any(s in r[1] for r in results.values())]
+
+    print(f"{'etapa (ms/amostra)':<20}" + "".join(f"{name:>10}" for name in results))
+    for stage in stages:
+        print(f"{stage:<20}" + "".join(f"{r[1].get(stage, 0.0):>10.2f}" for r in results.values()))
+    print(f"{'total':<20}" + "".join(f"{1000 * r[0] / n:>10.2f}" for r in results.values()))
+    print(f"{'amostras/s':<20}" + "".join(f"{n / r[0]:>10.1f}" for r in results.values()))
+
+    legacy, fast = results["atual"][0], results["rápido"][0]
+    print(f"\n⚡ ganho: {legacy / fast:.2f}x no custo das augmentations por amostra")
+
+    hsv_times, hsv_same = bench_hsv(datasets["atual"], hyp, n, opt.seed)
+    (old_name, old), (new_name, new) = hsv_times.items()
+    print(f"🎨 HSV (nas duas colunas): {old_name} {old:.2f} ms → {new_name} {new:.2f} ms por imagem "
+          f"({old / new:.2f}x, saídas {'iguais' if hsv_same else 'DIFERENTES'})")
+
+    same, mean, worst, changed = compare(datasets["atual"], datasets["rápido"], n, opt.seed)
+    print(f"🔍 mesma semente: labels iguais em {same}/{n} amostras | pixels: diferença média {mean:.3f}, "
+          f"máxima {worst:.0f}, {100 * changed:.3f}% com diferença > 1")
+    print("   (com albumentations instalado o modo rápido sorteia cada transformação antes de chamar a biblioteca, "
+          "então HSV/flip usam outros números: as amostras diferem, a distribuição é a mesma)")
+
+
+if __name__ == "__main__":
+    main()
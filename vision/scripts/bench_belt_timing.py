@@ -0,0 +1,78 @@
+# =============================================================
+#  SIMULAÇÃO DA ESTEIRA: MODO ATUAL x ESTEIRA CONTÍNUA
+#  master.ino atual (liga, delay fixo, dispara, para: um item
+#  por vez) x controle pelo Python (esteira sempre ligada e
+#  A2A..A5A disparados na chegada de cada item)
+#  Mede itens/min, itens na esteira e filas para cada taxa
+# =============================================================
+
+import os
+import random
+import argparse
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+from modules.belt_controller import firing_error_range, firmware_timing, simulate_continuous, simulate_legacy, summarize
+
+
+def make_arrivals(labels, n_items, rate, seed):
+    """Itens saindo da ROI a `rate` itens/min (intervalos exponenciais)."""
+    rng = random.Random(seed)
+    t, arrivals = 0.0, []
+    for _ in range(n_items):
+        t += rng.expovariate(rate / 60)
+        arrivals.append((t, rng.choice(labels)))
+    return arrivals
+
+
+def main():
+    sched_cfg = cfg["realtime"]["scheduler"]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--rates", type=float, nargs="+", default=[5, 10, 20, 30, 40, 60],
+                        help="itens/min oferecidos pela visão")
+    parser.add_argument("--belt-speed", type=float, default=sched_cfg["belt_speed"], help="m/s")
+    parser.add_argument("--lead-time", type=float, default=sched_cfg.get("lead_time", 0.0),
+                        help="antecipação do disparo (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    opt = parser.parse_args()
+
+    timing = firmware_timing(sched_cfg, cfg["arduino"]["baudrate"])
+    travel = {label.upper(): route["distance"] / opt.belt_speed for label, route in sched_cfg["routes"].items()}
+    lead_time = opt.lead_time
+    cycle_time = sched_cfg.get("cycle_time", 3.0)
+    tolerance = sched_cfg.get("late_tolerance", 0.25)
+
+    print(f"🚚 {opt.items} itens | esteira {opt.belt_speed:.2f} m/s | leitura da serial a cada {1000 * timing['poll_s']:.0f} ms | "
+          f"antecipação {1000 * lead_time:.0f} ms | tolerância ±{1000 * tolerance:.0f} ms")
+    early, late = firing_error_range(timing, lead_time)
+    print(f"   erro do disparo sem fila na serial: {1000 * early:+.0f} a {1000 * late:+.0f} ms")
+    print(f"\n{'oferta/min':<12}{'modo':<11}{'itens/min':>10}{'desviados':>10}{'%':>5}{'erro ms':>9}{'pior ms':>9}"
+          f"{'conflitos':>10}{'fora':>6}{'esteira':>9}{'fila ms':>9}{'fila p95':>10}")
+    for rate in opt.rates:
+        arrivals = make_arrivals(list(travel), opt.items, rate, opt.seed)
+        runs = {
+            "atual": simulate_legacy(arrivals, travel, timing["poll_s"], timing["command_s"],
+                                     timing["ramp_on_s"], timing["ramp_off_s"]),
+            "contínua": simulate_continuous(arrivals, travel, lead_time, cycle_time, timing["poll_s"],
+                                            timing["command_s"], timing["return_s"], timing["wire_s"],
+                                            tolerance=tolerance, notice_s=timing["notice_s"]),
+        }
+        for name, items in runs.items():
+            s = summarize(items)
+            print(f"{rate:<12.0f}{name:<11}{s['items_min']:>10.1f}{s['sorted']:>10}{100 * s['sorted'] / s['items']:>5.0f}"
+                  f"{s['error_ms']:>9.0f}{s['max_error_ms']:>9.0f}{s['conflicts']:>10}{s['missed']:>6}"
+                  f"{s['belt_mean']:>9.1f}{s['queue_mean_ms']:>9.0f}{s['queue_p95_ms']:>10.0f}")
+
+    print("\n% = desviados / oferecidos | erro = acionamento - chegada do item (médio e pior) | "
+          "esteira = itens em cima da esteira em média\nfila = envio → acionamento no master "
+          "(no modo atual inclui a viagem do próprio item)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# =============================================================
+#  BENCHMARK DO build_targets (ATRIBUIÇÃO DE ALVOS DO LOSS)
+#  Lotes aleatórios com o modelo do treino: compara a versão em
+#  uma passada (ComputeLoss.build_targets) com a versão por camada
+#  (build_targets_loop) tensor a tensor e mede o tempo por iteração
+# =============================================================
+
+import os
+import sys
+import time
+import argparse
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+YOLOV5_DIR = os.path.join(BASE_DIR, cfg["paths"]["yolov5"])
+DATA_YAML = os.path.join(BASE_DIR, cfg["paths"]["data_yaml"])
+
+sys.path.insert(0, YOLOV5_DIR)
+
+with open(DATA_YAML, "r", encoding="utf-8") as f:
+    names = yaml.safe_load(f)["names"]
+
+import torch
+
+from models.yolo import Model
+from utils.loss import ComputeLoss
+
+
+def random_batch(model, batch, img_size, max_targets, generator):
+    """Predições aleatórias no formato do Detect e alvos (imagem, classe, x, y, w, h) normalizados."""
+    m = model.model[-1]
+    p = [torch.randn(batch, m.na, img_size // int(s), img_size // int(s), m.no, generator=generator)
+         for s in m.stride]
+
+    n = torch.randint(0, max_targets + 1, (batch,), generator=generator)
+    image = torch.repeat_interleave(torch.arange(batch), n).float()
+    nt = len(image)
+    cls = torch.randint(0, m.nc, (nt,), generator=generator).float()
+    xy = torch.rand(nt, 2, generator=generator)
+    wh = torch.rand(nt, 2, generator=generator) * 0.6 + 0.01
+    # metade dos centros exatamente na borda de uma célula (casos g = 0.5 / gxy > 1)
+    edge = torch.rand(nt, generator=generator) < 0.5
+    cells = img_size // int(m.stride[0])
+    xy[edge] = torch.randint(0, cells + 1, (int(edge.sum()), 2), generator=generator).float() / cells
+    return p, torch.cat((image[:, None], cls[:, None], xy, wh), 1)
+
+
+def same(a, b):
+    """Saída do build_targets idêntica camada a camada (mesma ordem, mesmos valores)."""
+    tcls_a, tbox_a, ind_a, anch_a = a
+    tcls_b, tbox_b, ind_b, anch_b = b
+    for i in range(len(tcls_a)):
+        pairs = [(tcls_a[i], tcls_b[i]), (tbox_a[i], tbox_b[i]), (anch_a[i], anch_b[i])]
+        pairs += list(zip(ind_a[i], ind_b[i]))
+        if not all(x.shape == y.shape and torch.equal(x, y) for x, y in pairs):
+            return False
+    return True
+
+
+def timed(fn, args, iterations):
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(*args)
+    return 1000 * (time.perf_counter() - t0) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cfg", default=os.path.join(YOLOV5_DIR, "models", "yolov5s.yaml"))
+    parser.add_argument("--hyp", default=os.path.join(YOLOV5_DIR, "data", "hyps", "hyp.scratch-low.yaml"))
+    parser.add_argument("--batch", type=int, default=cfg["training"]["batch"])
+    parser.add_argument("--img-sizes", type=int, nargs="+", default=[cfg["training"]["img_size"]])
+    parser.add_argument("--max-targets", type=int, default=30, help="máximo de objetos por imagem")
+    parser.add_argument("--batches", type=int, default=200, help="lotes aleatórios conferidos")
+    parser.add_argument("--iterations", type=int, default=200, help="repetições na medição de tempo")
+    parser.add_argument("--seed", type=int, default=0)
+    opt = parser.parse_args()
+
+    with open(opt.hyp, "r", encoding="utf-8") as f:
+        hyp = yaml.safe_load(f)
+    model = Model(opt.cfg, ch=3, nc=len(names))
+    model.hyp = hyp
+    compute_loss = ComputeLoss(model)
+    generator = torch.Generator().manual_seed(opt.seed)
+
+    # conferência: mesmos alvos e mesmo loss nas duas versões
+    mismatches = loss_diff = 0
+    for i in range(opt.batches):
+        size = opt.img_sizes[i % len(opt.img_sizes)]
+        max_targets = 0 if i == 0 else opt.max_targets  # um lote sem objetos
+        p, targets = random_batch(model, opt.batch, size, max_targets, generator)
+        mismatches += not same(compute_loss.build_targets(p, targets), compute_loss.build_targets_loop(p, targets))
+
+        loss, _ = compute_loss(p, targets)
+        compute_loss.build_targets = compute_loss.build_targets_loop
+        loss_loop, _ = compute_loss(p, targets)
+        del compute_loss.build_targets  # volta ao método da classe
+        loss_diff = max(loss_diff, (loss - loss_loop).abs().item())
+    status = "✅" if not mismatches else "❌"
+    print(f"{status} {opt.batches - mismatches}/{opt.batches} lotes com alvos idênticos | "
+          f"maior diferença no loss: {loss_diff:.3g}\n")
+
+    print(f"{'img':>6}{'alvos':>8}{'por camada ms':>15}{'uma passada ms':>16}{'ganho':>8}")
+    for size in opt.img_sizes:
+        p, targets = random_batch(model, opt.batch, size, opt.max_targets, generator)
+        for fn in (compute_loss.build_targets, compute_loss.build_targets_loop):  # aquecimento
+            timed(fn, (p, targets), 5)
+        loop_ms = timed(compute_loss.build_targets_loop, (p, targets), opt.iterations)
+        batched_ms = timed(compute_loss.build_targets, (p, targets), opt.iterations)
+        print(f"{size:>6}{len(targets):>8}{loop_ms:>15.3f}{batched_ms:>16.3f}{loop_ms / batched_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
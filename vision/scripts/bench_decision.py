@@ -0,0 +1,165 @@
+# =============================================================
+#  BENCHMARK DOS MOTORES DE DECISÃO (REPLAY SINTÉTICO)
+#  RoiTimer (3 s estáveis) x EvidenceDecision (evidência acumulada)
+#  Mede itens/minuto decididos corretamente e latência de decisão
+# =============================================================
+
+import os
+import sys
+import random
+import argparse
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+with open(os.path.join(BASE_DIR, cfg["paths"]["data_yaml"]), "r", encoding="utf-8") as f:
+    names = yaml.safe_load(f)["names"]
+
+from modules.decision import make_decision_engine
+from modules.roi_timer import RoiTimer
+
+
+def simulate_belt(labels, n_items, fps, visible, gap, p_miss, p_flip, p_false, seed):
+    """
+    Gera a sequência de frames de uma esteira: cada item fica `visible`
+    segundos na ROI, separado do próximo por `gap` segundos vazios.
+    Retorna (frames, items) com frames = [(t, detections)] e
+    items = [(classe, t_entrada, t_saida)].
+    """
+    rng = random.Random(seed)
+    frames, items = [], []
+    dt = 1.0 / fps
+    t = 0.0
+
+    for _ in range(n_items):
+        true_label = rng.choice(labels)
+        t_in, t_out = t, t + visible
+        items.append((true_label, t_in, t_out))
+
+        while t < t_out:
+            detections = []
+            if rng.random() > p_miss:
+                label = true_label
+                if rng.random() < p_flip:
+                    label = rng.choice([l for l in labels if l != true_label])
+                detections.append((100, 100, 200, 200, label, rng.uniform(0.5, 0.95)))
+            frames.append((t, detections))
+            t += dt
+
+        t_gap = t + gap
+        while t < t_gap:
+            detections = []
+            if rng.random() < p_false:
+                detections.append((100, 100, 200, 200, rng.choice(labels), rng.uniform(0.5, 0.6)))
+            frames.append((t, detections))
+            t += dt
+
+    return frames, items
+
+
+def replay(engine, frames, items, grace):
+    """
+    Passa os frames pelo motor e casa cada decisão com o item que está na ROI.
+    Uma segunda decisão para o mesmo item físico conta como duplicada (na
+    esteira ela dispara o atuador de novo, em cima do item seguinte).
+    """
+    decisions = []
+    for t, detections in frames:
+        label = detections[-1][4] if detections else "NONE"
+        confirmed = engine.update(label, detections, now=t)
+        if confirmed and confirmed != "NONE":
+            decisions.append((t, confirmed))
+
+    correct, wrong, duplicates, latencies = 0, 0, 0, []
+    used = set()
+    for t, label in decisions:
+        # item mais recente que entrou na ROI e ainda não saiu (+ tolerância)
+        current = [i for i, (_, t_in, t_out) in enumerate(items) if t_in <= t <= t_out + grace]
+        if not current:
+            wrong += 1  # decisão sem item na ROI
+            continue
+        i = current[-1]
+        if i in used:
+            duplicates += 1
+            continue
+        used.add(i)
+        if label == items[i][0]:
+            correct += 1
+            latencies.append(t - items[i][1])
+        else:
+            wrong += 1
+
+    duration_min = frames[-1][0] / 60 if frames else 1
+    return {
+        "items_min": correct / duration_min,
+        "correct": correct,
+        "wrong": wrong,
+        "duplicates": duplicates,
+        "missed": len(items) - len(used),
+        "latency": sum(latencies) / len(latencies) if latencies else float("nan"),
+    }
+
+
+def duplicate_case(engine, fps=30.0, visible=6.0, streak=0.3):
+    """
+    Caso fixo: um único item lento na ROI, detectado em todo frame menos em
+    sequências de `streak` segundos sem detecção (oclusão, reflexo). O motor
+    precisa decidir exatamente uma vez; retorna o número de decisões.
+    """
+    decisions = 0
+    dt = 1.0 / fps
+    for k in range(int(visible * fps)):
+        t = k * dt
+        missing = (t % 1.0) < streak  # um buraco de `streak` s a cada segundo
+        detections = [] if missing else [(100, 100, 200, 200, "PLASTICO", 0.9)]
+        confirmed = engine.update("PLASTICO" if detections else "NONE", detections, now=t)
+        if confirmed and confirmed != "NONE":
+            decisions += 1
+    return decisions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=8.0, help="frames/s que a inferência consegue entregar")
+    parser.add_argument("--visible", type=float, nargs="+", default=[1.0, 2.0, 3.0, 4.0, 6.0],
+                        help="segundos que cada item fica na ROI")
+    parser.add_argument("--gap", type=float, default=0.5, help="segundos de esteira vazia entre itens")
+    parser.add_argument("--p-miss", type=float, default=0.15, help="chance de um frame não detectar o item")
+    parser.add_argument("--p-flip", type=float, default=0.10, help="chance de a classe do frame vir errada")
+    parser.add_argument("--p-false", type=float, default=0.02, help="chance de detecção falsa com a esteira vazia")
+    parser.add_argument("--seed", type=int, default=0)
+    opt = parser.parse_args()
+
+    labels = [n.upper() for n in names]
+    dcfg = dict(cfg["realtime"].get("decision", {}) or {})
+
+    print(f"{'visível (s)':<12}{'motor':<11}{'itens/min':>10}{'certos':>8}{'errados':>9}"
+          f"{'duplicados':>12}{'perdidos':>10}{'latência (s)':>14}")
+    for visible in opt.visible:
+        frames, items = simulate_belt(labels, opt.items, opt.fps, visible, opt.gap,
+                                      opt.p_miss, opt.p_flip, opt.p_false, opt.seed)
+        engines = {
+            "roi_timer": RoiTimer(hold_seconds=dcfg.get("hold_seconds", 3)),
+            "evidence": make_decision_engine({"realtime": {"decision": {**dcfg, "engine": "evidence"}}}, names),
+        }
+        for name, engine in engines.items():
+            r = replay(engine, frames, items, grace=opt.gap)
+            print(f"{visible:<12.1f}{name:<11}{r['items_min']:>10.1f}{r['correct']:>8}{r['wrong']:>9}"
+                  f"{r['duplicates']:>12}{r['missed']:>10}{r['latency']:>14.2f}")
+
+    # item lento com buracos de detecção: o motor de evidência não pode decidir duas vezes
+    engine = make_decision_engine({"realtime": {"decision": {**dcfg, "engine": "evidence"}}}, names)
+    decisions = duplicate_case(engine)
+    if decisions != 1:
+        print(f"\n❌ Item lento com frames sem detecção gerou {decisions} decisões (esperado 1)")
+        sys.exit(1)
+    print("\n✅ Item lento com frames sem detecção gerou uma única decisão")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# =============================================================
+#  BENCHMARK DO CACHE DE LABELS (RESCAN INCREMENTAL)
+#  Copia o train/ do dataset para uma pasta temporária, cria o
+#  labels.cache e mede quanto o rescan demora com N imagens
+#  rotuladas novas: cache incremental x rescan completo
+# =============================================================
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+YOLOV5_DIR = os.path.join(BASE_DIR, cfg["paths"]["yolov5"])
+DATASET_DIR = os.path.join(BASE_DIR, cfg["paths"]["dataset"])
+
+sys.path.insert(0, YOLOV5_DIR)
+
+from utils.dataloaders import LoadImagesAndLabels, img2label_paths
+
+
+def move(files, dst_dir):
+    """Move os arquivos para dst_dir mantendo o nome; devolve os novos caminhos."""
+    moved = []
+    for f in files:
+        moved.append(os.path.join(dst_dir, os.path.basename(f)))
+        shutil.move(f, moved[-1])
+    return moved
+
+
+def scan(images_dir, img_size):
+    """Tempo de criar o dataset (leitura do cache + rescan dos arquivos alterados)."""
+    t0 = time.perf_counter()
+    dataset = LoadImagesAndLabels(str(images_dir), img_size=img_size, batch_size=16)
+    return time.perf_counter() - t0, len(dataset)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--changed", type=int, nargs="+", default=[0, 10, 50, 200],
+                        help="quantidade de imagens novas antes de cada rescan")
+    parser.add_argument("--img-size", type=int, default=cfg["training"]["img_size"])
+    opt = parser.parse_args()
+
+    src = Path(DATASET_DIR) / opt.split
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / opt.split
+        shutil.copytree(src / "images", root / "images")
+        shutil.copytree(src / "labels", root / "labels")
+        cache_file = root / "labels.cache"
+
+        images = sorted(str(p) for p in (root / "images").iterdir())
+        print(f"📂 {len(images)} imagens copiadas de {src}")
+
+        full, n = scan(root / "images", opt.img_size)
+        print(f"🆕 cache criado do zero: {full:.2f} s ({n} imagens)\n")
+
+        # N imagens rotuladas "chegando" ao dataset: tira N pares, refaz o cache e devolve
+        hold = Path(tmp) / "novas"
+        (hold / "images").mkdir(parents=True)
+        (hold / "labels").mkdir(parents=True)
+
+        print(f"{'novos':>8}{'incremental (s)':>17}{'completo (s)':>14}{'ganho':>8}")
+        for k in opt.changed:
+            k = min(k, len(images))
+            new_images = images[len(images) - k:]
+            new_labels = [f for f in img2label_paths(new_images) if os.path.isfile(f)]
+            held_images = move(new_images, hold / "images")
+            held_labels = move(new_labels, hold / "labels")
+            scan(root / "images", opt.img_size)
+            move(held_images, root / "images")
+            move(held_labels, root / "labels")
+
+            incremental, _ = scan(root / "images", opt.img_size)
+            cache_file.unlink()
+            complete, _ = scan(root / "images", opt.img_size)
+            print(f"{k:>8}{incremental:>17.2f}{complete:>14.2f}{complete / incremental:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
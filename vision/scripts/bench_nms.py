@@ -0,0 +1,86 @@
+# =============================================================
+#  BENCHMARK DO NMS
+#  non_max_suppression (lote) x non_max_suppression_single (bs=1)
+#  sobre saídas do modelo gravadas a partir do dataset_manual/valid
+# =============================================================
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+import cv2
+import torch
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, cfg["paths"]["yolov5"]))
+
+from modules.model_loader import load_model, non_max_suppression, non_max_suppression_single
+from modules.preprocess import Preprocessor
+
+DEFAULT_RECORDING = os.path.join(BASE_DIR, cfg["paths"]["models"], "nms_outputs.pt")
+
+
+def record_outputs(path):
+    """Roda o modelo da estação nas imagens de validação e salva as predições brutas."""
+    model = load_model(os.path.join(BASE_DIR, cfg["paths"]["weights_torchscript"]), "cpu")
+    img_size = tuple(model.meta["shape"][2:]) if "shape" in model.meta else cfg["training"]["img_size"]
+    preprocessor = Preprocessor(img_size, "cpu", auto="shape" not in model.meta)
+
+    outputs = []
+    files = sorted(glob.glob(os.path.join(BASE_DIR, cfg["paths"]["dataset"], "valid", "images", "*.jpg")))
+    with torch.no_grad():
+        for f in files:
+            outputs.append(model(preprocessor(cv2.imread(f)))[0].clone())
+
+    torch.save(outputs, path)
+    print(f"💾 {len(outputs)} saídas gravadas em {path}")
+
+
+def bench(fn, outputs, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for pred in outputs:
+            fn(pred)
+    return 1000 * (time.perf_counter() - t0) / (repeats * len(outputs))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--outputs", default=DEFAULT_RECORDING, help="arquivo .pt com as saídas do modelo")
+    parser.add_argument("--record", action="store_true", help="gravar as saídas antes do benchmark")
+    parser.add_argument("--repeats", type=int, default=20)
+    opt = parser.parse_args()
+
+    if opt.record or not os.path.isfile(opt.outputs):
+        record_outputs(opt.outputs)
+    outputs = torch.load(opt.outputs)
+
+    conf_thres = cfg["realtime"]["conf_thres"]
+    iou_thres = cfg["realtime"]["iou_thres"]
+    batched = lambda p: non_max_suppression(p, conf_thres, iou_thres)[0]
+    single = lambda p: non_max_suppression_single(p, conf_thres, iou_thres)
+
+    # as duas funções precisam devolver exatamente as mesmas detecções
+    mismatches = sum(not torch.equal(batched(p), single(p)) for p in outputs)
+    print(f"Frames com resultado diferente: {mismatches}/{len(outputs)}")
+
+    for fn in (batched, single):  # aquecimento
+        bench(fn, outputs[:10], 1)
+
+    ms_batched = bench(batched, outputs, opt.repeats)
+    ms_single = bench(single, outputs, opt.repeats)
+    print(f"non_max_suppression        {ms_batched:.3f} ms/frame")
+    print(f"non_max_suppression_single {ms_single:.3f} ms/frame")
+    print(f"Economia por frame: {ms_batched - ms_single:.3f} ms ({100 * (1 - ms_single / ms_batched):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# =============================================================
+#  BENCHMARK DOS PROTOCOLOS SERIAIS
+#  Texto (firmware atual) x binário compacto (modules/protocol.py)
+#  Bytes no fio, tempo no fio a 9600 baud e custo de encode/decode
+# =============================================================
+
+import time
+import argparse
+
+from modules.protocol import (
+    BinaryProtocol,
+    TextProtocol,
+    CLASS_COMMANDS,
+    OP_ACK,
+    OP_DONE,
+    OP_STATUS,
+    encode_frame,
+)
+
+# respostas típicas do master.ino para um comando de classe
+TEXT_REPLIES = {
+    "ack": b"ARDUINO: Recebi comando -> PLASTICO\r\n",
+    "done": b"[ESTEIRA] Motor parado.\r\n",
+    "status": b"Status recebido: A2:2,A3:2,A4:2,A5:2\r\n",
+}
+BINARY_REPLIES = {
+    "ack": encode_frame(OP_ACK, 7),
+    "done": encode_frame(OP_DONE, 7),
+    "status": encode_frame(OP_STATUS, 7, bytes((2, 2, 2, 2, 0))),
+}
+
+
+def time_per_call(fn, runs):
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return 1e6 * (time.perf_counter() - t0) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--runs", type=int, default=100000)
+    opt = parser.parse_args()
+
+    wire_ms = lambda n: 1000 * n * 10 / opt.baudrate  # 10 bits por byte (8N1)
+
+    print(f"{'mensagem':<18}{'texto (B)':>10}{'binário (B)':>13}{'texto (ms)':>12}{'binário (ms)':>14}")
+    for cmd in CLASS_COMMANDS + ("STATUS",):
+        t = len(TextProtocol().encode(cmd, 0))
+        b = len(BinaryProtocol().encode(cmd, 0))
+        print(f"{'→ ' + cmd:<18}{t:>10}{b:>13}{wire_ms(t):>12.2f}{wire_ms(b):>14.2f}")
+    for kind in TEXT_REPLIES:
+        t, b = len(TEXT_REPLIES[kind]), len(BINARY_REPLIES[kind])
+        print(f"{'← ' + kind:<18}{t:>10}{b:>13}{wire_ms(t):>12.2f}{wire_ms(b):>14.2f}")
+
+    # um comando de classe completo: envio + ack + término
+    t = len(TextProtocol().encode("PLASTICO", 0)) + len(TEXT_REPLIES["ack"]) + len(TEXT_REPLIES["done"])
+    b = len(BinaryProtocol().encode("PLASTICO", 0)) + len(BINARY_REPLIES["ack"]) + len(BINARY_REPLIES["done"])
+    print(f"{'ciclo PLASTICO':<18}{t:>10}{b:>13}{wire_ms(t):>12.2f}{wire_ms(b):>14.2f}")
+
+    print(f"\n{'custo por mensagem':<28}{'texto (µs)':>12}{'binário (µs)':>14}")
+    text, binary = TextProtocol(), BinaryProtocol()
+    print(f"{'encode PLASTICO':<28}"
+          f"{time_per_call(lambda: text.encode('PLASTICO', 7), opt.runs):>12.2f}"
+          f"{time_per_call(lambda: binary.encode('PLASTICO', 7), opt.runs):>14.2f}")
+    for kind in TEXT_REPLIES:
+        print(f"{'decode ' + kind:<28}"
+              f"{time_per_call(lambda: text.feed(TEXT_REPLIES[kind]), opt.runs):>12.2f}"
+              f"{time_per_call(lambda: binary.feed(BINARY_REPLIES[kind]), opt.runs):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
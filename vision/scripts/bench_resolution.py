@@ -0,0 +1,182 @@
+# =============================================================
+#  BENCHMARK DAS RESOLUÇÕES DE ENTRADA (GRAVAÇÃO REAL)
+#  Cada nível (best_ts_320.pt, ...) roda sobre a mesma gravação:
+#  latência p50/p99 x concordância com o maior nível (+ mAP opcional)
+#  e simulação do controle adaptativo sobre os mesmos frames
+# =============================================================
+
+import os
+import sys
+import time
+import argparse
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+YOLOV5_DIR = os.path.join(BASE_DIR, cfg["paths"]["yolov5"])
+DATA_YAML = os.path.join(BASE_DIR, cfg["paths"]["data_yaml"])
+
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, YOLOV5_DIR)
+
+with open(DATA_YAML, "r", encoding="utf-8") as f:
+    names = yaml.safe_load(f)["names"]
+
+from modules.detection import run_inference
+from modules.recorder import RecordedSource
+from modules.resolution import ResolutionController, load_tiers
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def agreement(detections, reference, iou_thres=0.5):
+    """Detecções da referência reencontradas (mesma classe, IoU >= iou_thres)."""
+    found = 0
+    for ref in reference:
+        if any(d[4] == ref[4] and iou(d, ref) >= iou_thres for d in detections):
+            found += 1
+    return found, len(reference)
+
+
+def run_tier(model, preprocessor, size, frames, roi):
+    """Roda um nível sobre todos os frames; devolve [(latência s, detecções)]."""
+    results = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        _, detections = run_inference(
+            model=model,
+            frame=frame,
+            device=cfg["realtime"]["device"],
+            img_size=size,
+            conf_thres=cfg["realtime"]["conf_thres"],
+            iou_thres=cfg["realtime"]["iou_thres"],
+            names=names,
+            roi=roi,
+            preprocessor=preprocessor,
+        )
+        results.append((time.perf_counter() - t0, detections))
+    return results
+
+
+def simulate_controller(controller, results):
+    """Repassa os frames escolhendo, a cada um, o resultado do nível que o controle pediria."""
+    picked = []
+    for i in range(len(next(iter(results.values())))):
+        size = controller.size
+        latency, detections = results[size][i]
+        controller.update(latency, detections)
+        picked.append((latency, detections))
+    return picked
+
+
+def evaluate_map(imgsz):
+    """mAP do checkpoint .pt no valid/ na resolução pedida (val.py do YOLOv5)."""
+    import val
+
+    cwd = os.getcwd()
+    os.chdir(YOLOV5_DIR)  # data.yaml usa caminhos relativos à pasta YOLOv5
+    try:
+        (mp, mr, map50, map_, *_), _, _ = val.run(
+            data=DATA_YAML,
+            weights=os.path.join(BASE_DIR, cfg["paths"]["weights_pt"]),
+            batch_size=1,
+            imgsz=imgsz,
+            device="cpu",
+            workers=0,
+            half=False,
+            plots=False,
+            project=os.path.join(BASE_DIR, cfg["paths"]["models"], "val_resolution"),
+            exist_ok=True,
+        )
+    finally:
+        os.chdir(cwd)
+    return map50, map_
+
+
+def main():
+    res_cfg = cfg["realtime"].get("adaptive_resolution", {}) or {}
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording", help="pasta gravada com realtime.record")
+    parser.add_argument("--sizes", type=int, nargs="+", default=res_cfg.get("sizes", [320, 416, 512, 640]))
+    parser.add_argument("--target-ms", type=float, default=res_cfg.get("target_ms", 100))
+    parser.add_argument("--frames", type=int, default=300, help="máximo de frames lidos da gravação")
+    parser.add_argument("--threads", type=int, default=cfg["realtime"].get("threads"))
+    parser.add_argument("--map", action="store_true", help="também roda o val.py em cada resolução")
+    opt = parser.parse_args()
+
+    rt = cfg["realtime"]
+    roi = (rt["roi_x_start"], rt["roi_y_start"], rt["roi_x_end"], rt["roi_y_end"]) \
+        if rt.get("roi_inference", False) else None
+
+    source = RecordedSource(opt.recording)
+    frames = []
+    while len(frames) < opt.frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    print(f"🎞 {len(frames)} frames de {opt.recording}")
+
+    weights = os.path.join(BASE_DIR, cfg["paths"]["weights_torchscript"])
+    tiers, tier_ms = load_tiers(weights, opt.sizes, rt["device"], threads=opt.threads)
+    sizes = sorted(tiers)
+
+    results = {size: run_tier(*tiers[size], size, frames, roi) for size in sizes}
+    reference = [d for _, d in results[sizes[-1]]]
+
+    def report(name, rows, map_text=""):
+        latencies = [1000 * lat for lat, _ in rows]
+        found = total = 0
+        for (_, detections), ref in zip(rows, reference):
+            f, n = agreement(detections, ref)
+            found, total = found + f, total + n
+        match = 100 * found / total if total else float("nan")
+        print(f"{name:<11}{percentile(latencies, 0.5):>9.1f}{percentile(latencies, 0.99):>9.1f}"
+              f"{1000 / max(sum(latencies) / len(latencies), 1e-9):>8.1f}{match:>12.1f}{map_text}")
+
+    header = f"{'nível':<11}{'p50 ms':>9}{'p99 ms':>9}{'fps':>8}{'concord. %':>12}"
+    if opt.map:
+        header += f"{'mAP50':>9}{'mAP50-95':>10}"
+    print(f"\n{header}")
+    for size in sizes:
+        map_text = ""
+        if opt.map:
+            map50, map_ = evaluate_map(size)
+            map_text = f"{map50:>9.3f}{map_:>10.3f}"
+        report(str(size), results[size], map_text)
+
+    controller = ResolutionController(
+        sizes,
+        target_ms=opt.target_ms,
+        conf_thres=rt["conf_thres"],
+        margin=res_cfg.get("margin", 0.15),
+        headroom=res_cfg.get("headroom", 0.5),
+        relax_frames=res_cfg.get("relax_frames", 15),
+        cooldown=res_cfg.get("cooldown", 5),
+        initial_ms=tier_ms,
+    )
+    report("adaptativo", simulate_controller(controller, results))
+    print(f"\nConcordância: detecções do nível {sizes[-1]} reencontradas (mesma classe, IoU >= 0.5)\n")
+    controller.print_stats()
+
+
+if __name__ == "__main__":
+    main()
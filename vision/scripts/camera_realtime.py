@@ -7,7 +7,6 @@ import os
 import sys
 import yaml
 import torch
-import numpy as np
 import serial
 import threading
 import time
@@ -29,8 +28,9 @@ DATA_YAML = os.path.join(BASE_DIR, cfg["paths"]["data_yaml"])
 sys.path.insert(0, BASE_DIR)
 sys.path.insert(0, YOLOV5_PATH)
 
-from yolov5.utils.general import non_max_suppression, scale_boxes
-from yolov5.utils.augmentations import letterbox
+from yolov5.utils.general import non_max_suppression_single, scale_boxes
+from modules.preprocess import Preprocessor
+from modules.model_loader import load_model
 
 # ============================================================
 #  PARÂMETROS DO PROJETO
@@ -101,9 +101,17 @@ serial_thread.start()
 # ============================================================
 
 print("🔄 Carregando modelo TorchScript...")
-model = torch.jit.load(WEIGHTS, map_location=DEVICE).eval()
+model = load_model(WEIGHTS, DEVICE, warmup=cfg["realtime"].get("warmup", 0))
+model_meta = model.meta
 print("✔ Modelo carregado!")
 
+# buffers de pré-processamento reaproveitados em todos os frames
+if "shape" in model_meta:
+    # modelo exportado com resolução fixa
+    preprocessor = Preprocessor(tuple(model_meta["shape"][2:]), DEVICE, stride=model_meta["stride"], auto=False)
+else:
+    preprocessor = Preprocessor(IMG_SIZE, DEVICE)
+
 # ============================================================
 #  VARIÁVEIS DO TEMPORIZADOR
 # ============================================================
@@ -129,16 +137,12 @@ while True:
 
     cv2.rectangle(frame, (ROI_X1, ROI_Y1), (ROI_X2, ROI_Y2), (0, 255, 255), 2)
 
-    img = letterbox(frame, IMG_SIZE, stride=32, auto=True)[0]
-    img = img.transpose((2, 0, 1))
-    img = np.ascontiguousarray(img)
-    img = torch.from_numpy(img).to(DEVICE).float() / 255.0
-    img = img.unsqueeze(0)
+    img = preprocessor(frame)
 
     with torch.no_grad():
         pred = model(img)[0]
 
-    pred = non_max_suppression(pred, CONF_THRES, IOU_THRES)[0]
+    pred = non_max_suppression_single(pred, CONF_THRES, IOU_THRES)
 
     detected_label = "NONE"
 
@@ -4,6 +4,8 @@
 
 import os
 import sys
+import json
+import math
 import yaml
 import torch
 
@@ -40,14 +42,13 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
 # Caminhos do config.yaml
 WEIGHTS_PT = os.path.join(BASE_DIR, cfg["paths"]["weights_pt"])
 
-MODELS_DIR = os.path.join(BASE_DIR, cfg["paths"]["models"])
-OUTPUT_DIR = os.path.join(MODELS_DIR, "torchscript")
+# Arquivos de saída: os mesmos caminhos que o main.py carrega
+OUTPUT_TS = os.path.join(BASE_DIR, cfg["paths"]["weights_torchscript"])
+OUTPUT_ONNX = os.path.join(BASE_DIR, cfg["paths"]["weights_onnx"])
+OUTPUT_OPENVINO = os.path.join(BASE_DIR, cfg["paths"]["weights_openvino"])
 
-# Arquivos de saída
-OUTPUT_TS = os.path.join(OUTPUT_DIR, "best_ts.pt")
-OUTPUT_ONNX = os.path.join(OUTPUT_DIR, "best.onnx")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+for path in (OUTPUT_TS, OUTPUT_ONNX):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
 
 print("🚀 Iniciando exportação YOLOv5 → TorchScript")
 
@@ -58,6 +59,7 @@ print("🚀 Iniciando exportação YOLOv5 → TorchScript")
 
 from yolov5.models.yolo import DetectionModel, Model as DetectModelClass
 from yolov5.models.common import Conv, C3, SPPF
+from modules.model_loader import tier_path, batch_path, load_model
 
 print("🔐 Classes YOLOv5 importadas (safe_globals ignorado).")
 
@@ -66,7 +68,7 @@ print("🔐 Classes YOLOv5 importadas (safe_globals ignorado).")
 #  FUNÇÃO PRINCIPAL DE EXPORTAÇÃO
 # ============================================================
 
-def main():
+def load_fused_model():
 
     # ---------------------------------------
     # VERIFICA SE O .PT EXISTE
@@ -82,21 +84,98 @@ def main():
     if "model" not in ckpt:
         raise RuntimeError("❌ ERRO: checkpoint NÃO contém chave 'model'!")
 
-    # Modelo pronto
+    # Modelo pronto (Conv + BatchNorm fundidos)
     model = ckpt["model"].float().eval()
+    return model.fuse()
+
+
+def trace_torchscript(model, dummy, path, metadata):
+    metadata = dict(metadata)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, dummy, check_trace=False)
+
+        if cfg["export"].get("optimize", True):
+            # só o freeze vai para o arquivo: o grafo do optimize_for_inference
+            # não volta no torch.jit.load; ele é aplicado ao carregar (TorchScriptBackend)
+            traced = torch.jit.freeze(traced)
+            metadata["optimize"] = True
+            print("🧊 Modelo congelado (otimização para inferência aplicada ao carregar).")
+
+    torch.jit.save(traced, path, _extra_files={"config.txt": json.dumps(metadata)})
+
+    # confere que o arquivo carrega e roda como o main.py vai usar
+    with torch.no_grad():
+        load_model(path, "cpu")(dummy)
 
-    # Tenta extrair img_size do modelo
-    imgsz = 640
+
+def export_onnx(model, dummy, path, metadata):
+    torch.onnx.export(
+        model,
+        dummy,
+        path,
+        opset_version=cfg["export"]["opset"],
+        input_names=["input"],
+        output_names=["output"],
+    )
+
+    # Mesmos metadados do TorchScript, no formato do export.py do YOLOv5
+    # (str(valor)), lido tanto pelo backend onnxruntime quanto pelo val.py
     try:
-        if hasattr(model, "yaml") and "img_size" in model.yaml:
-            imgsz = model.yaml["img_size"]
-    except:
-        pass
+        import onnx
+
+        model_onnx = onnx.load(path)
+        for k, v in metadata.items():
+            prop = model_onnx.metadata_props.add()
+            prop.key, prop.value = k, str(v)
+        onnx.save(model_onnx, path)
+    except ImportError:
+        print("⚠️ Pacote 'onnx' não instalado: ONNX salvo sem metadados.")
+
+
+def export_openvino(onnx_path, path, metadata):
+    import openvino as ov
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    ov.save_model(ov.convert_model(onnx_path), path)
+
+    # OpenVINO não guarda metadados no .xml: arquivo .yaml ao lado
+    with open(os.path.splitext(path)[0] + ".yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(metadata, f, sort_keys=False)
+
 
-    print(f"📐 Resolução usada para dummy input: {imgsz}x{imgsz}")
+def export_shape(stride):
+    # Resolução exata usada na inferência:
+    # export.img_shape > proporção da ROI em roi_img_size (se roi_inference) > training.img_size quadrado
+    shape = cfg["export"].get("img_shape")
+    if not shape and cfg["realtime"].get("roi_inference", False):
+        rt = cfg["realtime"]
+        roi_h, roi_w = rt["roi_y_end"] - rt["roi_y_start"], rt["roi_x_end"] - rt["roi_x_start"]
+        # lado maior = roi_img_size, menor arredondado para cima no stride (letterbox sem sobra)
+        imgsz = rt.get("roi_img_size", cfg["training"]["img_size"])
+        scale = imgsz / max(roi_h, roi_w)
+        shape = [math.ceil(roi_h * scale / stride) * stride, math.ceil(roi_w * scale / stride) * stride]
+    shape = shape or [cfg["training"]["img_size"]] * 2
 
-    # Dummy input
-    dummy = torch.randn(1, 3, imgsz, imgsz)
+    if shape[0] % stride or shape[1] % stride:
+        raise ValueError(f"❌ img_shape {shape} precisa ser múltiplo do stride {stride}")
+    return shape
+
+
+def main():
+
+    model = load_fused_model()
+
+    stride = int(max(model.stride))
+    shape = export_shape(stride)
+
+    print(f"📐 Resolução fixa do modelo exportado: {shape[0]}x{shape[1]} (stride {stride})")
+
+    # Dummy input: lote 1 (modelo das esteiras em lote vai para outro arquivo, ver export_batch)
+    dummy = torch.zeros(1, 3, *shape)
+
+    # Metadados lidos pelo model_loader.load_model
+    names = model.names if isinstance(model.names, dict) else dict(enumerate(model.names))
+    metadata = {"shape": list(dummy.shape), "stride": stride, "names": names}
 
 
     # ========================================================
@@ -105,45 +184,132 @@ def main():
 
     print("⚙️ Exportando para TorchScript...")
 
+    ts_ok = False
     try:
-        traced = torch.jit.trace(model, dummy, check_trace=False)
-        traced.save(OUTPUT_TS)
+        trace_torchscript(model, dummy, OUTPUT_TS, metadata)
+        ts_ok = True
 
         print("\n✅ SUCESSO! Arquivo TorchScript salvo em:")
         print(OUTPUT_TS)
-        return
 
     except Exception as e:
         print("\n❌ ERRO no TorchScript:")
         print(str(e))
         print("⚠️ Tentando fallback ONNX...")
 
+    # ONNX é exportado como fallback ou quando pedido no config
+    if ts_ok and not cfg["export"].get("onnx", False):
+        return
+
 
     # ========================================================
-    #  EXPORTAÇÃO PARA ONNX (FALLBACK)
+    #  EXPORTAÇÃO PARA ONNX (FALLBACK / ONNX RUNTIME)
     # ========================================================
 
     try:
-        torch.onnx.export(
-            model,
-            dummy,
-            OUTPUT_ONNX,
-            opset_version=12,
-            input_names=["input"],
-            output_names=["output"],
-            dynamic_axes={
-                "input": {0: "batch", 2: "height", 3: "width"},
-                "output": {0: "batch"},
-            },
-        )
-
-        print("\n⚠️ TorchScript falhou, mas ONNX foi exportado:")
+        export_onnx(model, dummy, OUTPUT_ONNX, metadata)
+
+        if ts_ok:
+            print("\n✅ ONNX exportado:")
+        else:
+            print("\n⚠️ TorchScript falhou, mas ONNX foi exportado:")
         print(OUTPUT_ONNX)
 
     except Exception as e:
-        print("\n❌ ERRO também no ONNX:")
+        if ts_ok:
+            print("\n❌ ERRO no ONNX (o TorchScript foi salvo):")
+            print(str(e))
+        else:
+            print("\n❌ ERRO também no ONNX:")
+            print(str(e))
+            print("💀 Falha total na exportação.")
+        return
+
+
+    # ========================================================
+    #  CONVERSÃO ONNX → OPENVINO (OPCIONAL)
+    # ========================================================
+
+    if not cfg["export"].get("openvino", False):
+        return
+
+    try:
+        export_openvino(OUTPUT_ONNX, OUTPUT_OPENVINO, metadata)
+
+        print("\n✅ OpenVINO exportado:")
+        print(OUTPUT_OPENVINO)
+
+    except Exception as e:
+        print("\n❌ ERRO no OpenVINO:")
         print(str(e))
-        print("💀 Falha total na exportação.")
+
+
+# ============================================================
+#  VARIANTES (RESOLUÇÕES EXTRAS / LOTE) NOS FORMATOS LIGADOS
+# ============================================================
+
+def export_variant(model, dummy, metadata, path_fn, title):
+    """Exporta o modelo para path_fn(OUTPUT_TS), e ONNX/OpenVINO se ligados no config."""
+    paths = {"TorchScript": path_fn(OUTPUT_TS)}
+    if cfg["export"].get("onnx", False) or cfg["export"].get("openvino", False):
+        paths["ONNX"] = path_fn(OUTPUT_ONNX)
+    if cfg["export"].get("openvino", False):
+        paths["OpenVINO"] = path_fn(OUTPUT_OPENVINO)
+
+    for fmt, path in paths.items():
+        try:
+            if fmt == "TorchScript":
+                trace_torchscript(model, dummy, path, metadata)
+            elif fmt == "ONNX":
+                export_onnx(model, dummy, path, metadata)
+            else:
+                export_openvino(paths["ONNX"], path, metadata)
+            print(f"✅ {title} ({fmt}): {path}")
+        except Exception as e:
+            print(f"❌ ERRO em {title} ({fmt}): {e}")
+
+
+# ============================================================
+#  RESOLUÇÕES EXTRAS PARA O CONTROLE ADAPTATIVO
+#  best_ts.pt → best_ts_320.pt, best_ts_416.pt, ... e, com
+#  export.onnx / export.openvino, best_320.onnx / best_320.xml
+# ============================================================
+
+def export_tiers():
+    tiers = cfg["export"].get("tiers") or []
+    if not tiers:
+        return
+
+    model = load_fused_model()
+    stride = int(max(model.stride))
+    names = model.names if isinstance(model.names, dict) else dict(enumerate(model.names))
+
+    for size in tiers:
+        if size % stride:
+            print(f"⚠️ Resolução {size} ignorada: não é múltiplo do stride {stride}")
+            continue
+        dummy = torch.zeros(1, 3, size, size)
+        metadata = {"shape": list(dummy.shape), "stride": stride, "names": names}
+        export_variant(model, dummy, metadata, lambda p: tier_path(p, size), f"Resolução {size}x{size}")
+
+
+# ============================================================
+#  LOTE FIXO PARA VÁRIAS ESTEIRAS (realtime.belts)
+#  best_ts.pt → best_ts_b2.pt; o best_ts.pt continua com lote 1
+# ============================================================
+
+def export_batch():
+    batch_size = cfg["export"].get("batch_size", 1)
+    if batch_size <= 1:
+        return
+
+    model = load_fused_model()
+    stride = int(max(model.stride))
+    names = model.names if isinstance(model.names, dict) else dict(enumerate(model.names))
+
+    dummy = torch.zeros(batch_size, 3, *export_shape(stride))
+    metadata = {"shape": list(dummy.shape), "stride": stride, "names": names}
+    export_variant(model, dummy, metadata, lambda p: batch_path(p, batch_size), f"Lote {batch_size}")
 
 
 # ============================================================
@@ -152,3 +318,5 @@ def main():
 
 if __name__ == "__main__":
     main()
+    export_tiers()
+    export_batch()
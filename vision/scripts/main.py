@@ -2,6 +2,9 @@ import os
 import cv2
 import sys
 import yaml
+import time
+import signal
+import threading
 
 # ============================================================
 #  AJUSTAR CAMINHOS DO PROJETO E ADICIONAR YOLOv5 AO PYTHONPATH
@@ -19,12 +22,23 @@ sys.path.insert(0, YOLOV5_DIR)
 # ============================================================
 
 from modules.config_loader import load_config
-from modules.model_loader import setup_paths, load_model
-from modules.serial_handler import SerialHandler
+from modules.model_loader import setup_paths, load_model, batch_path
+from modules.serial_handler import make_serial_handler
 from modules.detection import run_inference
-from modules.roi_timer import RoiTimer
-from modules.drawing import draw_detections, draw_roi
-from modules.video_source import open_camera
+from modules.decision import make_decision_engine
+from modules.tracker import RoiTracker
+from modules.belt_controller import make_belt_controller
+from modules.motion_gate import MotionGate
+from modules.drawing import draw_detections, draw_roi, draw_text_lines
+from modules.video_source import open_camera, frame_time
+from modules.pipeline import StationPipeline
+from modules.preprocess import Preprocessor
+from modules.recorder import SessionRecorder, RecordingCapture, detections_to_list, is_recording
+from modules.metrics import StationMetrics, TimedCapture
+from modules.preview import MjpegPreview
+from modules.multi_station import run_belts
+from modules.inference_server import InferenceServer
+from modules.resolution import ResolutionController, load_tiers
 
 # ============================================================
 #  CARREGAR CONFIGURAÇÕES
@@ -33,9 +47,36 @@ from modules.video_source import open_camera
 cfg = load_config(BASE_DIR)
 
 YOLOV5_PATH = setup_paths(BASE_DIR, cfg["paths"]["yolov5"])
-MODEL_PATH = os.path.join(BASE_DIR, cfg["paths"]["weights_torchscript"])
+# backend de inferência e arquivo de pesos correspondente
+BACKEND = cfg["realtime"].get("backend", "torchscript")
+WEIGHTS_KEY = {
+    "torchscript": "weights_torchscript",
+    "onnxruntime": "weights_onnx",
+    "openvino": "weights_openvino",
+}[BACKEND]
+MODEL_PATH = os.path.join(BASE_DIR, cfg["paths"][WEIGHTS_KEY])
+
+# várias esteiras: só captura, inferência em lote, decisão e serial por esteira
+BELTS = cfg["realtime"].get("belts") or []
+if BELTS:
+    unsupported = [key for key in ("tracker", "scheduler", "motion_gate", "record", "preview",
+                                   "adaptive_resolution", "inference_server")
+                   if (cfg["realtime"].get(key, {}) or {}).get("enabled", False)]
+    if unsupported:
+        raise ValueError(f"❌ realtime.belts não suporta: {', '.join(unsupported)} (desative no config.yaml)")
+    # modelo exportado com lote = nº de esteiras (export.batch_size), se existir
+    if os.path.exists(batch_path(MODEL_PATH, len(BELTS))):
+        MODEL_PATH = batch_path(MODEL_PATH, len(BELTS))
 DATA_YAML = os.path.join(BASE_DIR, cfg["paths"]["data_yaml"])
 
+# ROI da esteira (x1, y1, x2, y2)
+ROI = (
+    cfg["realtime"]["roi_x_start"],
+    cfg["realtime"]["roi_y_start"],
+    cfg["realtime"]["roi_x_end"],
+    cfg["realtime"]["roi_y_end"]
+)
+
 # ============================================================
 #  CARREGAR CLASSES DO DATA.YAML (CORRETO)
 # ============================================================
@@ -45,75 +86,415 @@ with open(DATA_YAML, "r", encoding="utf-8") as f:
 
 names = data_cfg["names"]
 
+# inferência só dentro da ROI (recorte menor = menos processamento)
+if cfg["realtime"].get("roi_inference", False):
+    INFER_ROI = ROI
+    INFER_IMG_SIZE = cfg["realtime"].get("roi_img_size", cfg["training"]["img_size"])
+else:
+    INFER_ROI = None
+    INFER_IMG_SIZE = cfg["training"]["img_size"]
+
 # ============================================================
-#  CARREGAR MODELO TORCHSCRIPT
+#  CARREGAR MODELO (TORCHSCRIPT / ONNX RUNTIME / OPENVINO)
 # ============================================================
 
-print("🔄 Carregando modelo TorchScript...")
-model = load_model(MODEL_PATH, cfg["realtime"]["device"])
+SERVER_CFG = cfg["realtime"].get("inference_server", {}) or {}
+inference_server = None
+
+if SERVER_CFG.get("enabled", False) and (cfg["realtime"].get("adaptive_resolution", {}) or {}).get("enabled", False):
+    # os processos carregam um único modelo; não há como trocar de resolução neles
+    raise ValueError("❌ realtime.inference_server não suporta adaptive_resolution (desative um dos dois no config.yaml)")
+
+if SERVER_CFG.get("enabled", False):
+    # modelo em processos separados; criados aqui, antes de qualquer thread
+    print(f"🔄 Carregando modelo ({BACKEND}) em {SERVER_CFG.get('workers', 2)} processos...")
+    inference_server = InferenceServer(
+        model_args=dict(
+            weights_path=MODEL_PATH,
+            device=cfg["realtime"]["device"],
+            warmup=cfg["realtime"].get("warmup", 0),
+            backend=BACKEND,
+            threads=SERVER_CFG.get("threads", 1)
+        ),
+        infer_args=dict(
+            names=names,
+            img_size=INFER_IMG_SIZE,
+            conf_thres=cfg["realtime"]["conf_thres"],
+            iou_thres=cfg["realtime"]["iou_thres"],
+            roi=INFER_ROI
+        ),
+        workers=SERVER_CFG.get("workers", 2),
+        slots=SERVER_CFG.get("slots"),
+        max_frame_shape=tuple(SERVER_CFG.get("max_frame_shape", (1080, 1920, 3))),
+        timeout=SERVER_CFG.get("timeout", 10.0)
+    )
+    model = None
+    model_meta = inference_server.meta
+else:
+    print(f"🔄 Carregando modelo ({BACKEND})...")
+    model = load_model(
+        MODEL_PATH,
+        cfg["realtime"]["device"],
+        warmup=cfg["realtime"].get("warmup", 0),
+        backend=BACKEND,
+        threads=cfg["realtime"].get("threads")
+    )
+    model_meta = model.meta
 print("✔ Modelo carregado com sucesso!")
 
+# modelo exportado com metadados: usar as classes gravadas nele
+names = model_meta.get("names", names)
+
+# uma esteira: o pré-processamento manda um frame por vez
+if not BELTS and model_meta.get("shape", [1])[0] != 1:
+    raise ValueError(f"❌ {MODEL_PATH} foi exportado com lote {model_meta['shape'][0]}: "
+                     f"exporte novamente com o export_torchscript.py (o lote fica em *_b<N>)")
+
+# ============================================================
+#  MÉTRICAS POR ESTÁGIO (p50/p99 na janela e endpoint /metrics)
+# ============================================================
+
+METRICS_CFG = cfg["realtime"].get("metrics", {}) or {}
+metrics = StationMetrics(
+    enabled=METRICS_CFG.get("enabled", False),
+    window=METRICS_CFG.get("window", 512),
+    device=cfg["realtime"]["device"]
+)
+if metrics.enabled and METRICS_CFG.get("http_port"):
+    metrics.serve(METRICS_CFG.get("http_host", "127.0.0.1"), METRICS_CFG["http_port"])
+
+# ============================================================
+#  VÁRIAS ESTEIRAS: câmera, ROI e Arduino por esteira, inferência em lote
+# ============================================================
+
+if BELTS:
+    run_belts(cfg, BASE_DIR, model, names, metrics, headless=cfg["realtime"].get("headless", False))
+    print("🛑 Detecção encerrada.")
+    sys.exit(0)
+
+# ============================================================
+#  GRAVAÇÃO DA EXECUÇÃO (frames + inferências + decisões + serial)
+# ============================================================
+
+RECORD_CFG = cfg["realtime"].get("record", {}) or {}
+recorder = None
+if RECORD_CFG.get("enabled", False):
+    recorder = SessionRecorder(
+        os.path.join(BASE_DIR, RECORD_CFG.get("dir", "recordings")),
+        chunk_frames=RECORD_CFG.get("chunk_frames", 300),
+        jpeg_quality=RECORD_CFG.get("jpeg_quality", 90)
+    )
+    print(f"⏺ Gravando em {recorder.dir}")
+
 # ============================================================
 #  ARDUINO – INICIAR SERIAL
 # ============================================================
 
-serial_handler = SerialHandler(cfg["arduino"]["port"], cfg["arduino"]["baudrate"])
+serial_handler = make_serial_handler(
+    cfg["arduino"],
+    log_fn=recorder.log if recorder is not None else None,
+    metrics=metrics
+)
 serial_handler.start()
 
+# Agendador: esteira contínua, cada desvio disparado quando o item chega ao atuador.
+# Precisa do rastreador: o tempo até o atuador conta da saída da ROI, que só ele
+# mede (RoiTimer/evidência confirmam com o item ainda dentro da ROI)
+if (cfg["realtime"].get("scheduler", {}) or {}).get("enabled", False) and \
+        not (cfg["realtime"].get("tracker", {}) or {}).get("enabled", False):
+    serial_handler.stop()
+    raise ValueError("❌ realtime.scheduler exige realtime.tracker.enabled: sem rastreador não há instante de saída da ROI")
+belt_controller = make_belt_controller(cfg, serial_handler)
+if belt_controller is not None:
+    belt_controller.start()
+
 # ============================================================
 #  INICIAR CAPTURA DE VÍDEO
 # ============================================================
 
-cap = open_camera(cfg["realtime"]["source"])
+# source pode ser a pasta de uma gravação: replay na velocidade realtime.replay_speed
+SOURCE = cfg["realtime"]["source"]
+if isinstance(SOURCE, str) and os.path.isdir(os.path.join(BASE_DIR, SOURCE)):
+    SOURCE = os.path.join(BASE_DIR, SOURCE)
+cap = open_camera(SOURCE, buffer_size=1, replay_speed=cfg["realtime"].get("replay_speed", 0.0))
+# replay: relógio da gravação em todos os motores e nenhum frame descartado
+REPLAY = is_recording(SOURCE)
+if recorder is not None:
+    cap = RecordingCapture(cap, recorder)
+if metrics.enabled:
+    cap = TimedCapture(cap, metrics)
 print("🎥 Detecção iniciada...")
 
-# Criar temporizador para lógica dos 3 segundos
-timer = RoiTimer()
+# Motor de decisão: temporizador de 3 segundos (roi_timer) ou evidência acumulada
+decision_engine = make_decision_engine(cfg, names)
+
+# Rastreador: vários itens na esteira, uma classificação por item ao sair da ROI
+TRACKER_CFG = cfg["realtime"].get("tracker", {}) or {}
+tracker = None
+if TRACKER_CFG.get("enabled", False):
+    tracker = RoiTracker(
+        ROI,
+        iou_thres=TRACKER_CFG.get("iou_thres", 0.3),
+        max_distance=TRACKER_CFG.get("max_distance", 80),
+        max_missed=TRACKER_CFG.get("max_missed", 5),
+        min_hits=TRACKER_CFG.get("min_hits", 3)
+    )
 
 # ============================================================
-#  LOOP PRINCIPAL DE DETECÇÃO EM TEMPO REAL
+#  ESTÁGIOS: INFERÊNCIA, DECISÃO E EXIBIÇÃO
 # ============================================================
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
+# modelo de resolução fixa: o letterbox precisa gerar exatamente esse shape
+if "shape" in model_meta:
+    INFER_IMG_SIZE = tuple(model_meta["shape"][2:])
+    INFER_STRIDE, INFER_AUTO = model_meta["stride"], False
+    print(f"📐 Entrada fixa do modelo: {INFER_IMG_SIZE[0]}x{INFER_IMG_SIZE[1]}")
+else:
+    INFER_STRIDE, INFER_AUTO = 32, True
 
-    # desenhar ROI
-    draw_roi(
-        frame,
-        cfg["realtime"]["roi_x_start"],
-        cfg["realtime"]["roi_y_start"],
-        cfg["realtime"]["roi_x_end"],
-        cfg["realtime"]["roi_y_end"]
+# buffers de pré-processamento criados uma única vez
+preprocessor = Preprocessor(INFER_IMG_SIZE, cfg["realtime"]["device"], stride=INFER_STRIDE, auto=INFER_AUTO)
+
+# resolução adaptativa: modelos 320/416/... aquecidos, troca conforme tempo e confiança
+RES_CFG = cfg["realtime"].get("adaptive_resolution", {}) or {}
+resolution = None
+if RES_CFG.get("enabled", False):
+    print("🔄 Carregando resoluções do controle adaptativo...")
+    tiers, tier_ms = load_tiers(
+        MODEL_PATH,
+        RES_CFG["sizes"],
+        cfg["realtime"]["device"],
+        backend=BACKEND,
+        threads=cfg["realtime"].get("threads"),
+        warmup=cfg["realtime"].get("warmup", 0)
+    )
+    resolution = ResolutionController(
+        RES_CFG["sizes"],
+        target_ms=RES_CFG.get("target_ms", 100),
+        conf_thres=cfg["realtime"]["conf_thres"],
+        margin=RES_CFG.get("margin", 0.15),
+        headroom=RES_CFG.get("headroom", 0.5),
+        relax_frames=RES_CFG.get("relax_frames", 15),
+        cooldown=RES_CFG.get("cooldown", 5),
+        initial_ms=tier_ms
     )
+    print(f"📏 Resolução inicial: {resolution.size}")
 
-    # rodar inferência
-    detected_label, detections = run_inference(
+
+# porteiro de movimento: só roda o modelo quando algo muda na ROI
+GATE_CFG = cfg["realtime"].get("motion_gate", {}) or {}
+motion_gate = None
+if GATE_CFG.get("enabled", False):
+    motion_gate = MotionGate(
+        ROI,
+        scale=GATE_CFG.get("scale", 0.25),
+        threshold=GATE_CFG.get("threshold", 15),
+        min_changed=GATE_CFG.get("min_changed", 0.01),
+        idle_interval=GATE_CFG.get("idle_interval", 10),
+        active_frames=GATE_CFG.get("active_frames", 15)
+    )
+
+
+def infer(frame, gate=None):
+    # (classe, detecções, inferido); inferido=False = resultado reaproveitado pelo porteiro
+    # gate = decisão do porteiro já tomada na captura (pipeline); None = decidir aqui
+    if motion_gate is not None:
+        if gate is None:
+            gate = motion_gate.check(frame)
+        (label, detections), fresh = motion_gate.result(frame, infer_model, gate)
+    else:
+        (label, detections), fresh = infer_model(frame), True
+    return label, detections, fresh
+
+
+def infer_model(frame):
+    if inference_server is not None:
+        with metrics.stage("inference_server"):
+            return inference_server.infer(frame)
+    if resolution is not None:
+        return infer_adaptive(frame)
+    return run_inference(
         model=model,
         frame=frame,
         device=cfg["realtime"]["device"],
-        img_size=cfg["training"]["img_size"],
+        img_size=INFER_IMG_SIZE,
         conf_thres=cfg["realtime"]["conf_thres"],
         iou_thres=cfg["realtime"]["iou_thres"],
-        names=names
+        names=names,
+        roi=INFER_ROI,
+        preprocessor=preprocessor,
+        metrics=metrics
     )
 
-    # desenhar detecções no frame
-    draw_detections(frame, detections)
 
-    # lógica dos 3 segundos
-    confirmed = timer.update(detected_label)
-    if confirmed:
+def infer_adaptive(frame):
+    size = resolution.size
+    tier_model, tier_preprocessor = tiers[size]
+    t0 = time.perf_counter()
+    result = run_inference(
+        model=tier_model,
+        frame=frame,
+        device=cfg["realtime"]["device"],
+        img_size=size,
+        conf_thres=cfg["realtime"]["conf_thres"],
+        iou_thres=cfg["realtime"]["iou_thres"],
+        names=names,
+        roi=INFER_ROI,
+        preprocessor=tier_preprocessor,
+        metrics=metrics
+    )
+    resolution.update(time.perf_counter() - t0, result[1])
+    return result
+
+
+def decide(detected_label, detections, fresh=True, now=None):
+    # (classe, instante de saída da ROI); sem rastreador não há saída medida (nem agendador)
+    # resultado reaproveitado pelo porteiro não conta como observação nova
+    # now = instante do frame na fonte (gravado, no replay): mesmo relógio para todos os motores
+    now = time.monotonic() if now is None else now
+    if recorder is not None:
+        # registrado aqui (uma thread, ordem dos frames) e não nas threads de inferência
+        recorder.log("inference", label=detected_label, detections=detections_to_list(detections),
+                     fresh=fresh, t_frame=now)
+    with metrics.stage("decision"):
+        if tracker is not None:
+            items = tracker.update(detections, now=now) if fresh else []
+            confirmed_items = [(item.label, item.t_exit) for item in items]
+        else:
+            if fresh:
+                confirmed = decision_engine.update(detected_label, detections, now=now)
+            else:
+                confirmed = decision_engine.tick(now=now)
+            confirmed_items = [(confirmed, None)] if confirmed else []
+
+    for confirmed, t_exit in confirmed_items:
+        if recorder is not None:
+            recorder.log("decision", label=confirmed, t_exit=t_exit, t_frame=now)
         print("\n===================================================")
-        print(f"✔ Classe confirmada após 3 segundos: {confirmed}")
+        print(f"✔ Classe confirmada: {confirmed}")
         print("===================================================\n")
-        serial_handler.send(confirmed)
+        if belt_controller is not None:
+            if REPLAY:  # relógio da gravação → agora, mantendo a idade da saída
+                t_exit = time.monotonic() - (now - t_exit)
+            belt_controller.item(confirmed, t_exit)
+        else:
+            serial_handler.send(confirmed)
+
+
+def show(frame, detections):
+    # desenhar ROI
+    draw_roi(frame, *ROI)
+
+    # desenhar detecções no frame
+    draw_detections(frame, detections)
+
+    # FPS e p50/p99 de cada estágio
+    metrics.tick()
+    if metrics.enabled and METRICS_CFG.get("overlay", True):
+        draw_text_lines(frame, metrics.overlay_lines())
+    elif cfg["realtime"].get("show_fps", False):
+        draw_text_lines(frame, [f"FPS {metrics.fps():.1f}"])
 
     # exibir janela
-    cv2.imshow("RecicleAI - Realtime", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+    with metrics.stage("display"):
+        cv2.imshow("RecicleAI - Realtime", frame)
+        key = cv2.waitKey(1) & 0xFF
+    return key != ord('q')
+
+
+# ============================================================
+#  MODO HEADLESS (sem janela): nada de desenho/GUI no caminho quente
+# ============================================================
+
+HEADLESS = cfg["realtime"].get("headless", False)
+PREVIEW_CFG = cfg["realtime"].get("preview", {}) or {}
+preview = None
+if HEADLESS and PREVIEW_CFG.get("enabled", False):
+    # prévia anotada em baixa taxa, desenhada e comprimida em outra thread
+    preview = MjpegPreview(
+        ROI,
+        host=PREVIEW_CFG.get("host", "127.0.0.1"),
+        port=PREVIEW_CFG.get("port", 8080),
+        fps=PREVIEW_CFG.get("fps", 2),
+        quality=PREVIEW_CFG.get("quality", 70)
+    )
+    preview.start()
+
+
+def show_headless(frame, detections):
+    metrics.tick()
+    if preview is not None:
+        preview.offer(frame, detections)
+    return True
+
+
+display = show_headless if HEADLESS else show
+if HEADLESS:
+    print("🖥 Modo headless: encerre com Ctrl+C ou SIGTERM.")
+
+# encerramento por sinal (sem janela não existe a tecla 'q')
+shutdown = threading.Event()
+pipeline = None
+
+
+def request_shutdown(signum, _frame):
+    print(f"\n🛑 {signal.Signals(signum).name} recebido, encerrando...")
+    shutdown.set()
+    if pipeline is not None:
+        pipeline.stop()
+
+
+signal.signal(signal.SIGINT, request_shutdown)
+signal.signal(signal.SIGTERM, request_shutdown)
+
+# ============================================================
+#  LOOP PRINCIPAL DE DETECÇÃO EM TEMPO REAL
+# ============================================================
+
+if cfg["realtime"].get("pipeline", False):
+    # captura, inferência e atuação em threads separadas
+    pipeline = StationPipeline(
+        cap, infer, decide, display_fn=display,
+        # um frame em voo por worker do servidor de inferência
+        inference_threads=SERVER_CFG.get("workers", 1) if inference_server is not None else 1,
+        lossless=REPLAY,
+        gate_fn=motion_gate.check if motion_gate is not None else None
+    )
+    pipeline.run()
+    pipeline.print_stats()
+
+else:
+    while not shutdown.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t_frame = frame_time(cap)
+
+        detected_label, detections, fresh = infer(frame)
+        decide(detected_label, detections, fresh, now=t_frame)
+
+        if not display(frame, detections):
+            break
+
+if motion_gate is not None:
+    motion_gate.print_stats()
+
+if resolution is not None:
+    resolution.print_stats()
+
+if belt_controller is not None:
+    belt_controller.scheduler.print_stats()
+    belt_controller.print_stats()
+    belt_controller.stop(cfg["arduino"].get("done_timeout", 15.0))
+
+serial_handler.print_stats()
+
+if metrics.enabled:
+    metrics.print_stats()
+    metrics.stop()
+
+if preview is not None:
+    preview.stop()
 
 # ============================================================
 #  ENCERRAR SISTEMA
@@ -121,6 +502,11 @@ while True:
 
 serial_handler.stop()
 cap.release()
-cv2.destroyAllWindows()
+if recorder is not None:
+    recorder.close()
+if inference_server is not None:
+    inference_server.close()
+if not HEADLESS:
+    cv2.destroyAllWindows()
 
 print("🛑 Detecção encerrada.")
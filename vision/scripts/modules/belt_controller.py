@@ -0,0 +1,319 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+from .scheduler import LATE, make_scheduler
+
+
+class BeltItem:
+    """Um item na linha do tempo da esteira (tempos em time.monotonic)."""
+
+    __slots__ = ("label", "actuator", "t_ref", "t_arrive", "t_fire", "t_exec", "t_done", "status", "conflict", "command")
+
+    def __init__(self, label, t_ref, t_arrive=None, actuator=None, t_fire=None):
+        self.label = label
+        self.actuator = actuator
+        self.t_ref = t_ref          # saída da ROI
+        self.t_arrive = t_arrive    # chegada prevista no atuador
+        self.t_fire = t_fire        # envio planejado (t_arrive - lead_time)
+        self.t_exec = None          # atuador acionado pelo master
+        self.t_done = None          # término confirmado
+        self.status = "scheduled"   # scheduled | sent | done | late | unsent | missed | failed
+        self.conflict = False       # atuador ainda não tinha voltado do disparo anterior
+        self.command = None         # Command do SerialHandler (modo real)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _peak(intervals):
+    """Máximo de intervalos [início, fim) abertos ao mesmo tempo."""
+    events = sorted([(t0, 1) for t0, _ in intervals] + [(t1, -1) for _, t1 in intervals])
+    peak = current = 0
+    for _, step in events:
+        current += step
+        peak = max(peak, current)
+    return peak
+
+
+def summarize(items, now=None):
+    """
+    Vazão e filas de uma linha do tempo de itens (real ou simulada):
+    itens/min desviados no tempo, itens em cima da esteira (média pela lei
+    de Little e pico) e a fila de comandos entre o envio planejado e o
+    acionamento no master.
+    """
+    if not items:
+        return {"items": 0, "sorted": 0, "items_min": 0.0, "late": 0, "unsent": 0, "missed": 0, "failed": 0,
+                "conflicts": 0, "belt_mean": 0.0, "belt_peak": 0, "queue_mean_ms": 0.0, "queue_p95_ms": 0.0,
+                "queue_peak": 0, "error_ms": 0.0, "max_error_ms": 0.0}
+
+    executed = [i for i in items if i.t_exec is not None]
+    ok = [i for i in items if i.status == "done" and not i.conflict]
+    t_start = min(i.t_ref for i in items)
+    t_end = max([i.t_done for i in executed if i.t_done is not None] + [now or 0.0, t_start + 1e-9])
+    span = t_end - t_start
+
+    # itens na esteira: da saída da ROI até o disparo (ou até agora, se ainda andando)
+    on_belt = [(i.t_ref, i.t_exec if i.t_exec is not None else
+                (max(i.t_ref, now or i.t_ref) if i.status in ("scheduled", "sent") else i.t_fire))
+               for i in items]
+    # fila de comandos: envio planejado → acionamento (serial + loop() do master)
+    queue = [(i.t_fire, i.t_exec) for i in executed if i.t_fire is not None]
+    waits = [t1 - t0 for t0, t1 in queue]
+    errors = [i.t_exec - i.t_arrive for i in executed if i.t_arrive is not None]
+
+    return {
+        "items": len(items),
+        "sorted": len(ok),
+        "items_min": 60 * len(ok) / span,
+        "late": sum(i.status == "late" for i in items),
+        "unsent": sum(i.status == "unsent" for i in items),
+        "missed": sum(i.status == "missed" for i in items),
+        "failed": sum(i.status == "failed" for i in items),
+        "conflicts": sum(i.conflict for i in items),
+        "belt_mean": sum(t1 - t0 for t0, t1 in on_belt) / span,
+        "belt_peak": _peak(on_belt),
+        "queue_mean_ms": 1000 * sum(waits) / len(waits) if waits else 0.0,
+        "queue_p95_ms": 1000 * _percentile(waits, 0.95),
+        "queue_peak": _peak(queue),
+        "error_ms": 1000 * sum(errors) / len(errors) if errors else 0.0,
+        "max_error_ms": 1000 * max(errors, key=abs) if errors else 0.0,
+    }
+
+
+def print_summary(s, title):
+    print(f"{title}: {s['sorted']}/{s['items']} itens desviados → {s['items_min']:.1f} itens/min | "
+          f"{s['late']} atrasados | {s['unsent']} não enviados | {s['missed']} fora da janela | "
+          f"{s['conflicts']} conflitos | {s['failed']} falhas")
+    print(f"   na esteira: média {s['belt_mean']:.1f} | pico {s['belt_peak']} itens")
+    print(f"   fila de comandos: média {s['queue_mean_ms']:.0f} ms | p95 {s['queue_p95_ms']:.0f} ms | "
+          f"pico {s['queue_peak']}")
+    print(f"   erro do disparo no atuador: médio {s['error_ms']:.0f} ms | pior {s['max_error_ms']:.0f} ms")
+
+
+class BeltController:
+    """
+    A estação é dona do tempo da esteira: liga a esteira uma vez e mantém
+    ela andando, agenda o disparo direto de cada item (A2A..A5A) pelo
+    ActuationScheduler e guarda a linha do tempo de cada item. No lugar do
+    master.ino parar a esteira a cada classe, vários itens ficam em cima da
+    esteira ao mesmo tempo.
+
+    O acionamento real é estimado pelo término do comando menos
+    `command_time` (o enviaComando() do master); um disparo mais de
+    `tolerance` longe da chegada prevista conta como fora da janela e um
+    disparo no mesmo atuador antes de `cycle_time` (subida + volta) conta
+    como conflito.
+    """
+
+    def __init__(self, serial_handler, scheduler, cycle_time=3.0, command_time=0.073, tolerance=0.25, window=1000):
+        self.serial_handler = serial_handler
+        self.scheduler = scheduler
+        self.scheduler.on_event = self._on_event
+        self.cycle_time = cycle_time
+        self.command_time = command_time
+        self.tolerance = tolerance
+
+        self.items = deque(maxlen=window)
+        self.by_event = {}
+        self.last_exec = {}
+        self.lock = threading.Lock()
+        self.unknown = 0
+
+    def start(self):
+        self.scheduler.start()
+        return self.serial_handler.send("LIGAR")
+
+    def stop(self, timeout=15.0):
+        self.scheduler.stop()
+        belt_off = self.serial_handler.send("DESLIGAR")
+        if belt_off is not None:
+            belt_off.wait(timeout)
+
+    def item(self, label, t_ref=None):
+        """Novo item confirmado na saída da ROI."""
+        t_ref = time.monotonic() if t_ref is None else t_ref
+        # lock segura o _on_event de um disparo imediato até o item estar registrado
+        with self.lock:
+            event = self.scheduler.schedule(label, t_ref)
+            if event is None:
+                self.unknown += 1
+                return None
+            item = BeltItem(event.label, t_ref, event.t_fire + self.scheduler.lead_time, event.actuator, event.t_fire)
+            self.items.append(item)
+            self.by_event[(event.t_fire, event.t_ref, event.label)] = item
+        return item
+
+    def _on_event(self, event, command):
+        with self.lock:
+            item = self.by_event.pop((event.t_fire, event.t_ref, event.label), None)
+        if item is None:
+            return
+        if command is LATE:
+            item.status = "late"
+        elif command is None:
+            item.status = "unsent"  # serial desconectada: não é erro de tempo do disparo
+        else:
+            item.status = "sent"
+            item.command = command
+
+    def _refresh(self):
+        """Fecha os itens cujo comando já terminou na serial."""
+        with self.lock:
+            items = list(self.items)
+        for item in items:
+            if item.status != "sent" or not item.command.finished.is_set():
+                continue
+            cmd = item.command
+            if cmd.status != "done":
+                item.status = "failed"
+                continue
+            item.t_done = cmd.t_done
+            item.t_exec = cmd.t_done - self.command_time
+            item.status = "done" if abs(item.t_exec - item.t_arrive) <= self.tolerance else "missed"
+            last = self.last_exec.get(item.actuator)
+            item.conflict = last is not None and item.t_exec - last < self.cycle_time
+            self.last_exec[item.actuator] = item.t_exec
+        return items
+
+    def stats(self):
+        s = summarize(self._refresh(), now=time.monotonic())
+        s["unknown"] = self.unknown
+        return s
+
+    def print_stats(self):
+        print_summary(self.stats(), "🏭 Esteira contínua")
+
+
+def wire_time(message, baudrate):
+    """Tempo do comando em texto ("A2A\n") na serial: 10 bits por byte."""
+    return (len(message) + 1) * 10 / baudrate
+
+
+def firmware_timing(sched_cfg, baudrate=9600):
+    """Tempos do master.ino (realtime.scheduler.firmware) e da serial, em segundos."""
+    firmware = sched_cfg.get("firmware", {}) or {}
+    return {
+        "wire_s": wire_time("A2A", baudrate),
+        "poll_s": firmware.get("poll_ms", 4) / 1000,
+        "command_s": firmware.get("command_ms", 73) / 1000,
+        "return_s": firmware.get("return_ms", 5) / 1000,
+        "notice_s": firmware.get("notice_ms", 62) / 1000,
+        "ramp_on_s": firmware.get("ramp_on_ms", 30) / 1000,
+        "ramp_off_s": firmware.get("ramp_off_ms", 930) / 1000,
+    }
+
+
+def firing_error_range(timing, lead_time):
+    """
+    Erro do disparo no atuador sem fila na serial (s): o comando leva
+    wire_s na serial e o master lê na próxima volta do loop(), que pode
+    estar num retorno/parada.
+    """
+    wire = timing["wire_s"]
+    return wire - lead_time, wire + timing["poll_s"] + timing["return_s"] - lead_time
+
+
+def make_belt_controller(cfg, serial_handler):
+    """Controle de esteira contínua a partir de realtime.scheduler; None se desabilitado."""
+    sched_cfg = cfg["realtime"].get("scheduler", {}) or {}
+    if not sched_cfg.get("enabled", False):
+        return None
+    timing = firmware_timing(sched_cfg, cfg["arduino"]["baudrate"])
+    tolerance = sched_cfg.get("late_tolerance", 0.25)
+    # firmware que segura a serial (verificarAtuador com delay) erra o disparo mais que a tolerância
+    error = max(abs(e) for e in firing_error_range(timing, sched_cfg.get("lead_time", 0.0)))
+    if error > tolerance:
+        raise ValueError(f"❌ realtime.scheduler: erro do disparo de até {1000 * error:.0f} ms com firmware.poll_ms "
+                         f"{1000 * timing['poll_s']:.0f} (tolerância {1000 * tolerance:.0f} ms). "
+                         f"Grave o master.ino sem delay no verificarAtuador e confira com o bench_belt_timing.py")
+
+    scheduler = make_scheduler(cfg, serial_handler.send)
+    return BeltController(
+        serial_handler,
+        scheduler,
+        cycle_time=sched_cfg.get("cycle_time", 3.0),
+        command_time=timing["command_s"],
+        tolerance=tolerance,
+    )
+
+
+# =============================================================
+#  SIMULAÇÃO NO HOST (MESMOS ATRASOS DO master.ino)
+# =============================================================
+
+def simulate_continuous(arrivals, travel, lead_time=0.0, cycle_time=3.0, poll_s=0.004, command_s=0.073,
+                        return_s=0.005, wire_s=0.0042, tolerance=0.25, notice_s=0.062):
+    """
+    Esteira contínua: cada item (t_ref, classe) chega ao atuador em
+    t_ref + travel[classe]; o comando sai em t_arrive - lead_time, leva
+    wire_s na serial e espera o master ler a serial (a cada poll_s: uma
+    volta do loop()) e gasta command_s no enviaComando() até o término.
+    O SerialHandler só escreve o próximo comando depois do término do
+    anterior (eco + "Status recebido"), então comandos próximos fazem fila.
+    Cada disparo ainda custa ao loop() dois return_s mais tarde: o
+    verificarAtuador() manda retornar no topo e parar na base, e cada um
+    desses avisos ocupa notice_s a saída da serial (o término de um
+    comando logo depois chega mais tarde).
+
+    wire_s, command_s e notice_s são tempo de UART (dependem do baudrate),
+    não de delay() no firmware.
+    """
+    items = []
+    for t_ref, label in arrivals:
+        if label not in travel:
+            continue
+        t_arrive = t_ref + travel[label]
+        items.append(BeltItem(label, t_ref, t_arrive, label, t_arrive - lead_time))
+
+    poll = 0.0
+    link = 0.0  # SerialHandler livre (término do comando anterior)
+    tx = 0.0    # saída da serial do master livre
+    last_exec = {}
+    upkeep = []  # (início, duração) dos retornos/paradas pendentes
+    for item in sorted(items, key=lambda i: i.t_fire):
+        t_rx = max(item.t_fire, link) + wire_s
+        while poll < t_rx:
+            poll += poll_s
+            while upkeep and upkeep[0][0] <= poll:
+                tx = max(tx, poll) + notice_s
+                poll += heapq.heappop(upkeep)[1]
+        item.t_exec = poll
+        item.t_done = link = tx = max(tx, poll) + command_s
+        poll += poll_s
+        heapq.heappush(upkeep, (item.t_exec + cycle_time / 2, return_s))
+        heapq.heappush(upkeep, (item.t_exec + cycle_time, return_s))
+        item.status = "done" if abs(item.t_exec - item.t_arrive) <= tolerance else "missed"
+        last = last_exec.get(item.actuator)
+        item.conflict = last is not None and item.t_exec - last < cycle_time
+        last_exec[item.actuator] = item.t_exec
+    return items
+
+
+def simulate_legacy(arrivals, travel, poll_s=0.004, command_s=0.073, ramp_on_s=0.03, ramp_off_s=0.93):
+    """
+    Modo atual do master.ino: cada classe liga a esteira, espera o atraso
+    fixo da classe, dispara e para. Um item por vez; os outros esperam na fila.
+    """
+    items = []
+    poll = 0.0
+    for t_ref, label in sorted(arrivals):
+        if label not in travel:
+            continue
+        item = BeltItem(label, t_ref, actuator=label)
+        while poll < t_ref:
+            poll += poll_s
+        item.t_fire = t_ref
+        item.t_exec = poll + ramp_on_s + travel[label]
+        item.t_arrive = item.t_exec  # a esteira espera o item: disparo sempre na hora
+        item.t_done = item.t_exec + command_s + ramp_off_s
+        item.status = "done"
+        poll = item.t_done + poll_s
+        items.append(item)
+    return items
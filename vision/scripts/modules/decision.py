@@ -0,0 +1,105 @@
+import time
+from collections import deque
+
+from .roi_timer import RoiTimer
+
+
+class EvidenceDecision:
+    """
+    Decide a classe de cada item acumulando evidência por classe numa janela
+    deslizante (últimos `window_frames` frames e no máximo `window_seconds`).
+
+    A evidência de uma classe num frame é a maior confiança entre as
+    detecções dela. A posterior de cada classe é
+
+        P(c) = (S_c + prior) / (S_total + n_classes * prior)
+
+    onde S_c é a soma das evidências da classe na janela. A classe é
+    confirmada assim que P(c) >= threshold com pelo menos `min_frames` frames
+    com detecção. Depois da confirmação o item fica "travado" até a ROI ficar
+    `empty_seconds` sem nenhuma detecção, então cada item físico gera uma
+    única decisão. O critério é tempo e não número de frames: uma sequência
+    de frames sem detecção no meio de um item lento (ou com fps alto) não
+    libera a trava.
+    """
+
+    def __init__(self, names, threshold=0.8, window_frames=15, window_seconds=1.5,
+                 min_frames=3, empty_seconds=0.4, prior=0.1):
+        self.labels = [n.upper() for n in names]
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.min_frames = min_frames
+        self.empty_seconds = empty_seconds
+        self.prior = prior
+
+        self.window = deque(maxlen=window_frames)
+        self.locked = False
+        self.last_seen = None  # instante da última detecção
+
+    def reset(self):
+        self.window.clear()
+        self.locked = False
+        self.last_seen = None
+
+    def posterior(self):
+        scores = dict.fromkeys(self.labels, 0.0)
+        for _, evidence in self.window:
+            for label, conf in evidence.items():
+                scores[label] = scores.get(label, 0.0) + conf
+        total = sum(scores.values()) + len(scores) * self.prior
+        return {label: (s + self.prior) / total for label, s in scores.items()}
+
+    def update(self, detected_label, detections, now=None):
+        now = time.monotonic() if now is None else now
+
+        # frame vazio: item saiu da ROI depois de empty_seconds sem detecção
+        if not detections:
+            if self.last_seen is not None and now - self.last_seen >= self.empty_seconds:
+                self.reset()
+            return None
+        self.last_seen = now
+
+        if self.locked:
+            return None
+
+        evidence = {}
+        for (*_, label, conf) in detections:
+            evidence[label] = max(evidence.get(label, 0.0), float(conf))
+        self.window.append((now, evidence))
+
+        # descarta frames mais velhos que a janela de tempo
+        while self.window and now - self.window[0][0] > self.window_seconds:
+            self.window.popleft()
+
+        if len(self.window) < self.min_frames:
+            return None
+
+        label, p = max(self.posterior().items(), key=lambda kv: kv[1])
+        if p >= self.threshold:
+            self.locked = True
+            return label
+        return None
+
+    def tick(self, now=None):
+        """Frame sem inferência nova (porteiro de movimento): não é evidência, nada muda."""
+        return None
+
+
+def make_decision_engine(cfg, names):
+    """Cria o motor de decisão escolhido em realtime.decision (roi_timer | evidence)."""
+    dcfg = cfg["realtime"].get("decision", {}) or {}
+    engine = dcfg.get("engine", "roi_timer")
+
+    if engine == "roi_timer":
+        return RoiTimer(hold_seconds=dcfg.get("hold_seconds", 3))
+    if engine == "evidence":
+        return EvidenceDecision(
+            names,
+            threshold=dcfg.get("threshold", 0.8),
+            window_frames=dcfg.get("window_frames", 15),
+            window_seconds=dcfg.get("window_seconds", 1.5),
+            min_frames=dcfg.get("min_frames", 3),
+            empty_seconds=dcfg.get("empty_seconds", 0.4),
+            prior=dcfg.get("prior", 0.1),
+        )
+    raise ValueError(f"❌ Motor de decisão desconhecido: {engine} (opções: roi_timer, evidence)")
@@ -1,24 +1,46 @@
 import torch
-import numpy as np
-from .model_loader import non_max_suppression, scale_boxes, letterbox
+from .model_loader import non_max_suppression_single, scale_boxes
+from .preprocess import Preprocessor
+from .metrics import DISABLED
+
+def run_inference(model, frame, device, img_size, conf_thres, iou_thres, names, roi=None, preprocessor=None,
+                  metrics=DISABLED):
+    # roi = (x1, y1, x2, y2): roda o modelo só no recorte da esteira
+    if roi is not None:
+        x1, y1, x2, y2 = roi
+        src = frame[y1:y2, x1:x2]
+        offset = (x1, y1)
+    else:
+        src = frame
+        offset = (0, 0)
+
+    # passe um Preprocessor persistente para não alocar buffers a cada frame
+    if preprocessor is None:
+        preprocessor = Preprocessor(img_size, device)
+    with metrics.stage("preprocess"):
+        img = preprocessor(src)
+
+    with metrics.stage("forward"), torch.no_grad():
+        pred = model(img)[0]
 
-def run_inference(model, frame, device, img_size, conf_thres, iou_thres, names):
-    img = letterbox(frame, img_size, stride=32, auto=True)[0]
-    img = img.transpose((2, 0, 1))
-    img = np.ascontiguousarray(img)
-    img = torch.from_numpy(img).to(device).float() / 255.0
-    img = img.unsqueeze(0)
+    # NMS especializado para 1 imagem (mesmo resultado, menos alocações)
+    with metrics.stage("nms"):
+        pred = non_max_suppression_single(pred, conf_thres, iou_thres)
 
-    with torch.no_grad():
-        pred = model(img)[0]
+    return postprocess(pred, img.shape[2:], src.shape, offset, names)
 
-    pred = non_max_suppression(pred, conf_thres, iou_thres)[0]
 
+def postprocess(pred, img_shape, src_shape, offset, names):
+    """Caixas (n, 6) do NMS → (classe mais recente, [(x1, y1, x2, y2, LABEL, conf)]) no frame completo."""
     detected_label = "NONE"
     detections = []
 
     if pred is not None and len(pred):
-        pred[:, :4] = scale_boxes(img.shape[2:], pred[:, :4], frame.shape).round()
+        pred[:, :4] = scale_boxes(img_shape, pred[:, :4], src_shape).round()
+
+        # voltar para coordenadas do frame completo
+        pred[:, [0, 2]] += offset[0]
+        pred[:, [1, 3]] += offset[1]
 
         for *xyxy, conf, cls_id in pred:
             x1, y1, x2, y2 = map(int, xyxy)
@@ -27,4 +49,3 @@ def run_inference(model, frame, device, img_size, conf_thres, iou_thres, names):
             detections.append((x1, y1, x2, y2, label, conf))
 
     return detected_label, detections
-
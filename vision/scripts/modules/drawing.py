@@ -11,3 +11,11 @@ def draw_detections(frame, detections):
 
 def draw_roi(frame, x1, y1, x2, y2):
     cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
+
+def draw_text_lines(frame, lines, origin=(10, 20), line_height=18):
+    # fundo escuro para o texto ficar legível sobre a esteira
+    x, y = origin
+    width = 9 * max((len(line) for line in lines), default=0)
+    cv2.rectangle(frame, (x - 5, y - 15), (x + width, y + line_height * (len(lines) - 1) + 6), (0, 0, 0), -1)
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (x, y + i * line_height), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
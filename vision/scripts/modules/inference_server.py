@@ -0,0 +1,212 @@
+import queue
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .detection import run_inference
+from .model_loader import load_model
+from .preprocess import Preprocessor
+
+
+def _worker_main(worker_id, model_args, infer_args, shm_name, n_slots, slot_bytes, tasks, results):
+    """
+    Processo de inferência: carrega o modelo uma vez e atende tarefas
+    (job_id, slot, shape). O frame é lido direto do slot da memória
+    compartilhada; volta só um array (n, 6) float32 [x1, y1, x2, y2, conf, cls].
+    """
+    try:
+        model = load_model(**model_args)
+    except Exception as e:
+        results.put(("failed", worker_id, repr(e)))
+        return
+    meta = model.meta
+    names = meta.get("names", infer_args["names"])
+    class_index = {name.upper(): i for i, name in enumerate(names)}
+
+    # mesma regra do main.py: modelo de shape fixo dita a entrada
+    if "shape" in meta:
+        img_size, stride, auto = tuple(meta["shape"][2:]), meta["stride"], False
+    else:
+        img_size, stride, auto = infer_args["img_size"], 32, True
+    preprocessor = Preprocessor(img_size, model_args["device"], stride=stride, auto=auto)
+
+    shm = SharedMemory(name=shm_name)
+    slots = np.ndarray((n_slots, slot_bytes), dtype=np.uint8, buffer=shm.buf)
+    results.put(("ready", worker_id, meta))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            job_id, slot, shape = task
+            try:
+                frame = slots[slot, :int(np.prod(shape))].reshape(shape)
+                _, detections = run_inference(
+                    model=model,
+                    frame=frame,
+                    device=model_args["device"],
+                    img_size=img_size,
+                    conf_thres=infer_args["conf_thres"],
+                    iou_thres=infer_args["iou_thres"],
+                    names=names,
+                    roi=infer_args["roi"],
+                    preprocessor=preprocessor,
+                )
+                out = np.array(
+                    [(x1, y1, x2, y2, float(conf), class_index[label]) for x1, y1, x2, y2, label, conf in detections],
+                    dtype=np.float32,
+                ).reshape(-1, 6)
+                results.put(("done", job_id, slot, out))
+            except Exception as e:
+                results.put(("error", job_id, slot, repr(e)))
+    finally:
+        del slots
+        shm.close()
+
+
+class InferenceServer:
+    """
+    Modelo rodando em processos separados, fora do GIL do main.py.
+
+    Os frames vão para um anel de `slots` posições numa única
+    multiprocessing.shared_memory (uma cópia do frame, nada de pickle); a
+    fila de tarefas leva só (job_id, slot, shape) e cada worker devolve um
+    array (n, 6) compacto. submit() retorna um Future e bloqueia só quando
+    todos os slots estão ocupados; infer() é a versão síncrona com a mesma
+    saída do run_inference. Nenhuma espera é infinita: se um worker morrer
+    (OOM, segfault no runtime) ou um frame passar de `timeout` segundos,
+    submit()/infer() levantam RuntimeError/TimeoutError em vez de travar.
+
+    Os workers são criados com fork (Linux), antes de qualquer thread da
+    estação: o main.py é um script de topo e seria reexecutado com spawn.
+    """
+
+    def __init__(self, model_args, infer_args, workers=2, slots=None, max_frame_shape=(1080, 1920, 3),
+                 timeout=10.0):
+        if "fork" not in mp.get_all_start_methods():
+            raise RuntimeError("❌ inference_server precisa de fork (Linux); neste sistema use realtime.pipeline")
+        ctx = mp.get_context("fork")
+
+        self.names = infer_args["names"]
+        self.timeout = timeout
+        self.n_slots = slots or 2 * workers
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.shm = SharedMemory(create=True, size=self.n_slots * self.slot_bytes)
+        self.slots = np.ndarray((self.n_slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+
+        self.free_slots = queue.Queue()
+        for slot in range(self.n_slots):
+            self.free_slots.put(slot)
+
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.next_job = 0
+        self.completed = 0
+        self.errors = 0
+
+        self.procs = [
+            ctx.Process(
+                target=_worker_main,
+                args=(i, model_args, infer_args, self.shm.name, self.n_slots, self.slot_bytes,
+                      self.tasks, self.results),
+                daemon=True,
+            )
+            for i in range(workers)
+        ]
+        for proc in self.procs:
+            proc.start()
+
+        # espera todos os workers carregarem o modelo
+        self.meta = {}
+        for _ in self.procs:
+            kind, worker_id, meta = self.results.get(timeout=120)
+            if kind == "failed":
+                self.close()
+                raise RuntimeError(f"❌ Worker {worker_id} não carregou o modelo: {meta}")
+            self.meta = meta
+        self.names = self.meta.get("names", self.names)
+        print(f"🧩 Servidor de inferência: {workers} processos, {self.n_slots} slots de {self.slot_bytes / 1e6:.1f} MB")
+
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+
+    def _collect(self):
+        while True:
+            msg = self.results.get()
+            if msg is None:
+                break
+            kind, job_id, slot, payload = msg
+            self.free_slots.put(slot)
+            with self.lock:
+                future = self.futures.pop(job_id)
+            if kind == "done":
+                self.completed += 1
+                future.set_result(payload)
+            else:
+                self.errors += 1
+                future.set_exception(RuntimeError(f"Worker de inferência falhou: {payload}"))
+
+    def check_workers(self):
+        dead = [i for i, proc in enumerate(self.procs) if not proc.is_alive()]
+        if dead:
+            codes = ", ".join(f"{i} (código {self.procs[i].exitcode})" for i in dead)
+            raise RuntimeError(f"❌ Worker de inferência morreu: {codes}")
+
+    def _wait(self, get):
+        """Espera em fatias de até 1 s, conferindo os workers a cada fatia; TimeoutError após self.timeout."""
+        waited = 0.0
+        while True:
+            step = min(1.0, self.timeout - waited)
+            try:
+                return get(step)
+            except (queue.Empty, FutureTimeout):
+                waited += step
+                self.check_workers()
+                if waited >= self.timeout:
+                    raise TimeoutError(f"❌ Servidor de inferência sem resposta há {self.timeout:g} s")
+
+    def submit(self, frame):
+        """Copia o frame para um slot livre e enfileira; devolve um Future com o array (n, 6)."""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"❌ Frame {frame.shape} maior que o slot ({self.slot_bytes} bytes)")
+        slot = self._wait(lambda t: self.free_slots.get(timeout=t))
+        self.slots[slot, :frame.nbytes] = frame.reshape(-1)
+
+        future = Future()
+        with self.lock:
+            job_id = self.next_job
+            self.next_job += 1
+            self.futures[job_id] = future
+        self.tasks.put((job_id, slot, frame.shape))
+        return future
+
+    def to_detections(self, out):
+        """Array (n, 6) → (detected_label, [(x1, y1, x2, y2, LABEL, conf)]) como o run_inference."""
+        detections = [
+            (int(x1), int(y1), int(x2), int(y2), self.names[int(cls_id)].upper(), float(conf))
+            for x1, y1, x2, y2, conf, cls_id in out
+        ]
+        return (detections[-1][4] if detections else "NONE"), detections
+
+    def infer(self, frame):
+        future = self.submit(frame)
+        return self.to_detections(self._wait(lambda t: future.result(timeout=t)))
+
+    def close(self):
+        for _ in self.procs:
+            self.tasks.put(None)
+        for proc in self.procs:
+            proc.join(timeout=5)
+        self.results.put(None)
+        if hasattr(self, "collector"):
+            self.collector.join(timeout=2)
+        del self.slots
+        self.shm.close()
+        self.shm.unlink()
+        print(f"🧩 Servidor de inferência: {self.completed} frames, {self.errors} erros")
@@ -0,0 +1,204 @@
+import time
+import threading
+from array import array
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+from yolov5.utils.general import Profile
+
+# ordem dos estágios na sobreposição e no /metrics
+STAGES = ("capture", "preprocess", "forward", "nms", "decision", "serial_write", "display")
+
+NULL_STAGE = nullcontext()  # reaproveitado quando as métricas estão desligadas
+
+
+class RingHistogram:
+    """Últimos `size` tempos (s) num buffer circular pré-alocado + totais acumulados."""
+
+    def __init__(self, size=512):
+        self.values = array("d", bytes(8 * size))
+        self.size = size
+        self.pos = 0
+        self.filled = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, dt):
+        self.values[self.pos] = dt
+        self.pos = (self.pos + 1) % self.size
+        self.filled = min(self.filled + 1, self.size)
+        self.count += 1
+        self.sum += dt
+
+    def quantiles(self, qs=(0.5, 0.99)):
+        samples = sorted(self.values[:self.filled])
+        if not samples:
+            return [0.0 for _ in qs]
+        return [samples[min(len(samples) - 1, int(q * len(samples)))] for q in qs]
+
+
+class StageProfile(Profile):
+    """Profile do YOLOv5 com relógio de alta resolução que joga cada medida no histograma."""
+
+    def __init__(self, hist, device=None):
+        super().__init__(device=device)
+        self.hist = hist
+
+    def time(self):
+        if self.cuda:
+            torch.cuda.synchronize(self.device)
+        return time.perf_counter()
+
+    def __exit__(self, type, value, traceback):
+        super().__exit__(type, value, traceback)
+        self.hist.add(self.dt)
+
+
+class StationMetrics:
+    """
+    Tempos por estágio da estação em histogramas de tamanho fixo.
+
+    `with metrics.stage("forward"): ...` mede um bloco; desligado, stage()
+    devolve sempre o mesmo nullcontext e nada é medido. tick() conta os
+    frames exibidos para o FPS (sempre ativo, custa um append). summary()
+    dá p50/p99 por estágio, overlay_lines() o texto para a janela e serve()
+    expõe tudo em /metrics no formato texto do Prometheus.
+    """
+
+    def __init__(self, enabled=True, window=512, device=None):
+        self.enabled = enabled
+        self.window = window
+        self.device = device if device and str(device).startswith("cuda") else None
+        self.hists = {name: RingHistogram(window) for name in STAGES}
+        self.lock = threading.Lock()  # estágios novos x relatórios em outras threads
+        self.frame_times = deque(maxlen=window)
+        self.server = None
+
+    def histogram(self, name):
+        hist = self.hists.get(name)
+        if hist is None:
+            with self.lock:
+                hist = self.hists.setdefault(name, RingHistogram(self.window))
+        return hist
+
+    def histograms(self):
+        """Cópia (nome, histograma) segura contra estágios criados por outras threads."""
+        with self.lock:
+            return list(self.hists.items())
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_STAGE
+        return StageProfile(self.histogram(name), self.device)
+
+    def observe(self, name, dt):
+        if self.enabled:
+            self.histogram(name).add(dt)
+
+    def tick(self):
+        self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        times = list(self.frame_times)
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    # ------------------------------------------------------------
+    #  RELATÓRIOS
+    # ------------------------------------------------------------
+
+    def summary(self):
+        out = {}
+        for name, hist in self.histograms():
+            if not hist.count:
+                continue
+            p50, p99 = hist.quantiles()
+            out[name] = {
+                "count": hist.count,
+                "mean_ms": 1000 * hist.sum / hist.count,
+                "p50_ms": 1000 * p50,
+                "p99_ms": 1000 * p99,
+            }
+        return out
+
+    def overlay_lines(self):
+        lines = [f"FPS {self.fps():.1f}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<12} p50 {s['p50_ms']:6.1f}  p99 {s['p99_ms']:6.1f} ms")
+        return lines
+
+    def print_stats(self):
+        print(f"\n📈 Latência por estágio (p50 / p99 em ms) — {self.fps():.1f} FPS:")
+        for name, s in self.summary().items():
+            print(f"   {name:<12} {s['p50_ms']:7.1f} / {s['p99_ms']:7.1f}  ({s['count']} amostras)")
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP station_stage_seconds Tempo de cada estágio da estação (janela recente).",
+            "# TYPE station_stage_seconds summary",
+        ]
+        for name, hist in self.histograms():
+            if not hist.count:
+                continue
+            p50, p99 = hist.quantiles()
+            lines.append(f'station_stage_seconds{{stage="{name}",quantile="0.5"}} {p50:.6f}')
+            lines.append(f'station_stage_seconds{{stage="{name}",quantile="0.99"}} {p99:.6f}')
+            lines.append(f'station_stage_seconds_sum{{stage="{name}"}} {hist.sum:.6f}')
+            lines.append(f'station_stage_seconds_count{{stage="{name}"}} {hist.count}')
+        lines += [
+            "# HELP station_fps Frames exibidos por segundo.",
+            "# TYPE station_fps gauge",
+            f"station_fps {self.fps():.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    # ------------------------------------------------------------
+    #  ENDPOINT HTTP
+    # ------------------------------------------------------------
+
+    def serve(self, host="127.0.0.1", port=9100):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # sem log a cada coleta
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📈 Métricas em http://{host}:{port}/metrics")
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+class TimedCapture:
+    """Envolve um cv2.VideoCapture e mede cada read() no estágio "capture"."""
+
+    def __init__(self, cap, metrics):
+        self.cap = cap
+        self.metrics = metrics
+
+    def read(self):
+        with self.metrics.stage("capture"):
+            return self.cap.read()
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+DISABLED = StationMetrics(enabled=False)
@@ -1,18 +1,135 @@
 import os
 import sys
+import ast
+import json
+import yaml
 import torch
-from yolov5.utils.general import non_max_suppression, scale_boxes
+from yolov5.utils.general import non_max_suppression, non_max_suppression_single, scale_boxes
 from yolov5.utils.augmentations import letterbox
 
+BACKENDS = ("torchscript", "onnxruntime", "openvino")
+
 def setup_paths(base_dir, yolo_path):
     full_yolo_path = os.path.join(base_dir, yolo_path)
     sys.path.insert(0, base_dir)
     sys.path.insert(0, full_yolo_path)
     return full_yolo_path
 
-def load_model(weights_path, device):
-    model = torch.jit.load(weights_path, map_location=device).eval()
+def tier_path(weights_path, size):
+    # mesmo modelo exportado em outra resolução: best_ts.pt → best_ts_320.pt
+    root, ext = os.path.splitext(weights_path)
+    return f"{root}_{size}{ext}"
+
+def batch_path(weights_path, batch_size):
+    # mesmo modelo exportado com lote fixo (várias esteiras): best_ts.pt → best_ts_b2.pt
+    root, ext = os.path.splitext(weights_path)
+    return f"{root}_b{batch_size}{ext}"
+
+def _parse_meta(meta):
+    # names pode vir como {"0": "metal", ...} (JSON/YAML) → lista ordenada
+    if isinstance(meta.get("names"), dict):
+        meta["names"] = [meta["names"][k] for k in sorted(meta["names"], key=int)]
+    return meta
+
+# ============================================================
+#  BACKENDS DE INFERÊNCIA
+#  Todos recebem o tensor (1, 3, H, W) do Preprocessor e devolvem
+#  uma lista cujo item [0] é o tensor de predições do YOLOv5.
+# ============================================================
+
+class TorchScriptBackend:
+    def __init__(self, weights_path, device, threads=None):
+        if threads:
+            torch.set_num_threads(threads)
+
+        extra_files = {"config.txt": ""}
+        self.model = torch.jit.load(weights_path, map_location=device, _extra_files=extra_files).eval()
+        self.meta = _parse_meta(json.loads(extra_files["config.txt"])) if extra_files["config.txt"] else {}
+
+        # export.optimize: o arquivo vem só congelado (o grafo otimizado não
+        # sobrevive ao torch.jit.save/load), a otimização é feita aqui
+        if self.meta.get("optimize", False):
+            self.model = torch.jit.optimize_for_inference(self.model)
+
+    def __call__(self, im):
+        return self.model(im)
+
+
+class OnnxRuntimeBackend:
+    def __init__(self, weights_path, device, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        providers = ["CPUExecutionProvider"]
+        if str(device).startswith("cuda"):
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.device = device
+        self.session = ort.InferenceSession(weights_path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        custom = self.session.get_modelmeta().custom_metadata_map
+        self.meta = _parse_meta({k: ast.literal_eval(v) for k, v in custom.items()})
+
+    def __call__(self, im):
+        y = self.session.run([self.output_name], {self.input_name: im.cpu().numpy()})[0]
+        return [torch.from_numpy(y).to(self.device)]
+
+
+class OpenVinoBackend:
+    def __init__(self, weights_path, device, threads=None):
+        import openvino as ov
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+
+        core = ov.Core()
+        self.device = device
+        self.compiled = core.compile_model(core.read_model(weights_path), "CPU", config)
+        self.request = self.compiled.create_infer_request()
+
+        meta_path = os.path.splitext(weights_path)[0] + ".yaml"
+        self.meta = {}
+        if os.path.isfile(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.meta = _parse_meta(yaml.safe_load(f))
+
+    def __call__(self, im):
+        self.request.infer({0: im.cpu().numpy()})
+        y = self.request.get_output_tensor(0).data
+        return [torch.from_numpy(y.copy()).to(self.device)]
+
+
+def load_model(weights_path, device, warmup=0, backend="torchscript", threads=None):
+    """
+    Carrega o modelo no backend escolhido (torchscript, onnxruntime ou
+    openvino). O objeto retornado é chamado como o modelo TorchScript e traz
+    em .meta os metadados do export ({"shape", "stride", "names"}), vazio para
+    modelos exportados sem metadados.
+    """
+    if backend == "torchscript":
+        model = TorchScriptBackend(weights_path, device, threads)
+    elif backend == "onnxruntime":
+        model = OnnxRuntimeBackend(weights_path, device, threads)
+    elif backend == "openvino":
+        model = OpenVinoBackend(weights_path, device, threads)
+    else:
+        raise ValueError(f"❌ Backend desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+
+    # aquecimento: as primeiras passadas são bem mais lentas
+    if warmup and "shape" in model.meta:
+        dummy = torch.zeros(model.meta["shape"], device=device)
+        with torch.no_grad():
+            for _ in range(warmup):
+                model(dummy)
+
     return model
 
 # Exportar funções do YOLO
-__all__ = ["non_max_suppression", "scale_boxes", "letterbox"]
+__all__ = ["non_max_suppression", "non_max_suppression_single", "scale_boxes", "letterbox"]
@@ -0,0 +1,107 @@
+import threading
+
+import cv2
+
+
+class MotionGate:
+    """
+    Decide se vale a pena rodar o YOLO no frame atual.
+
+    Compara a ROI do frame com a do frame anterior numa versão reduzida em
+    tons de cinza. Sem mudança, o modelo só roda a cada `idle_interval`
+    frames e o último resultado é reaproveitado; quando algo se mexe na ROI
+    a inferência passa a rodar em todos os frames por `active_frames` frames.
+
+    O resultado reaproveitado volta marcado como não inferido: ele só serve
+    para exibição, não é uma nova observação do item.
+
+    Com várias threads de inferência (pipeline), check() roda numa thread só,
+    na ordem dos frames (captura), e result() nas threads de inferência. Os
+    contadores só andam em result(): frame descartado pelo pipeline antes da
+    inferência não conta.
+    """
+
+    def __init__(self, roi, scale=0.25, threshold=15, min_changed=0.01, idle_interval=10, active_frames=15):
+        self.roi = roi
+        self.scale = scale
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.idle_interval = idle_interval
+        self.active_frames = active_frames
+
+        self.prev = None
+        self.active_left = 0
+        self.since_infer = None  # frames desde a última decisão de inferir (None = nenhuma ainda)
+        self.last_result = None
+
+        self.inferred = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def _small_gray(self, frame):
+        x1, y1, x2, y2 = self.roi
+        gray = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion(self, frame):
+        """Fração dos pixels da ROI que mudaram desde o frame anterior."""
+        gray = self._small_gray(frame)
+        if self.prev is None:
+            self.prev = gray
+            return 1.0
+        diff = cv2.absdiff(gray, self.prev)
+        self.prev = gray
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def should_infer(self, frame):
+        if self.motion(frame) >= self.min_changed:
+            self.active_left = self.active_frames
+
+        if self.active_left > 0:
+            self.active_left -= 1
+            return True
+        return self.since_infer is None or self.since_infer >= self.idle_interval
+
+    def check(self, frame):
+        """Decide se o frame vai para o modelo; chamar na ordem dos frames."""
+        inferred = self.should_infer(frame)
+        self.since_infer = 0 if inferred else self.since_infer + 1
+        return inferred
+
+    def result(self, frame, infer_fn, inferred):
+        """
+        Roda infer_fn(frame) se check() mandou inferir, senão reaproveita o
+        último resultado. Devolve (resultado, inferido).
+        """
+        if not inferred:
+            with self._lock:
+                last = self.last_result
+                if last is not None:
+                    self.skipped += 1
+                    return last, False
+        result = infer_fn(frame)
+        with self._lock:
+            self.last_result = result
+            self.inferred += 1
+        return result, True
+
+    def run(self, frame, infer_fn):
+        """
+        Roda infer_fn(frame) ou reaproveita o último resultado se a ROI não
+        mudou. Devolve (resultado, inferido).
+        """
+        return self.result(frame, infer_fn, self.check(frame))
+
+    def stats(self):
+        total = self.inferred + self.skipped
+        return {
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "skipped_ratio": self.skipped / total if total else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🏃 Frames inferidos: {s['inferred']} | pulados: {s['skipped']} ({100 * s['skipped_ratio']:.0f}% de CPU poupada no modelo)")
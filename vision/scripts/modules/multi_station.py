@@ -0,0 +1,270 @@
+import os
+import signal
+import threading
+import time
+
+import cv2
+import torch
+
+from .decision import make_decision_engine
+from .detection import postprocess
+from .drawing import draw_detections, draw_roi
+from .metrics import DISABLED, TimedCapture
+from .model_loader import non_max_suppression_single
+from .preprocess import Preprocessor
+from .serial_handler import make_serial_handler
+from .video_source import frame_time, open_camera
+
+
+class CameraReader:
+    """Thread de captura de uma câmera; guarda só o frame mais novo (como o LoadStreams do YOLOv5)."""
+
+    def __init__(self, cap, new_frame):
+        self.cap = cap
+        self.new_frame = new_frame  # Condition compartilhada entre as câmeras
+        self.frame = None
+        self.t_frame = None  # instante da captura (num replay, o gravado)
+        self.seq = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            t_frame = frame_time(self.cap)
+            if not ret:
+                print("⚠ Fim do vídeo ou câmera desconectada.")
+                self.running = False
+            with self.new_frame:
+                if ret:
+                    self.frame = frame
+                    self.t_frame = t_frame
+                    self.seq += 1
+                self.new_frame.notify_all()
+
+    def latest(self):
+        with self.new_frame:
+            return self.seq, self.frame, self.t_frame
+
+
+class Belt:
+    """Uma esteira: câmera, ROI, motor de decisão e Arduino próprios."""
+
+    def __init__(self, name, reader, roi, decision_engine, serial_handler, preprocessor):
+        self.name = name
+        self.reader = reader
+        self.roi = roi
+        self.decision_engine = decision_engine
+        self.serial_handler = serial_handler
+        self.preprocessor = preprocessor
+        self.last_seq = 0
+
+    def decide(self, detected_label, detections, now=None):
+        confirmed = self.decision_engine.update(detected_label, detections, now=now)
+        if confirmed:
+            print("\n===================================================")
+            print(f"✔ [{self.name}] Classe confirmada: {confirmed}")
+            print("===================================================\n")
+            self.serial_handler.send(confirmed)
+
+
+class BatchedStation:
+    """
+    Várias esteiras servidas por um único modelo.
+
+    A cada passo espera um frame novo de todas as câmeras (ou `timeout`),
+    pré-processa cada recorte direto na sua linha de um tensor de lote
+    (N, 3, H, W) persistente e roda UMA passada do modelo para o lote. O NMS
+    e o motor de decisão continuam por esteira.
+
+    batch_mode: "dynamic" (modelo aceita qualquer lote: só as esteiras com
+    frame novo), "fixed" (modelo exportado com lote = nº de esteiras: todas
+    entram e frames repetidos são ignorados) ou "single" (uma passada por
+    esteira, para modelos de lote 1).
+    """
+
+    def __init__(self, belts, model, img_size, device, conf_thres, iou_thres, names,
+                 roi_inference=False, batch_mode="dynamic", metrics=DISABLED, headless=False):
+        self.belts = belts
+        self.model = model
+        self.conf_thres = conf_thres
+        self.iou_thres = iou_thres
+        self.names = names
+        self.roi_inference = roi_inference
+        self.batch_mode = batch_mode
+        self.metrics = metrics
+        self.headless = headless
+
+        self.new_frame = belts[0].reader.new_frame
+        self.batch = torch.empty((len(belts), 3, *img_size), dtype=torch.float32, device=device)
+        self.steps = 0
+        self.frames = 0
+
+    def _source(self, belt, frame):
+        if not self.roi_inference:
+            return frame, (0, 0)
+        x1, y1, x2, y2 = belt.roi
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def _wait_frames(self, timeout):
+        """Espera todas as câmeras ativas terem frame novo; devolve as esteiras prontas."""
+        def fresh():
+            return [b for b in self.belts if b.reader.seq > b.last_seq]
+
+        with self.new_frame:
+            self.new_frame.wait_for(
+                lambda: len(fresh()) == sum(b.reader.running for b in self.belts) or
+                not any(b.reader.running for b in self.belts),
+                timeout
+            )
+            return fresh()
+
+    def _forward(self, n):
+        with self.metrics.stage("forward"), torch.no_grad():
+            if self.batch_mode != "single":
+                try:
+                    return self.model(self.batch[:n])[0]
+                except RuntimeError as e:
+                    if self.batch_mode == "fixed":
+                        raise
+                    print(f"⚠ Modelo não aceita lote {n} ({e}); usando uma passada por esteira.")
+                    self.batch_mode = "single"
+            return torch.cat([self.model(self.batch[i:i + 1])[0] for i in range(n)])
+
+    def step(self, timeout=0.5):
+        ready = self._wait_frames(timeout)
+        if not ready:
+            return any(b.reader.running for b in self.belts)
+
+        # lote fixo: todas as esteiras entram (frames repetidos são ignorados depois)
+        rows = self.belts if self.batch_mode == "fixed" else ready
+        frames, sources = [], []
+        with self.metrics.stage("preprocess"):
+            for i, belt in enumerate(rows):
+                seq, frame, t_frame = belt.reader.latest()
+                frames.append((seq, frame, t_frame))
+                if frame is None:
+                    sources.append(None)  # câmera ainda sem frame: linha do lote fica como estava
+                    continue
+                src, offset = self._source(belt, frame)
+                belt.preprocessor(src, out=self.batch[i])
+                sources.append((src.shape, offset))
+
+        pred = self._forward(len(rows))
+
+        keep_running = True
+        for i, belt in enumerate(rows):
+            seq, frame, t_frame = frames[i]
+            if belt not in ready:
+                continue
+            belt.last_seq = seq
+            src_shape, offset = sources[i]
+
+            with self.metrics.stage("nms"):
+                boxes = non_max_suppression_single(pred[i], self.conf_thres, self.iou_thres)
+            detected_label, detections = postprocess(boxes, self.batch.shape[2:], src_shape, offset, self.names)
+
+            with self.metrics.stage("decision"):
+                belt.decide(detected_label, detections, now=t_frame)
+
+            if not self.headless:
+                draw_roi(frame, *belt.roi)
+                draw_detections(frame, detections)
+                with self.metrics.stage("display"):
+                    cv2.imshow(f"RecicleAI - {belt.name}", frame)
+
+        if not self.headless:
+            keep_running = (cv2.waitKey(1) & 0xFF) != ord('q')
+
+        self.steps += 1
+        self.frames += len(ready)
+        self.metrics.tick()
+        return keep_running
+
+    def run(self, stop_event):
+        for belt in self.belts:
+            belt.reader.thread.start()
+        t0 = time.monotonic()
+        while not stop_event.is_set() and self.step():
+            pass
+        elapsed = time.monotonic() - t0
+        for belt in self.belts:
+            belt.reader.running = False
+        print(f"\n📊 {len(self.belts)} esteiras: {self.steps} passadas do modelo, {self.frames} frames "
+              f"({self.frames / max(self.steps, 1):.2f} frames/passada, {self.frames / max(elapsed, 1e-9):.1f} frames/s)")
+
+
+def run_belts(cfg, base_dir, model, names, metrics=DISABLED, headless=False):
+    """Modo várias esteiras (realtime.belts): uma câmera, ROI e Arduino por esteira, um modelo só."""
+    rt = cfg["realtime"]
+    belt_cfgs = rt["belts"]
+    device = rt["device"]
+
+    # todas as linhas do lote precisam do mesmo shape: letterbox sem "auto"
+    meta = model.meta
+    if "shape" in meta:
+        img_size, stride, model_batch = tuple(meta["shape"][2:]), meta["stride"], meta["shape"][0]
+    else:
+        size = rt.get("roi_img_size", cfg["training"]["img_size"]) if rt.get("roi_inference", False) \
+            else cfg["training"]["img_size"]
+        img_size, stride, model_batch = (size, size), 32, None
+
+    if model_batch is None:
+        batch_mode = "dynamic"
+    elif model_batch == len(belt_cfgs):
+        batch_mode = "fixed"
+    else:
+        batch_mode = "single"
+        print(f"⚠ Modelo exportado com lote {model_batch} para {len(belt_cfgs)} esteiras: "
+              f"sem lote (exporte com export.batch_size: {len(belt_cfgs)} → *_b{len(belt_cfgs)}).")
+
+    default_roi = (rt["roi_x_start"], rt["roi_y_start"], rt["roi_x_end"], rt["roi_y_end"])
+    new_frame = threading.Condition()
+    belts = []
+    for i, bc in enumerate(belt_cfgs):
+        source = bc["source"]
+        if isinstance(source, str) and os.path.isdir(os.path.join(base_dir, source)):
+            source = os.path.join(base_dir, source)
+        cap = open_camera(source, buffer_size=1, replay_speed=rt.get("replay_speed", 0.0))
+        if metrics.enabled:
+            cap = TimedCapture(cap, metrics)
+
+        serial_handler = make_serial_handler(cfg["arduino"], port=bc.get("port"), metrics=metrics)
+        serial_handler.start()
+
+        belts.append(Belt(
+            bc.get("name", f"Esteira {i + 1}"),
+            CameraReader(cap, new_frame),
+            tuple(bc.get("roi") or default_roi),
+            make_decision_engine(cfg, names),
+            serial_handler,
+            Preprocessor(img_size, device, stride=stride, auto=False),
+        ))
+
+    station = BatchedStation(
+        belts, model, img_size, device,
+        conf_thres=rt["conf_thres"],
+        iou_thres=rt["iou_thres"],
+        names=names,
+        roi_inference=rt.get("roi_inference", False),
+        batch_mode=batch_mode,
+        metrics=metrics,
+        headless=headless,
+    )
+    print(f"🎥 {len(belts)} esteiras, entrada {img_size[0]}x{img_size[1]}, lote: {batch_mode}")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    station.run(stop_event)
+
+    for belt in belts:
+        print(f"--- {belt.name}")
+        belt.serial_handler.print_stats()
+        belt.serial_handler.stop()
+        belt.reader.cap.release()
+    if metrics.enabled:
+        metrics.print_stats()
+        metrics.stop()
+    if not headless:
+        cv2.destroyAllWindows()
@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import deque
+
+from .video_source import frame_time
+
+END = object()  # fim da fonte no modo lossless: atravessa os estágios antes de parar
+
+
+class LatestValue:
+    """
+    Fila limitada a 1 item: um novo put() descarta o valor antigo ainda não
+    lido (merge(antigo, novo), se dado, decide o que fica no lugar). Com
+    lossless=True o put() espera o valor anterior ser lido.
+    """
+
+    def __init__(self, lossless=False):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.lossless = lossless
+        self.dropped = 0
+
+    def put(self, item, merge=None):
+        with self._cond:
+            if self.lossless:
+                self._cond.wait_for(lambda: self._item is None or self._closed)
+                if self._closed:
+                    return
+            elif self._item is not None:
+                self.dropped += 1
+                if merge is not None:
+                    item = merge(self._item, item)
+            self._item = item
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            self._cond.notify_all()  # libera um put() lossless esperando
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def _keep_gate(dropped, item):
+    """Frame novo no lugar de um descartado: herda o pedido de inferência do porteiro."""
+    if dropped is END or not dropped[3]:
+        return item
+    return item[:3] + (True,)
+
+
+class StageTimer:
+    """Guarda os últimos tempos (em segundos) de um estágio do pipeline."""
+
+    def __init__(self, name, window=300):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, dt):
+        with self._lock:
+            self.samples.append(dt)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = list(self.samples)
+        if not samples:
+            return {"count": self.count, "mean_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * sum(samples) / len(samples),
+            "max_ms": 1000 * max(samples),
+        }
+
+
+class StationPipeline:
+    """
+    Pipeline em estágios para a estação:
+
+        captura -> inferência -> decisão/atuação -> (exibição)
+
+    Cada estágio roda na sua própria thread e os estágios são ligados por
+    filas LatestValue, então o estágio seguinte sempre pega o dado mais novo
+    e nunca acumula atraso. A exibição (cv2.imshow) roda na thread principal.
+
+    Com inference_threads > 1 vários frames ficam em inferência ao mesmo
+    tempo (útil com o servidor de inferência em processos); um resultado
+    mais velho que o último entregue é descartado.
+
+    lossless=True (replay de gravação) não descarta nada: cada estágio
+    espera o seguinte e a inferência roda numa thread só, em ordem. O
+    decide_fn recebe o instante do frame na fonte (ver frame_time).
+
+    gate_fn(frame) (porteiro de movimento) roda na captura, na ordem dos
+    frames; o infer_fn recebe (frame, gate_fn(frame)). Se um frame que o
+    porteiro mandou inferir é descartado, o frame novo herda a inferência
+    (senão os frames parados seguintes reaproveitariam um resultado velho).
+    """
+
+    def __init__(self, cap, infer_fn, decide_fn, display_fn=None, inference_threads=1, lossless=False,
+                 gate_fn=None):
+        self.cap = cap
+        self.infer_fn = infer_fn
+        self.gate_fn = gate_fn
+        self.decide_fn = decide_fn
+        self.display_fn = display_fn
+        self.inference_threads = 1 if lossless else inference_threads
+        self.last_result = 0.0
+        self.result_lock = threading.Lock()
+        self.stale_results = 0
+
+        self.frames = LatestValue(lossless)
+        self.results = LatestValue(lossless)
+        self.previews = LatestValue()  # exibição pode pular frames
+
+        self.timers = {
+            name: StageTimer(name)
+            for name in ("capture", "inference", "decision", "display", "latency")
+        }
+
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.error = None  # exceção de um estágio; run() relança na thread principal
+
+    # ------------------------------------------------------------
+    #  ESTÁGIOS
+    # ------------------------------------------------------------
+
+    def _capture_loop(self):
+        while not self.stop_event.is_set():
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("⚠ Fim do vídeo ou câmera desconectada.")
+                if self.frames.lossless:
+                    self.frames.put(END)  # termina de processar os frames já lidos
+                    return
+                break
+            t1 = time.perf_counter()
+            self.timers["capture"].add(t1 - t0)
+            gate = self.gate_fn(frame) if self.gate_fn is not None else None
+            self.frames.put((t1, frame_time(self.cap), frame, gate), merge=_keep_gate)
+        self.stop()
+
+    def _inference_loop(self):
+        while not self.stop_event.is_set():
+            item = self.frames.get(timeout=0.1)
+            if item is None:
+                continue
+            if item is END:
+                self.results.put(END)
+                return
+            t_frame, t_source, frame, gate = item
+            t0 = time.perf_counter()
+            result = self.infer_fn(frame, gate)  # (classe, detecções, ...) repassado inteiro ao decide_fn
+            self.timers["inference"].add(time.perf_counter() - t0)
+            with self.result_lock:
+                if t_frame < self.last_result:
+                    self.stale_results += 1
+                    continue
+                self.last_result = t_frame
+                self.results.put((t_frame, t_source, frame, result))
+
+    def _decision_loop(self):
+        while not self.stop_event.is_set():
+            item = self.results.get(timeout=0.1)
+            if item is None:
+                continue
+            if item is END:
+                self.stop()
+                return
+            t_frame, t_source, frame, result = item
+            t0 = time.perf_counter()
+            self.decide_fn(*result, now=t_source)
+            t1 = time.perf_counter()
+            self.timers["decision"].add(t1 - t0)
+            self.timers["latency"].add(t1 - t_frame)
+            if self.display_fn is not None:
+                self.previews.put((frame, result[1]))
+
+    # ------------------------------------------------------------
+    #  CONTROLE
+    # ------------------------------------------------------------
+
+    def _guard(self, target):
+        """Um estágio que falha para o pipeline inteiro em vez de deixar os outros esperando."""
+        try:
+            target()
+        except BaseException as e:
+            if self.error is None:
+                self.error = e
+            self.stop()
+
+    def start(self):
+        targets = [self._capture_loop] + [self._inference_loop] * self.inference_threads + [self._decision_loop]
+        for target in targets:
+            thread = threading.Thread(target=self._guard, args=(target,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def run(self):
+        """Bloqueia até o pipeline parar; exibe os frames se houver display_fn."""
+        self.start()
+        while not self.stop_event.is_set():
+            if self.display_fn is None:
+                self.stop_event.wait(0.1)
+                continue
+            item = self.previews.get(timeout=0.1)
+            if item is None:
+                continue
+            t0 = time.perf_counter()
+            keep_running = self.display_fn(*item)
+            self.timers["display"].add(time.perf_counter() - t0)
+            if keep_running is False:
+                self.stop()
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        self.stop_event.set()
+        for q in (self.frames, self.results, self.previews):
+            q.close()
+
+    def join(self, timeout=2.0):
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+
+    def stats(self):
+        stats = {name: timer.summary() for name, timer in self.timers.items()}
+        stats["dropped_frames"] = self.frames.dropped
+        stats["stale_results"] = self.stale_results
+        return stats
+
+    def print_stats(self):
+        print("\n📊 Tempos por estágio (média / máx em ms):")
+        for name, timer in self.timers.items():
+            s = timer.summary()
+            print(f"   {name:<10} {s['mean_ms']:7.1f} / {s['max_ms']:7.1f}  ({s['count']} amostras)")
+        print(f"   frames descartados pela captura: {self.frames.dropped}")
+        if self.inference_threads > 1:
+            print(f"   resultados fora de ordem descartados: {self.stale_results}")
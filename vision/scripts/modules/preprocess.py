@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import torch
+
+
+class Preprocessor:
+    """
+    Pré-processamento com buffers reaproveitados entre frames.
+
+    Faz o mesmo que letterbox() + BGR→RGB + HWC→CHW + /255 do YOLOv5, mas
+    escrevendo sempre nos mesmos buffers: uma imagem uint8 com a borda já
+    pintada (pinned quando o device é CUDA) e o tensor float de entrada do
+    modelo. Os buffers só são recriados se o tamanho do frame mudar.
+    """
+
+    def __init__(self, img_size, device, stride=32, auto=True, color=(114, 114, 114)):
+        self.img_size = (img_size, img_size) if isinstance(img_size, int) else tuple(img_size)
+        self.device = torch.device(device)
+        self.stride = stride
+        self.auto = auto
+        self.color = color
+        self.frame_shape = None
+
+    def _allocate(self, frame_shape):
+        h0, w0 = frame_shape[:2]
+
+        # mesma geometria do letterbox() do YOLOv5
+        r = min(self.img_size[0] / h0, self.img_size[1] / w0)
+        new_unpad = round(w0 * r), round(h0 * r)
+        dw, dh = self.img_size[1] - new_unpad[0], self.img_size[0] - new_unpad[1]
+        if self.auto:
+            dw, dh = np.mod(dw, self.stride), np.mod(dh, self.stride)
+        dw /= 2
+        dh /= 2
+        top, bottom = round(dh - 0.1), round(dh + 0.1)
+        left, right = round(dw - 0.1), round(dw + 0.1)
+        h, w = new_unpad[1] + top + bottom, new_unpad[0] + left + right
+
+        # imagem letterbox persistente (HWC, RGB, uint8)
+        pin = self.device.type == "cuda"
+        self.im_t = torch.empty((h, w, 3), dtype=torch.uint8, pin_memory=pin)
+        self.im = self.im_t.numpy()
+        self.im[:] = self.color[::-1]  # borda já convertida para RGB
+        self.inner = self.im[top:top + new_unpad[1], left:left + new_unpad[0]]
+
+        self.resized = None
+        if (w0, h0) != new_unpad:
+            self.resized = np.empty((new_unpad[1], new_unpad[0], 3), dtype=np.uint8)
+        self.new_unpad = new_unpad
+
+        # cópia uint8 no device (só quando não é CPU) e tensor float de entrada
+        self.im_dev = self.im_t if self.device.type == "cpu" else torch.empty_like(self.im_t, device=self.device)
+        self.input = torch.empty((1, 3, h, w), dtype=torch.float32, device=self.device)
+        self.chw = self.im_dev.permute(2, 0, 1)
+        self.frame_shape = frame_shape
+
+    def __call__(self, frame, out=None):
+        """out: tensor (3, h, w) de destino, ex.: uma linha do lote de várias câmeras."""
+        if frame.shape != self.frame_shape:
+            self._allocate(frame.shape)
+
+        # resize + BGR→RGB direto para dentro do buffer letterbox
+        if self.resized is not None:
+            cv2.resize(frame, self.new_unpad, dst=self.resized, interpolation=cv2.INTER_LINEAR)
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.inner)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.inner)
+
+        if self.im_dev is not self.im_t:
+            self.im_dev.copy_(self.im_t, non_blocking=True)
+
+        # HWC→CHW + uint8→float + /255 numa única operação
+        if out is not None:
+            torch.div(self.chw, 255.0, out=out)
+            return out
+        torch.div(self.chw, 255.0, out=self.input[0])
+        return self.input
@@ -0,0 +1,114 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from .drawing import draw_detections, draw_roi
+
+BOUNDARY = "frame"
+
+
+class MjpegPreview:
+    """
+    Prévia anotada para o modo headless, servida como MJPEG por HTTP.
+
+    offer() só guarda a referência do último (frame, detecções) e volta na
+    hora; uma thread própria acorda `fps` vezes por segundo, copia o frame,
+    desenha ROI e caixas, comprime em JPEG e entrega aos clientes conectados
+    em /stream (ou um quadro só em /snapshot.jpg). Nada de desenho ou
+    codificação roda no caminho da inferência.
+    """
+
+    def __init__(self, roi, host="127.0.0.1", port=8080, fps=2.0, quality=70):
+        self.roi = roi
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / fps
+        self.quality = quality
+
+        self.latest = None
+        self.jpeg = None
+        self.cond = threading.Condition()
+        self.running = True
+        self.server = None
+        self.frames_encoded = 0
+
+    def offer(self, frame, detections):
+        self.latest = (frame, detections)
+
+    def _render_loop(self):
+        while self.running:
+            t0 = time.monotonic()
+            item, self.latest = self.latest, None
+            if item is not None:
+                frame, detections = item
+                frame = frame.copy()
+                draw_roi(frame, *self.roi)
+                draw_detections(frame, detections)
+                ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    with self.cond:
+                        self.jpeg = jpg.tobytes()
+                        self.frames_encoded += 1
+                        self.cond.notify_all()
+            time.sleep(max(0.0, self.interval - (time.monotonic() - t0)))
+
+    def _next_jpeg(self, last, timeout=5.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.jpeg is not last or not self.running, timeout)
+            return self.jpeg
+
+    def start(self):
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/snapshot.jpg":
+                    jpeg = preview._next_jpeg(None)
+                    if jpeg is None:
+                        self.send_error(503)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "image/jpeg")
+                    self.send_header("Content-Length", str(len(jpeg)))
+                    self.end_headers()
+                    self.wfile.write(jpeg)
+                    return
+
+                if self.path not in ("/", "/stream"):
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.end_headers()
+                jpeg = None
+                try:
+                    while preview.running:
+                        new = preview._next_jpeg(jpeg)
+                        if new is None or new is jpeg:
+                            continue
+                        jpeg = new
+                        self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                         f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # cliente fechou a aba
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._render_loop, daemon=True).start()
+        print(f"📺 Prévia em http://{self.host}:{self.port}/stream")
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        if self.server is not None:
+            self.server.shutdown()
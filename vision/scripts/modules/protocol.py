@@ -0,0 +1,206 @@
+from collections import namedtuple
+
+# evento decodificado do Arduino:
+#   kind = line | ack | done | failed | status | hello
+#   seq  = número de sequência do comando (None no protocolo de texto)
+Event = namedtuple("Event", "kind seq data")
+
+# comandos de classe: o master liga a esteira, aciona o atuador e desliga
+CLASS_COMMANDS = ("METAL", "PAPEL", "PLASTICO", "VIDRO")  # mesma ordem do data.yaml
+
+
+# =============================================================
+#  PROTOCOLO DE TEXTO (firmware atual)
+# =============================================================
+
+# respostas do master usadas para casar cada comando com sua confirmação
+ACK_PREFIX = "ARDUINO: Recebi comando ->"
+DONE_BELT = "[ESTEIRA] Motor parado."
+DONE_BELT_ON = "[ESTEIRA] Velocidade final atingida."
+DONE_STATUS = "Status recebido:"
+INVALID = "Comando inválido."
+
+
+class TextProtocol:
+    """Linhas ASCII ("PLASTICO\\n") e respostas de texto do master.ino."""
+
+    name = "text"
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def encode(self, message, seq):
+        return (message + "\n").encode()
+
+    @staticmethod
+    def done_marker(message):
+        upper = message.upper()
+        if upper in CLASS_COMMANDS or upper == "DESLIGAR":
+            return DONE_BELT
+        if upper == "LIGAR":
+            return DONE_BELT_ON
+        return DONE_STATUS
+
+    def decode_line(self, line):
+        events = [Event("line", None, line)]
+        if line.startswith(ACK_PREFIX):
+            events.append(Event("ack", None, line[len(ACK_PREFIX):].strip()))
+        elif line.startswith(INVALID):
+            events.append(Event("failed", None, line))
+        elif line.startswith(DONE_BELT):
+            events.append(Event("done", None, DONE_BELT))
+        elif line.startswith(DONE_BELT_ON):
+            events.append(Event("done", None, DONE_BELT_ON))
+        elif line.startswith(DONE_STATUS):
+            events.append(Event("done", None, DONE_STATUS))
+        return events
+
+    def feed(self, data):
+        self.buffer += data
+        events = []
+        while b"\n" in self.buffer:
+            raw, _, rest = self.buffer.partition(b"\n")
+            self.buffer = bytearray(rest)
+            line = raw.decode(errors="ignore").strip()
+            if line:
+                events.extend(self.decode_line(line))
+        return events
+
+
+# =============================================================
+#  PROTOCOLO BINÁRIO COMPACTO (v1)
+#
+#  | 0xA5 | versão | opcode | seq | len | payload (len bytes) | crc8 |
+#
+#  O CRC-8 (polinômio 0x07) cobre de versão até o fim do payload.
+# =============================================================
+
+SYNC = 0xA5
+VERSION = 1
+HEADER_SIZE = 5
+HANDSHAKE = b"PROTO_BIN\n"  # linha de texto: o firmware antigo só responde "Comando inválido."
+
+# host → Arduino
+OP_HELLO = 0x01
+OP_SORT = 0x02         # payload: índice da classe em CLASS_COMMANDS
+OP_STATUS_REQ = 0x03
+OP_STOP = 0x04
+OP_RETURN = 0x05
+OP_FIRE = 0x06         # payload: índice do atuador em ACTUATORS
+OP_BELT = 0x07         # payload: 1 = liga, 0 = desliga
+# Arduino → host
+OP_ACK = 0x10
+OP_DONE = 0x11
+OP_NACK = 0x12
+OP_STATUS = 0x13       # payload fixo: estados A2, A3, A4, A5 e esteira
+
+STATUS_SIZE = 5
+
+TEXT_TO_OPCODE = {"STATUS": OP_STATUS_REQ, "PARAR": OP_STOP, "RETORNAR": OP_RETURN}
+BELT_COMMANDS = {"LIGAR": 1, "DESLIGAR": 0}
+ACTUATORS = ("A2", "A3", "A4", "A5")
+
+
+def _make_crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(opcode, seq, payload=b""):
+    body = bytes((VERSION, opcode, seq & 0xFF, len(payload))) + payload
+    return bytes((SYNC,)) + body + bytes((crc8(body),))
+
+
+class BinaryProtocol:
+    """Quadros binários com opcode de 1 byte, número de sequência e CRC-8."""
+
+    name = "binary"
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+
+    def encode(self, message, seq):
+        upper = message.upper()
+        if upper in CLASS_COMMANDS:
+            return encode_frame(OP_SORT, seq, bytes((CLASS_COMMANDS.index(upper),)))
+        if upper in TEXT_TO_OPCODE:
+            return encode_frame(TEXT_TO_OPCODE[upper], seq)
+        if upper in BELT_COMMANDS:
+            return encode_frame(OP_BELT, seq, bytes((BELT_COMMANDS[upper],)))
+        if len(upper) == 3 and upper[:2] in ACTUATORS and upper[2] == "A":
+            return encode_frame(OP_FIRE, seq, bytes((ACTUATORS.index(upper[:2]),)))
+        raise ValueError(f"Comando sem opcode no protocolo binário: {message}")
+
+    @staticmethod
+    def done_marker(message):
+        return None  # casamento é feito pelo número de sequência
+
+    def decode_frame(self, opcode, seq, payload):
+        if opcode == OP_ACK:
+            return Event("ack", seq, None)
+        if opcode == OP_DONE:
+            return Event("done", seq, None)
+        if opcode == OP_NACK:
+            return Event("failed", seq, payload[:1])
+        if opcode == OP_STATUS and len(payload) == STATUS_SIZE:
+            return Event("status", seq, {
+                "A2": payload[0], "A3": payload[1], "A4": payload[2], "A5": payload[3], "belt": payload[4],
+            })
+        if opcode == OP_HELLO:
+            return Event("hello", seq, payload[0] if payload else None)
+        return None
+
+    def feed(self, data):
+        self.buffer += data
+        events = []
+        while True:
+            start = self.buffer.find(SYNC)
+            if start < 0:
+                self.buffer.clear()
+                break
+            if start:
+                del self.buffer[:start]
+            if len(self.buffer) < HEADER_SIZE:
+                break
+
+            version, opcode, seq, length = self.buffer[1:HEADER_SIZE]
+            end = HEADER_SIZE + length
+            if len(self.buffer) < end + 1:
+                break
+
+            body = bytes(self.buffer[1:end])
+            if version != VERSION or crc8(body) != self.buffer[end]:
+                # quadro corrompido: descarta só o byte de sync e ressincroniza
+                self.crc_errors += 1
+                del self.buffer[:1]
+                continue
+
+            event = self.decode_frame(opcode, seq, body[HEADER_SIZE - 1:])
+            del self.buffer[:end + 1]
+            if event is not None:
+                events.append(event)
+        return events
+
+
+def make_protocol(name):
+    if name == "binary":
+        return BinaryProtocol()
+    if name in ("text", "auto"):
+        return TextProtocol()  # auto começa em texto e tenta o handshake
+    raise ValueError(f"❌ Protocolo desconhecido: {name} (opções: text, binary, auto)")
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+# arquivos de uma gravação
+EVENTS_FILE = "events.jsonl"   # um evento JSON por linha, em ordem de chegada
+META_FILE = "meta.json"
+CHUNK_NAME = "frames_{:05d}.bin"  # JPEGs concatenados; o índice fica nos eventos "frame"
+
+
+def detections_to_list(detections):
+    """(x1, y1, x2, y2, label, conf) → lista JSON (conf pode ser tensor)."""
+    return [[int(x1), int(y1), int(x2), int(y2), label, round(float(conf), 4)]
+            for x1, y1, x2, y2, label, conf in detections]
+
+
+class SessionRecorder:
+    """
+    Grava uma execução da estação para reproduzir depois.
+
+    Os frames viram JPEG e são anexados a arquivos de até `chunk_frames`
+    frames; cada frame gera um evento com o instante (time.monotonic), o
+    arquivo, o offset e o tamanho. Inferências, decisões e mensagens da
+    serial entram no mesmo events.jsonl. A compressão e a escrita rodam numa
+    thread própria: se o disco não acompanhar, frames são descartados (e
+    contados), os demais eventos nunca. Nenhuma chamada bloqueia: a fila é
+    ilimitada e só os frames pendentes são limitados (`queue_size`).
+    """
+
+    def __init__(self, root_dir, chunk_frames=300, jpeg_quality=90, queue_size=64):
+        self.dir = os.path.join(root_dir, time.strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(self.dir, exist_ok=True)
+        self.chunk_frames = chunk_frames
+        self.jpeg_quality = jpeg_quality
+
+        self.queue = queue.Queue()
+        self.frame_slots = threading.BoundedSemaphore(queue_size)  # frames aguardando compressão
+        self.events = open(os.path.join(self.dir, EVENTS_FILE), "w", encoding="utf-8")
+        self.chunk = None
+        self.chunk_index = -1
+        self.offset = 0
+
+        self.frames = 0
+        self.dropped = 0
+        self.shape = None
+        self.t_start = time.monotonic()
+
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    # ------------------------------------------------------------
+    #  ENTRADA (chamada pelas threads da estação)
+    # ------------------------------------------------------------
+
+    def frame(self, frame, t=None):
+        t = time.monotonic() if t is None else t
+        if not self.frame_slots.acquire(blocking=False):
+            self.dropped += 1  # escrita atrasada: descarta o frame, nunca trava a captura
+            return
+        self.queue.put(("frame", t, frame))
+
+    def log(self, kind, t=None, **data):
+        t = time.monotonic() if t is None else t
+        self.queue.put((kind, t, data))  # fila ilimitada: eventos nunca esperam a compressão dos frames
+
+    # ------------------------------------------------------------
+    #  ESCRITA
+    # ------------------------------------------------------------
+
+    def _next_chunk(self):
+        if self.chunk is not None:
+            self.chunk.close()
+        self.chunk_index += 1
+        self.offset = 0
+        self.chunk = open(os.path.join(self.dir, CHUNK_NAME.format(self.chunk_index)), "wb")
+
+    def _write_frame(self, t, frame):
+        ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            self.dropped += 1
+            return
+        if self.frames % self.chunk_frames == 0:
+            self._next_chunk()
+        data = jpg.tobytes()
+        self.chunk.write(data)
+        self._write_event("frame", t, {
+            "i": self.frames,
+            "chunk": self.chunk_index,
+            "offset": self.offset,
+            "size": len(data),
+        })
+        self.offset += len(data)
+        self.frames += 1
+        self.shape = frame.shape
+
+    def _write_event(self, kind, t, data):
+        self.events.write(json.dumps({"type": kind, "t": round(t, 6), **data}, ensure_ascii=False) + "\n")
+
+    def _writer(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            kind, t, payload = item
+            if kind == "frame":
+                self._write_frame(t, payload)
+                self.frame_slots.release()
+            else:
+                self._write_event(kind, t, payload)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.chunk is not None:
+            self.chunk.close()
+        self.events.close()
+        with open(os.path.join(self.dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "frames": self.frames,
+                "dropped": self.dropped,
+                "duration": round(time.monotonic() - self.t_start, 3),
+                "shape": list(self.shape) if self.shape is not None else None,
+                "chunk_frames": self.chunk_frames,
+                "jpeg_quality": self.jpeg_quality,
+            }, f, indent=2)
+        print(f"💾 Gravação salva em {self.dir}: {self.frames} frames ({self.dropped} descartados)")
+
+
+class RecordingCapture:
+    """Envolve um cv2.VideoCapture e grava cada frame lido."""
+
+    def __init__(self, cap, recorder):
+        self.cap = cap
+        self.recorder = recorder
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            # mesmo instante que a estação usa para este frame (ver frame_time)
+            self.t_frame = getattr(self.cap, "t_frame", None) or time.monotonic()
+            # cópia: a exibição desenha no frame antes da thread do gravador comprimir
+            self.recorder.frame(frame.copy(), self.t_frame)
+        return ret, frame
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+# =============================================================
+#  REPRODUÇÃO
+# =============================================================
+
+def is_recording(path):
+    return isinstance(path, str) and os.path.isfile(os.path.join(path, EVENTS_FILE))
+
+
+def load_events(rec_dir, kinds=None):
+    with open(os.path.join(rec_dir, EVENTS_FILE), "r", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    if kinds is not None:
+        events = [e for e in events if e["type"] in kinds]
+    return events
+
+
+class RecordedSource:
+    """
+    Fonte de vídeo com a mesma interface usada do cv2.VideoCapture
+    (read/isOpened/release/set/get) que lê uma gravação do SessionRecorder.
+
+    speed=1 respeita os intervalos gravados, speed=N reproduz N vezes mais
+    rápido e speed=0 entrega os frames o mais rápido possível. `t_frame` é o
+    instante gravado do último frame lido: a estação usa esse relógio em vez
+    do de parede, então as decisões não dependem da velocidade do replay.
+    """
+
+    def __init__(self, rec_dir, speed=0.0, loop=False):
+        self.dir = rec_dir
+        self.speed = speed
+        self.loop = loop
+        self.index = load_events(rec_dir, kinds=("frame",))
+        self.pos = 0
+        self.chunks = {}
+        self.t_first = None
+        self.t_wall = None
+        self.t_frame = None
+
+    def isOpened(self):
+        return bool(self.index)
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.index))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.pos)
+        return 0.0
+
+    def _chunk(self, k):
+        if k not in self.chunks:
+            for f in self.chunks.values():
+                f.close()  # leitura sequencial: só um arquivo aberto por vez
+            self.chunks = {k: open(os.path.join(self.dir, CHUNK_NAME.format(k)), "rb")}
+        return self.chunks[k]
+
+    def _pace(self, t):
+        if self.t_first is None:
+            self.t_first, self.t_wall = t, time.monotonic()
+            return
+        if self.speed > 0:
+            delay = (t - self.t_first) / self.speed - (time.monotonic() - self.t_wall)
+            if delay > 0:
+                time.sleep(delay)
+
+    def read(self):
+        if self.pos >= len(self.index):
+            if not self.loop:
+                return False, None
+            self.pos, self.t_first = 0, None
+
+        entry = self.index[self.pos]
+        self.pos += 1
+        self._pace(entry["t"])
+        self.t_frame = entry["t"]
+
+        f = self._chunk(entry["chunk"])
+        f.seek(entry["offset"])
+        data = f.read(entry["size"])
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        return frame is not None, frame
+
+    def release(self):
+        for f in self.chunks.values():
+            f.close()
+        self.chunks = {}
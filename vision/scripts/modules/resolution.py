@@ -0,0 +1,136 @@
+import os
+import time
+from collections import deque
+
+import torch
+
+from .model_loader import load_model, tier_path
+from .preprocess import Preprocessor
+
+
+def load_tiers(weights_path, sizes, device, backend="torchscript", threads=None, warmup=3):
+    """
+    Carrega o modelo de cada resolução (best_ts_320.pt, ...) já aquecido.
+    Devolve {size: (modelo, Preprocessor)} e o tempo medido de cada um (ms).
+    """
+    tiers, initial_ms = {}, {}
+    for size in sizes:
+        path = tier_path(weights_path, size)
+        if not os.path.isfile(path):
+            extra = {"onnxruntime": " e export.onnx: true", "openvino": " e export.openvino: true"}.get(backend, "")
+            raise FileNotFoundError(f"❌ Modelo {size}x{size} não encontrado: {path}\n"
+                                    f"   Exporte com export.tiers: {list(sizes)}{extra}")
+        model = load_model(path, device, warmup=warmup, backend=backend, threads=threads)
+        shape = model.meta.get("shape", [1, 3, size, size])
+        preprocessor = Preprocessor(tuple(shape[2:]), device, stride=model.meta.get("stride", 32), auto=False)
+
+        im = torch.zeros(shape, device=device)
+        t0 = time.perf_counter()
+        with torch.no_grad():
+            for _ in range(3):
+                model(im)
+        initial_ms[size] = 1000 * (time.perf_counter() - t0) / 3
+        tiers[size] = (model, preprocessor)
+        print(f"   resolução {size}: {initial_ms[size]:.1f} ms/passada")
+    return tiers, initial_ms
+
+
+class ResolutionController:
+    """
+    Escolhe a resolução de entrada entre alguns níveis pré-carregados.
+
+    Cada nível guarda uma média móvel do tempo de inferência medido nele.
+    A estação roda no maior nível que cabe em `target_ms`; quando alguma
+    detecção fica perto do limite (conf_thres <= conf < conf_thres + margin)
+    o controle sobe um nível, desde que o tempo estimado dele caiba em
+    `target_ms * (1 + headroom)`. Depois de `relax_frames` frames sem
+    dúvida volta ao nível base. `cooldown` frames entre trocas evita
+    oscilação.
+    """
+
+    def __init__(self, sizes, target_ms, conf_thres, margin=0.15, headroom=0.5,
+                 relax_frames=15, cooldown=5, alpha=0.2, initial_ms=None):
+        self.sizes = sorted(sizes)
+        self.target_ms = target_ms
+        self.conf_thres = conf_thres
+        self.margin = margin
+        self.headroom = headroom
+        self.relax_frames = relax_frames
+        self.cooldown = cooldown
+        self.alpha = alpha
+
+        # tempo médio (ms) por nível; vem do aquecimento se informado
+        self.latency = dict(initial_ms or {})
+        self.level = self._base_level()
+        self.since_switch = 0
+        self.confident_frames = 0
+
+        self.frames = {size: 0 for size in self.sizes}
+        self.switches = 0
+        self.history = deque(maxlen=300)
+
+    @property
+    def size(self):
+        return self.sizes[self.level]
+
+    def _fits(self, level, budget):
+        ms = self.latency.get(self.sizes[level])
+        return ms is None or ms <= budget
+
+    def _base_level(self):
+        """Maior nível cujo tempo estimado cabe no alvo (ou o menor de todos)."""
+        for level in range(len(self.sizes) - 1, -1, -1):
+            if self.latency.get(self.sizes[level], float("inf")) <= self.target_ms:
+                return level
+        return 0
+
+    def uncertain(self, detections):
+        return any(self.conf_thres <= float(d[5]) < self.conf_thres + self.margin for d in detections)
+
+    def update(self, latency_s, detections):
+        """Registra o frame processado no nível atual; devolve a resolução do próximo frame."""
+        size = self.size
+        ms = 1000 * latency_s
+        self.latency[size] = ms if size not in self.latency else \
+            (1 - self.alpha) * self.latency[size] + self.alpha * ms
+        self.frames[size] += 1
+        self.history.append((size, ms))
+        self.since_switch += 1
+
+        base = self._base_level()
+        level = self.level
+        if self.uncertain(detections):
+            self.confident_frames = 0
+            if level + 1 < len(self.sizes) and self._fits(level + 1, self.target_ms * (1 + self.headroom)):
+                level += 1
+        else:
+            self.confident_frames += 1
+            if level > base and self.confident_frames >= self.relax_frames:
+                level = base
+
+        # nível atual ficou lento demais (ex.: CPU ocupada): desce já
+        if self.latency[size] > self.target_ms * (1 + self.headroom) and level > 0:
+            level = min(level, self.level - 1)
+
+        if level != self.level and self.since_switch >= self.cooldown:
+            self.level = level
+            self.since_switch = 0
+            self.switches += 1
+        return self.size
+
+    def stats(self):
+        total = sum(self.frames.values())
+        return {
+            "frames": dict(self.frames),
+            "share": {s: n / total if total else 0.0 for s, n in self.frames.items()},
+            "latency_ms": {s: round(ms, 1) for s, ms in self.latency.items()},
+            "switches": self.switches,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"📏 Resolução adaptativa (alvo {self.target_ms:.0f} ms): {s['switches']} trocas")
+        for size in self.sizes:
+            ms = s["latency_ms"].get(size)
+            ms_text = f"{ms:6.1f} ms" if ms is not None else "     - ms"
+            print(f"   {size:>4}: {ms_text} | {100 * s['share'][size]:5.1f}% dos frames")
@@ -1,19 +1,27 @@
 import time
 
 class RoiTimer:
-    def __init__(self):
+    def __init__(self, hold_seconds=3):
+        self.hold_seconds = hold_seconds
         self.current = None
         self.start_time = None
         self.confirmed = None
 
-    def update(self, label):
+    def update(self, label, detections=None, now=None):
+        # detections é ignorado: mesma interface do EvidenceDecision
+        now = time.monotonic() if now is None else now
+
         if label != self.current:
             self.current = label
-            self.start_time = time.time()
+            self.start_time = now
             self.confirmed = None
 
-        elif time.time() - self.start_time >= 3 and self.confirmed is None:
+        elif now - self.start_time >= self.hold_seconds and self.confirmed is None:
             self.confirmed = self.current
             return self.confirmed
 
         return None
+
+    def tick(self, now=None):
+        # frame sem inferência nova (porteiro de movimento): só o relógio anda
+        return self.update(self.current, now=now)
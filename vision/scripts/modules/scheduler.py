@@ -0,0 +1,150 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+
+# evento agendado: comando a enviar no instante t_fire (time.monotonic)
+Actuation = namedtuple("Actuation", "t_fire label actuator command t_ref")
+
+# resultado passado ao on_event quando o evento foi descartado por atraso
+LATE = "late"
+
+
+class ActuationScheduler:
+    """
+    Agenda o comando de cada item para o momento em que ele chega ao atuador.
+
+    Com a esteira andando direto, o item confirmado ainda não está na frente
+    do desviador: o instante de disparo é a saída da ROI mais distância/
+    velocidade da esteira, menos `lead_time` (latência da serial e do
+    firmware). Os eventos ficam numa heap ordenada pelo instante de disparo
+    e uma thread dorme até o próximo vencer. Eventos que já passaram de
+    `late_tolerance` são descartados (o item já passou pelo atuador).
+
+    `on_event(event, result)` (opcional) é chamado depois de cada disparo
+    com o retorno do send_fn (None se a serial não enviou), ou com LATE
+    quando o evento foi descartado por atraso.
+    """
+
+    def __init__(self, send_fn, belt_speed, routes, command="{actuator}A", lead_time=0.0, late_tolerance=0.25,
+                 on_event=None):
+        self.send_fn = send_fn
+        self.on_event = on_event
+        self.belt_speed = belt_speed
+        self.routes = {label.upper(): route for label, route in routes.items()}
+        self.command = command
+        self.lead_time = lead_time
+        self.late_tolerance = late_tolerance
+
+        self.events = []
+        self.counter = itertools.count()  # desempate estável na heap
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = None
+
+        self.scheduled = 0
+        self.sent = 0
+        self.late = 0
+        self.unknown = 0
+        self.errors = deque(maxlen=200)  # atraso real - previsto (s)
+
+    def travel_time(self, label):
+        """Segundos da saída da ROI até o atuador da classe."""
+        return self.routes[label.upper()]["distance"] / self.belt_speed
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def schedule(self, label, t_ref=None):
+        """Agenda o desvio do item; t_ref é a saída da ROI (padrão: agora)."""
+        upper = label.upper()
+        if upper not in self.routes:
+            self.unknown += 1
+            print(f"⚠ Classe sem atuador configurado: {label}")
+            return None
+
+        t_ref = time.monotonic() if t_ref is None else t_ref
+        actuator = self.routes[upper]["actuator"]
+        event = Actuation(
+            t_fire=t_ref + self.travel_time(upper) - self.lead_time,
+            label=upper,
+            actuator=actuator,
+            command=self.command.format(actuator=actuator, label=upper),
+            t_ref=t_ref,
+        )
+        with self.cond:
+            heapq.heappush(self.events, (event.t_fire, next(self.counter), event))
+            self.scheduled += 1
+            self.cond.notify()
+        return event
+
+    def pending(self):
+        with self.cond:
+            return [item[2] for item in sorted(self.events)]
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                while self.running and (not self.events or self.events[0][0] > time.monotonic()):
+                    timeout = self.events[0][0] - time.monotonic() if self.events else None
+                    self.cond.wait(timeout)
+                if not self.running:
+                    return
+                _, _, event = heapq.heappop(self.events)
+
+            error = time.monotonic() - event.t_fire
+            if error > self.late_tolerance:
+                self.late += 1
+                print(f"⚠ {event.label}: disparo {1000 * error:.0f} ms atrasado — item já passou por {event.actuator}")
+                if self.on_event is not None:
+                    self.on_event(event, LATE)
+                continue
+
+            self.errors.append(error)
+            self.sent += 1
+            result = self.send_fn(event.command)
+            if self.on_event is not None:
+                self.on_event(event, result)
+
+    def stats(self):
+        errors = list(self.errors)
+        return {
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "late": self.late,
+            "unknown": self.unknown,
+            "pending": len(self.events),
+            "error_ms": 1000 * sum(errors) / len(errors) if errors else 0.0,
+            "max_error_ms": 1000 * max(errors) if errors else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"⏱ Agendador: {s['scheduled']} agendados | {s['sent']} disparados | {s['late']} atrasados | "
+              f"{s['pending']} pendentes | {s['unknown']} sem atuador")
+        print(f"   atraso do disparo: médio {s['error_ms']:.1f} ms | máx {s['max_error_ms']:.1f} ms")
+
+
+def make_scheduler(cfg, send_fn, on_event=None):
+    """Cria o agendador a partir de realtime.scheduler; None se desabilitado."""
+    sched_cfg = cfg["realtime"].get("scheduler", {}) or {}
+    if not sched_cfg.get("enabled", False):
+        return None
+    return ActuationScheduler(
+        send_fn,
+        belt_speed=sched_cfg["belt_speed"],
+        routes=sched_cfg["routes"],
+        command=sched_cfg.get("command", "{actuator}A"),
+        lead_time=sched_cfg.get("lead_time", 0.0),
+        late_tolerance=sched_cfg.get("late_tolerance", 0.25),
+        on_event=on_event,
+    )
@@ -1,48 +1,297 @@
 import serial
 import threading
+import queue
 import time
+from collections import deque
+from contextlib import nullcontext
+
+from .protocol import BinaryProtocol, HANDSHAKE, make_protocol
+
+
+class Command:
+    """Um comando enviado ao Arduino e os tempos de cada etapa (time.monotonic)."""
+
+    def __init__(self, message, seq=0):
+        self.message = message
+        self.seq = seq
+        self.status = "queued"     # queued | sent | acked | done | timeout | failed | dropped
+        self.attempts = 0
+        self.t_queued = time.monotonic()
+        self.t_sent = None
+        self.t_ack = None
+        self.t_done = None
+        self.finished = threading.Event()
+
+    def finish(self, status):
+        self.status = status
+        self.t_done = time.monotonic()
+        self.finished.set()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
 
 class SerialHandler:
-    def __init__(self, port, baudrate):
+    """
+    Comunicação com o Arduino master sem travar o loop de visão.
+
+    send() só coloca o comando numa fila limitada. Uma thread escritora envia
+    um comando por vez, espera o ack com reenvio em caso de timeout e depois
+    a resposta de término. Uma thread leitora bloqueia na porta e passa os
+    bytes para o protocolo (modules/protocol.py): no texto o ack é o eco
+    "Recebi comando -> X" e o término é "[ESTEIRA] Motor parado." (classes)
+    ou "Status recebido:"; no binário tudo é casado pelo número de
+    sequência. Com protocol="auto" o binário é negociado e, se o firmware
+    não responder, fica o texto. Os tempos de ida e volta ficam em stats().
+    """
+
+    def __init__(self, port, baudrate, queue_size=8, ack_timeout=3.0, done_timeout=15.0,
+                 retries=2, boot_delay=2.0, protocol="text", log_fn=None,
+                 metrics=None):
         self.port = port
         self.baudrate = baudrate
+        self.protocol_name = protocol
+        self.protocol = make_protocol(protocol)
+        self.probe = None
+        self.seq = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.log_fn = log_fn  # ex.: SessionRecorder.log, recebe cada mensagem da serial
+        self.metrics = metrics  # StationMetrics opcional (sem torch aqui: o simulador usa este módulo)
         self.serial_obj = None
         self.running = True
         self.thread = None
+        self.writer_thread = None
+
+        self.ack_timeout = ack_timeout
+        self.done_timeout = done_timeout
+        self.retries = retries
+        self.boot_delay = boot_delay
+
+        self.outgoing = queue.Queue(maxsize=queue_size)
+        self.in_flight = None
+        self.lock = threading.Lock()
+        self.ack_event = threading.Event()
+        self.ready = threading.Event()
+
+        self.history = deque(maxlen=200)
+        self.dropped = 0
+
+    # ------------------------------------------------------------
+    #  CONEXÃO
+    # ------------------------------------------------------------
 
     def start(self):
         try:
             print(f"Tentando abrir porta {self.port} com baudrate {self.baudrate}...")
-            self.serial_obj = serial.Serial(self.port, self.baudrate, timeout=1)
-            time.sleep(2)
+            self.serial_obj = serial.Serial(self.port, self.baudrate, timeout=1, write_timeout=1)
             print("🔌 Arduino conectado!")
         except Exception as e:
             print("⚠ ERRO AO CONECTAR NO ARDUINO:", e)
             self.serial_obj = None
+            return
 
         self.thread = threading.Thread(target=self._monitor, daemon=True)
         self.thread.start()
+        self.writer_thread = threading.Thread(target=self._writer, daemon=True)
+        self.writer_thread.start()
+
+    def stop(self):
+        self.running = False
+        self.ready.set()
+        try:
+            self.outgoing.put_nowait(None)  # acorda a escritora
+        except queue.Full:
+            pass
+        if self.writer_thread:
+            self.writer_thread.join(timeout=2)
+        if self.serial_obj:
+            self.serial_obj.close()
+
+    # ------------------------------------------------------------
+    #  LEITURA
+    # ------------------------------------------------------------
 
     def _monitor(self):
         while self.running:
-            if self.serial_obj and self.serial_obj.in_waiting:
-                try:
-                    msg = self.serial_obj.readline().decode(errors="ignore").strip()
-                    if msg:
-                        print("\n─────────────────────────────────────────")
-                        print(f"[ARDUINO] {msg}")
-                        print("─────────────────────────────────────────\n")
-                except:
-                    pass
-            time.sleep(0.05)
+            try:
+                # bloqueia até chegar ao menos 1 byte (ou o timeout da porta)
+                data = self.serial_obj.read(max(1, self.serial_obj.in_waiting))
+            except Exception:
+                if self.running:
+                    time.sleep(0.1)
+                continue
+            if not data:
+                continue
+            self.bytes_received += len(data)
+
+            # negociação do protocolo binário em andamento
+            probe = self.probe
+            if probe is not None:
+                for event in probe.feed(data):
+                    if event.kind == "hello":
+                        self.probe = None
+                        self.protocol = probe
+                        self.ack_event.set()
+
+            for event in self.protocol.feed(data):
+                if self.log_fn is not None:
+                    self.log_fn("serial_rx", kind=event.kind, seq=event.seq,
+                                data=event.data if event.kind == "line" else None)
+                if event.kind == "line":
+                    print("\n─────────────────────────────────────────")
+                    print(f"[ARDUINO] {event.data}")
+                    print("─────────────────────────────────────────\n")
+                else:
+                    self._handle_event(event)
+
+    def _matches(self, cmd, event):
+        if event.seq is not None:
+            return event.seq == cmd.seq
+        if event.kind == "ack":
+            return event.data.upper() == cmd.message.upper()
+        if event.kind == "done":
+            return event.data == self.protocol.done_marker(cmd.message)
+        return True
+
+    def _handle_event(self, event):
+        with self.lock:
+            cmd = self.in_flight
+            if cmd is None or not self._matches(cmd, event):
+                return
+
+            if event.kind == "ack" and cmd.t_ack is None:
+                cmd.t_ack = time.monotonic()
+                cmd.status = "acked"
+                self.ack_event.set()
+
+            elif event.kind == "failed" and cmd.t_ack is not None:
+                cmd.finish("failed")
+
+            elif event.kind == "done" and cmd.t_ack is not None:
+                cmd.finish("done")
+
+    # ------------------------------------------------------------
+    #  ESCRITA
+    # ------------------------------------------------------------
+
+    def _writer(self):
+        # o Arduino reinicia ao abrir a porta: espera aqui, não em start()
+        time.sleep(self.boot_delay)
+        if self.protocol_name == "auto":
+            self._negotiate()
+        self.ready.set()
+
+        while self.running:
+            cmd = self.outgoing.get()
+            if cmd is None:
+                break
+            self._transmit(cmd)
+            self.history.append(cmd)
+
+    def _negotiate(self):
+        """Pede o protocolo binário; sem resposta HELLO o texto continua valendo."""
+        self.probe = BinaryProtocol()
+        self.ack_event.clear()
+        try:
+            self.serial_obj.write(HANDSHAKE)
+            self.bytes_sent += len(HANDSHAKE)
+        except Exception as e:
+            print(f"⚠ Falha ao escrever na serial: {e}")
+        if self.ack_event.wait(self.ack_timeout):
+            print("🔢 Protocolo binário ativado.")
+        else:
+            self.probe = None
+            print("🔤 Firmware sem protocolo binário: usando texto.")
+
+    def _transmit(self, cmd):
+        with self.lock:
+            self.in_flight = cmd
+            self.ack_event.clear()
+
+        for attempt in range(1 + self.retries):
+            cmd.attempts = attempt + 1
+            try:
+                data = self.protocol.encode(cmd.message, cmd.seq)
+                with self.metrics.stage("serial_write") if self.metrics is not None else nullcontext():
+                    self.serial_obj.write(data)
+                self.bytes_sent += len(data)
+            except Exception as e:
+                print(f"⚠ Falha ao escrever na serial: {e}")
+                break
+            if cmd.t_sent is None:
+                cmd.t_sent = time.monotonic()
+                cmd.status = "sent"
+            print(f"[PYTHON] → Enviado para Arduino: {cmd.message}")
+            if self.log_fn is not None:
+                self.log_fn("serial_tx", message=cmd.message, seq=cmd.seq, attempt=cmd.attempts)
+
+            if self.ack_event.wait(self.ack_timeout):
+                break
+            print(f"⚠ Sem confirmação de '{cmd.message}' (tentativa {cmd.attempts})")
+
+        if cmd.t_ack is not None:
+            cmd.wait(self.done_timeout)
+
+        with self.lock:
+            if not cmd.finished.is_set():
+                cmd.finish("timeout")
+            self.in_flight = None
 
     def send(self, message):
-        if self.serial_obj:
-            msg = (message + "\n").encode()
-            self.serial_obj.write(msg)
-            print(f"[PYTHON] → Enviado para Arduino: {message}")
+        """Enfileira o comando e retorna na hora; o Command permite esperar o término."""
+        if not self.serial_obj:
+            return None
 
-    def stop(self):
-        self.running = False
-        if self.serial_obj:
-            self.serial_obj.close()
+        cmd = Command(message, self.seq)
+        self.seq = (self.seq + 1) & 0xFF
+        try:
+            self.outgoing.put_nowait(cmd)
+        except queue.Full:
+            cmd.finish("dropped")
+            self.dropped += 1
+            print(f"⚠ Fila serial cheia: comando '{message}' descartado")
+        return cmd
+
+    # ------------------------------------------------------------
+    #  MÉTRICAS
+    # ------------------------------------------------------------
+
+    def stats(self):
+        history = list(self.history)
+        acked = [c.t_ack - c.t_sent for c in history if c.t_ack and c.t_sent]
+        done = [c.t_done - c.t_sent for c in history if c.status == "done" and c.t_sent]
+        return {
+            "sent": len(history),
+            "done": sum(c.status == "done" for c in history),
+            "timeout": sum(c.status == "timeout" for c in history),
+            "failed": sum(c.status == "failed" for c in history),
+            "dropped": self.dropped,
+            "retries": sum(c.attempts - 1 for c in history if c.attempts),
+            "ack_ms": 1000 * sum(acked) / len(acked) if acked else 0.0,
+            "done_ms": 1000 * sum(done) / len(done) if done else 0.0,
+            "queued": self.outgoing.qsize(),
+            "protocol": self.protocol.name,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🔌 Serial: {s['sent']} enviados | {s['done']} concluídos | {s['timeout']} timeouts | "
+              f"{s['failed']} inválidos | {s['dropped']} descartados | {s['retries']} reenvios")
+        print(f"   ida e volta média: ack {s['ack_ms']:.0f} ms | término {s['done_ms']:.0f} ms")
+        print(f"   protocolo {s['protocol']}: {s['bytes_sent']} bytes enviados | {s['bytes_received']} recebidos")
+
+
+def make_serial_handler(arduino_cfg, port=None, **kwargs):
+    """Cria o SerialHandler com as opções da seção arduino do config.yaml."""
+    options = dict(
+        queue_size=arduino_cfg.get("queue_size", 8),
+        ack_timeout=arduino_cfg.get("ack_timeout", 3.0),
+        done_timeout=arduino_cfg.get("done_timeout", 15.0),
+        retries=arduino_cfg.get("retries", 2),
+        protocol=arduino_cfg.get("protocol", "text"),
+    )
+    options.update(kwargs)
+    return SerialHandler(port or arduino_cfg["port"], arduino_cfg["baudrate"], **options)
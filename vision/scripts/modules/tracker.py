@@ -0,0 +1,146 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# item classificado: um por track, emitido quando ele sai da ROI
+TrackedItem = namedtuple("TrackedItem", "track_id label confidence t_enter t_exit")
+
+
+def iou_matrix(a, b):
+    """IoU entre todas as caixas de a (N, 4) e b (M, 4) no formato xyxy."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class Track:
+    def __init__(self, track_id, box, now):
+        self.id = track_id
+        self.box = box
+        self.scores = {}
+        self.hits = 0
+        self.missed = 0
+        self.last_seen = now
+        self.t_enter = None
+        self.t_exit = None
+
+    @property
+    def center(self):
+        return (self.box[:2] + self.box[2:]) / 2
+
+    def add(self, box, label, conf, now):
+        self.box = box
+        self.scores[label] = self.scores.get(label, 0.0) + conf
+        self.hits += 1
+        self.missed = 0
+        self.last_seen = now
+
+    def classify(self):
+        label = max(self.scores, key=self.scores.get)
+        return label, self.scores[label] / self.hits
+
+
+class RoiTracker:
+    """
+    Rastreador IoU/centróide (sem modelo extra) que mantém um ID estável
+    para cada caixa entre frames, marca a entrada e a saída de cada item na
+    ROI e devolve uma única classificação por ID quando ele sai da ROI (ou
+    some enquanto estava dentro dela). A classe é a de maior confiança
+    acumulada ao longo do track, então várias peças podem estar na esteira
+    ao mesmo tempo.
+    """
+
+    def __init__(self, roi, iou_thres=0.3, max_distance=80, max_missed=5, min_hits=3):
+        self.roi = roi
+        self.iou_thres = iou_thres
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+
+        self.tracks = []
+        self.next_id = 1
+
+    def _inside(self, track):
+        x, y = track.center
+        x1, y1, x2, y2 = self.roi
+        return x1 <= x <= x2 and y1 <= y <= y2
+
+    def _match(self, boxes):
+        """Associação gulosa: pares por IoU primeiro, depois por distância dos centros."""
+        if not self.tracks or not len(boxes):
+            return []
+
+        tboxes = np.stack([t.box for t in self.tracks])
+        iou = iou_matrix(tboxes, boxes)
+        tcent = (tboxes[:, :2] + tboxes[:, 2:]) / 2
+        dcent = (boxes[:, :2] + boxes[:, 2:]) / 2
+        dist = np.linalg.norm(tcent[:, None] - dcent[None], axis=2)
+
+        # IoU >= limite vale mais que qualquer par por distância
+        score = np.where(iou >= self.iou_thres, 1 + iou,
+                         np.where(dist <= self.max_distance, 1 - dist / self.max_distance, 0))
+
+        pairs, used_t, used_d = [], set(), set()
+        n_det = score.shape[1]
+        for k in np.argsort(-score, axis=None):
+            r, c = divmod(int(k), n_det)
+            if score[r, c] <= 0:
+                break
+            if r in used_t or c in used_d:
+                continue
+            used_t.add(r)
+            used_d.add(c)
+            pairs.append((r, c))
+        return pairs
+
+    def _finish(self, track):
+        if track.t_enter is None or track.hits < self.min_hits:
+            return None
+        label, conf = track.classify()
+        return TrackedItem(track.id, label, conf, track.t_enter, track.t_exit)
+
+    def update(self, detections, now=None):
+        """Atualiza com as detecções do frame; retorna a lista de TrackedItem que saíram da ROI."""
+        now = time.monotonic() if now is None else now
+        boxes = np.array([d[:4] for d in detections], dtype=np.float32).reshape(-1, 4)
+
+        matched_d = set()
+        for r, c in self._match(boxes):
+            _, _, _, _, label, conf = detections[c]
+            self.tracks[r].add(boxes[c], label, float(conf), now)
+            matched_d.add(c)
+
+        for c, (*_, label, conf) in enumerate(detections):
+            if c not in matched_d:
+                track = Track(self.next_id, boxes[c], now)
+                track.add(boxes[c], label, float(conf), now)
+                self.tracks.append(track)
+                self.next_id += 1
+
+        finished, alive = [], []
+        for track in self.tracks:
+            if track.last_seen != now:
+                track.missed += 1
+
+            inside = self._inside(track)
+            if inside and track.t_enter is None:
+                track.t_enter = track.last_seen
+
+            # saiu da ROI depois de ter entrado, ou sumiu lá dentro
+            lost = track.missed > self.max_missed
+            if track.t_enter is not None and track.t_exit is None and (not inside or lost):
+                track.t_exit = track.last_seen
+                item = self._finish(track)
+                if item is not None:
+                    finished.append(item)
+
+            # tracks já classificados continuam vivos (mesmo ID) até sumirem
+            if not lost:
+                alive.append(track)
+
+        self.tracks = alive
+        return finished
@@ -1,7 +1,26 @@
+import time
+
 import cv2
 
-def open_camera(source):
+from .recorder import RecordedSource, is_recording
+
+
+def frame_time(cap):
+    """Instante (time.monotonic) do último frame lido; num replay, o instante gravado."""
+    t = getattr(cap, "t_frame", None)
+    return time.monotonic() if t is None else t
+
+
+def open_camera(source, buffer_size=None, replay_speed=0.0):
+    # pasta gravada pelo SessionRecorder: reproduz no lugar da câmera
+    if is_recording(source):
+        return RecordedSource(source, speed=replay_speed)
+
     cap = cv2.VideoCapture(source)
     if not cap.isOpened():
         raise RuntimeError("❌ Não foi possível abrir a câmera.")
+
+    # buffer interno pequeno = frames menos atrasados (nem todo backend suporta)
+    if buffer_size is not None:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
     return cap
@@ -0,0 +1,233 @@
+# =============================================================
+#  QUANTIZAÇÃO INT8 (PÓS-TREINO) DO DETECTOR RECYCLEAI
+#  ONNX FP32 → ONNX INT8 (estática, calibrada no dataset_manual/valid)
+#  Compara mAP (val.py) e ms/frame entre os dois modelos
+# =============================================================
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+import cv2
+import yaml
+
+# =============================================================
+#  1) CAMINHOS E CONFIG
+# =============================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(BASE_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+YOLOV5_DIR = os.path.join(BASE_DIR, cfg["paths"]["yolov5"])
+DATA_YAML = os.path.join(BASE_DIR, cfg["paths"]["data_yaml"])
+CALIB_DIR = os.path.join(BASE_DIR, cfg["paths"]["dataset"], "valid", "images")
+
+# ONNX exportado pelo export_torchscript.py (paths.weights_onnx)
+FP32_ONNX = os.path.join(BASE_DIR, cfg["paths"]["weights_onnx"])
+INT8_ONNX = os.path.splitext(FP32_ONNX)[0] + "_int8.onnx"
+# FP32 depois do quant_pre_process (entrada da calibração)
+PREP_ONNX = os.path.splitext(FP32_ONNX)[0] + "_prep.onnx"
+
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, YOLOV5_DIR)
+
+from modules.model_loader import load_model
+from modules.preprocess import Preprocessor
+
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+# pesos por canal no formato QDQ: DequantizeLinear com "axis" só existe a partir do opset 13
+MIN_OPSET_PER_CHANNEL = 13
+
+
+# =============================================================
+#  2) LEITOR DE CALIBRAÇÃO
+# =============================================================
+
+class ValidImagesReader(CalibrationDataReader):
+    """Entrega as imagens de valid/ já no formato de entrada do modelo."""
+
+    def __init__(self, image_files, input_name, shape, stride):
+        self.files = iter(image_files)
+        self.input_name = input_name
+        self.preprocessor = Preprocessor(tuple(shape[2:]), "cpu", stride=stride, auto=False)
+
+    def get_next(self):
+        path = next(self.files, None)
+        if path is None:
+            return None
+        im = self.preprocessor(cv2.imread(path))
+        return {self.input_name: im.numpy().copy()}
+
+
+def detect_head_nodes(onnx_path):
+    """Nós do Detect (última camada 'model.N'): ficam em FP32 para não degradar as caixas."""
+    import onnx
+
+    nodes = onnx.load(onnx_path).graph.node
+    layers = [int(n.name.split("/model.")[1].split("/")[0]) for n in nodes if n.name.startswith("/model.")]
+    if not layers:
+        return []
+    prefix = f"/model.{max(layers)}/"
+    return [n.name for n in nodes if n.name.startswith(prefix)]
+
+
+def onnx_opset(onnx_path):
+    import onnx
+
+    return max(o.version for o in onnx.load(onnx_path).opset_import if o.domain in ("", "ai.onnx"))
+
+
+def copy_metadata(src, dst):
+    """quantize_static não preserva metadata_props: copia shape/stride/names do FP32."""
+    import onnx
+
+    model_src, model_dst = onnx.load(src), onnx.load(dst)
+    del model_dst.metadata_props[:]
+    model_dst.metadata_props.extend(model_src.metadata_props)
+    onnx.save(model_dst, dst)
+
+
+# =============================================================
+#  3) MEDIÇÕES
+# =============================================================
+
+def time_per_frame(model, image_files, shape, stride, runs):
+    preprocessor = Preprocessor(tuple(shape[2:]), "cpu", stride=stride, auto=False)
+    inputs = [preprocessor(cv2.imread(p)).clone() for p in image_files[:runs]]
+
+    for im in inputs[:5]:  # aquecimento
+        model(im)
+
+    t0 = time.perf_counter()
+    for im in inputs:
+        model(im)
+    return 1000 * (time.perf_counter() - t0) / len(inputs)
+
+
+def evaluate_map(weights, imgsz):
+    """Roda o val.py do YOLOv5 e devolve (mAP50, mAP50-95)."""
+    import val
+
+    cwd = os.getcwd()
+    os.chdir(YOLOV5_DIR)  # data.yaml usa caminhos relativos à pasta YOLOv5
+    try:
+        (mp, mr, map50, map_, *_), _, _ = val.run(
+            data=DATA_YAML,
+            weights=weights,
+            batch_size=1,
+            imgsz=imgsz,
+            device="cpu",
+            workers=0,
+            half=False,
+            plots=False,
+            project=os.path.join(BASE_DIR, cfg["paths"]["models"], "val_int8"),
+            exist_ok=True,
+        )
+    finally:
+        os.chdir(cwd)
+    return map50, map_
+
+
+# =============================================================
+#  4) EXECUÇÃO
+# =============================================================
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calib-images", type=int, default=cfg["export"].get("int8_calib_images", 100))
+    parser.add_argument("--method", default="MinMax", choices=["MinMax", "Entropy", "Percentile"])
+    parser.add_argument("--runs", type=int, default=50, help="imagens usadas na medição de ms/frame")
+    parser.add_argument("--threads", type=int, default=cfg["realtime"].get("threads"))
+    parser.add_argument("--skip-map", action="store_true", help="não rodar o val.py")
+    opt = parser.parse_args()
+
+    if not os.path.isfile(FP32_ONNX):
+        raise FileNotFoundError(
+            f"❌ ONNX FP32 não encontrado em:\n{FP32_ONNX}\n"
+            f"   Rode o export_torchscript.py com export.onnx: true"
+        )
+
+    fp32 = load_model(FP32_ONNX, "cpu", backend="onnxruntime", threads=opt.threads)
+    if "shape" not in fp32.meta:
+        raise RuntimeError("❌ ONNX sem metadados de shape: exporte novamente com o export_torchscript.py")
+    shape, stride = fp32.meta["shape"], fp32.meta["stride"]
+    if shape[0] != 1:
+        raise RuntimeError(f"❌ ONNX exportado com lote {shape[0]}: exporte novamente com o export_torchscript.py (lote 1)")
+
+    image_files = sorted(glob.glob(os.path.join(CALIB_DIR, "*.jpg")))
+    if not image_files:
+        raise FileNotFoundError(f"❌ Nenhuma imagem de calibração em:\n{CALIB_DIR}")
+
+    opset = onnx_opset(FP32_ONNX)
+    if opset < MIN_OPSET_PER_CHANNEL:
+        raise RuntimeError(f"❌ ONNX exportado com opset {opset}: a quantização por canal precisa de opset >= "
+                           f"{MIN_OPSET_PER_CHANNEL}. Use export.opset: {MIN_OPSET_PER_CHANNEL} e exporte novamente")
+
+    # ---------------------------------------
+    # PRÉ-PROCESSAMENTO (inferência de shapes + dobra de constantes)
+    # sem ele a calibração quebra na Constant vazia (0,) do Detect
+    # ---------------------------------------
+    print("🔧 Pré-processando o ONNX FP32 para quantização...")
+    quant_pre_process(FP32_ONNX, PREP_ONNX)
+
+    # ---------------------------------------
+    # QUANTIZAÇÃO ESTÁTICA (QDQ, pesos por canal)
+    # ---------------------------------------
+    print(f"🧮 Calibrando com {min(opt.calib_images, len(image_files))} imagens ({opt.method})...")
+    reader = ValidImagesReader(image_files[:opt.calib_images], fp32.input_name, shape, stride)
+
+    quantize_static(
+        PREP_ONNX,
+        INT8_ONNX,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=getattr(CalibrationMethod, opt.method),
+        nodes_to_exclude=detect_head_nodes(PREP_ONNX),
+    )
+    copy_metadata(FP32_ONNX, INT8_ONNX)
+    print(f"✅ Modelo INT8 salvo em:\n{INT8_ONNX}")
+
+    # ---------------------------------------
+    # LATÊNCIA
+    # ---------------------------------------
+    int8 = load_model(INT8_ONNX, "cpu", backend="onnxruntime", threads=opt.threads)
+    ms_fp32 = time_per_frame(fp32, image_files, shape, stride, opt.runs)
+    ms_int8 = time_per_frame(int8, image_files, shape, stride, opt.runs)
+
+    print("\n📊 Resultado:")
+    print(f"   {'modelo':<8}{'ms/frame':>10}{'mAP50':>10}{'mAP50-95':>10}")
+
+    if opt.skip_map or shape[2] != shape[3]:
+        if not opt.skip_map:
+            print("   ⚠ val.py só avalia entradas quadradas: mAP não calculado.")
+        print(f"   {'FP32':<8}{ms_fp32:>10.1f}")
+        print(f"   {'INT8':<8}{ms_int8:>10.1f}")
+        print(f"   Δ ms/frame: {ms_int8 - ms_fp32:+.1f}")
+        return
+
+    map50_fp32, map_fp32 = evaluate_map(FP32_ONNX, shape[2])
+    map50_int8, map_int8 = evaluate_map(INT8_ONNX, shape[2])
+
+    print(f"   {'FP32':<8}{ms_fp32:>10.1f}{map50_fp32:>10.3f}{map_fp32:>10.3f}")
+    print(f"   {'INT8':<8}{ms_int8:>10.1f}{map50_int8:>10.3f}{map_int8:>10.3f}")
+    print(f"   Δ ms/frame: {ms_int8 - ms_fp32:+.1f}   Δ mAP50-95: {map_int8 - map_fp32:+.3f}")
+    print("\nPara usar na estação: realtime.backend: onnxruntime e paths.weights_onnx apontando para o INT8.")
+
+
+if __name__ == "__main__":
+    main()
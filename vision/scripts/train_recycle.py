@@ -97,11 +97,14 @@ CMD = [
     "--workers", "8",
     "--device", device,
     "--exist-ok",
-    "--cache",
+    "--cache", cfg["training"].get("cache", "mmap"),
     "--cos-lr",
     "--label-smoothing", "0.1"
 ]
 
+if cfg["training"].get("fast_augment", False):
+    CMD.append("--fast-augment")  # mosaico só na área usada pelo warp, pula augmentations sem efeito
+
 print("\n🚀 Comando executado:")
 print(" ".join(CMD), "\n")
 
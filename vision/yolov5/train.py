@@ -301,6 +301,7 @@ def train(hyp, opt, device, callbacks):
         prefix=colorstr("train: "),
         shuffle=True,
         seed=opt.seed,
+        fast_augment=opt.fast_augment,
     )
     labels = np.concatenate(dataset.labels, 0)
     mlc = int(labels[:, 0].max())  # max label class
@@ -584,8 +585,9 @@ def parse_opt(known=False):
     )
     parser.add_argument("--resume_evolve", type=str, default=None, help="resume evolve from last generation")
     parser.add_argument("--bucket", type=str, default="", help="gsutil bucket")
-    parser.add_argument("--cache", type=str, nargs="?", const="ram", help="image --cache ram/disk")
+    parser.add_argument("--cache", type=str, nargs="?", const="ram", help="image --cache ram/disk/mmap")
     parser.add_argument("--image-weights", action="store_true", help="use weighted image selection for training")
+    parser.add_argument("--fast-augment", action="store_true", help="cropped-canvas mosaic warp, skip no-op augmentations")
     parser.add_argument("--device", default="", help="cuda device, i.e. 0 or 0,1,2,3 or cpu")
     parser.add_argument("--multi-scale", action="store_true", help="vary img-size +/- 50%%")
     parser.add_argument("--single-cls", action="store_true", help="train multi-class data as single-class")
@@ -941,7 +943,7 @@ def run(**kwargs):
             hyps'.
         resume_evolve (str, optional): Resume hyperparameter evolution from the last generation. Defaults to None.
         bucket (str, optional): gsutil bucket for saving checkpoints. Defaults to an empty string.
-        cache (str, optional): Cache image data in 'ram' or 'disk'. Defaults to None.
+        cache (str, optional): Cache image data in 'ram', 'disk' or 'mmap'. Defaults to None.
         image_weights (bool, optional): Use weighted image selection for training. Defaults to False.
         device (str, optional): CUDA device identifier, e.g., '0', '0,1,2,3', or 'cpu'. Defaults to an empty string.
         multi_scale (bool, optional): Use multi-scale training, varying image size by ±50%. Defaults to False.
@@ -1,6 +1,7 @@
 # Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
 """Image augmentation functions."""
 
+import copy
 import math
 import random
 
@@ -20,9 +21,15 @@ IMAGENET_STD = 0.229, 0.224, 0.225  # RGB standard deviation
 class Albumentations:
     """Provides optional data augmentation for YOLOv5 using Albumentations library if installed."""
 
-    def __init__(self, size=640):
-        """Initializes Albumentations class for optional data augmentation in YOLOv5 with specified input size."""
+    def __init__(self, size=640, fast=False):
+        """Initializes Albumentations class for optional data augmentation in YOLOv5 with specified input size.
+
+        With `fast=True` zero-probability transforms are dropped and __call__ draws which transforms fire before
+        calling albumentations, skipping the bbox conversion entirely when none does (same per-transform probabilities).
+        """
         self.transform = None
+        self.fast = None  # transforms with p > 0 (fast mode)
+        self.subsets = {}  # fired transform indices -> Compose of those transforms with p=1
         prefix = colorstr("albumentations: ")
         try:
             import albumentations as A
@@ -40,6 +47,8 @@ class Albumentations:
                 A.ImageCompression(quality_lower=75, p=0.0),
             ]  # transforms
             self.transform = A.Compose(T, bbox_params=A.BboxParams(format="yolo", label_fields=["class_labels"]))
+            if fast:
+                self.fast = [x for x in T if x.p]
 
             LOGGER.info(prefix + ", ".join(f"{x}".replace("always_apply=False, ", "") for x in T if x.p))
         except ImportError:  # package not installed, skip
@@ -50,10 +59,26 @@ class Albumentations:
     def __call__(self, im, labels, p=1.0):
         """Applies transformations to an image and labels with probability `p`, returning updated image and labels."""
         if self.transform and random.random() < p:
-            new = self.transform(image=im, bboxes=labels[:, 1:], class_labels=labels[:, 0])  # transformed
+            transform = self.transform
+            if self.fast is not None:
+                fired = tuple(i for i, x in enumerate(self.fast) if random.random() < x.p)
+                if not fired:  # nothing to apply, skip albumentations (bbox checks/conversion) altogether
+                    return im, labels
+                transform = self.subsets.get(fired) or self._subset(fired)
+            new = transform(image=im, bboxes=labels[:, 1:], class_labels=labels[:, 0])  # transformed
             im, labels = new["image"], np.array([[c, *b] for c, b in zip(new["class_labels"], new["bboxes"])])
         return im, labels
 
+    def _subset(self, fired):
+        """Builds (and caches) a Compose applying the `fired` transforms unconditionally, in their original order."""
+        import albumentations as A
+
+        T = [copy.deepcopy(self.fast[i]) for i in fired]
+        for x in T:
+            x.p = 1.0
+        self.subsets[fired] = A.Compose(T, bbox_params=A.BboxParams(format="yolo", label_fields=["class_labels"]))
+        return self.subsets[fired]
+
 
 def normalize(x, mean=IMAGENET_MEAN, std=IMAGENET_STD, inplace=False):
     """Applies ImageNet normalization to RGB images in BCHW format, modifying them in-place if specified.
@@ -74,15 +99,16 @@ def augment_hsv(im, hgain=0.5, sgain=0.5, vgain=0.5):
     """Applies HSV color-space augmentation to an image with random gains for hue, saturation, and value."""
     if hgain or sgain or vgain:
         r = np.random.uniform(-1, 1, 3) * [hgain, sgain, vgain] + 1  # random gains
-        hue, sat, val = cv2.split(cv2.cvtColor(im, cv2.COLOR_BGR2HSV))
+        im_hsv = cv2.cvtColor(im, cv2.COLOR_BGR2HSV)
         dtype = im.dtype  # uint8
 
         x = np.arange(0, 256, dtype=r.dtype)
-        lut_hue = ((x * r[0]) % 180).astype(dtype)
-        lut_sat = np.clip(x * r[1], 0, 255).astype(dtype)
-        lut_val = np.clip(x * r[2], 0, 255).astype(dtype)
+        lut_hue = (x * r[0]) % 180
+        lut_sat = np.clip(x * r[1], 0, 255)
+        lut_val = np.clip(x * r[2], 0, 255)
 
-        im_hsv = cv2.merge((cv2.LUT(hue, lut_hue), cv2.LUT(sat, lut_sat), cv2.LUT(val, lut_val)))
+        lut = np.stack((lut_hue, lut_sat, lut_val), 1).astype(dtype).reshape(256, 1, 3)  # one 3-channel LUT
+        cv2.LUT(im_hsv, lut, dst=im_hsv)  # all channels in one pass, no split/merge
         cv2.cvtColor(im_hsv, cv2.COLOR_HSV2BGR, dst=im)  # no return needed
 
 
@@ -150,19 +176,20 @@ def letterbox(im, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleF
     return im, ratio, (dw, dh)
 
 
-def random_perspective(
-    im, targets=(), segments=(), degrees=10, translate=0.1, scale=0.1, shear=10, perspective=0.0, border=(0, 0)
+def random_perspective_matrix(
+    shape, degrees=10, translate=0.1, scale=0.1, shear=10, perspective=0.0, border=(0, 0)
 ):
-    # torchvision.transforms.RandomAffine(degrees=(-10, 10), translate=(0.1, 0.1), scale=(0.9, 1.1), shear=(-10, 10))
-    # targets = [cls, xyxy]
-    """Applies random perspective transformation to an image, modifying the image and corresponding labels."""
-    height = im.shape[0] + border[0] * 2  # shape(h,w,c)
-    width = im.shape[1] + border[1] * 2
+    """Draws the random_perspective() matrix for an image of `shape`, returning M, scale and output (height, width).
+
+    Random draws happen in the same order as random_perspective(), so both produce the same warp for the same seed.
+    """
+    height = shape[0] + border[0] * 2  # shape(h,w,c)
+    width = shape[1] + border[1] * 2
 
     # Center
     C = np.eye(3)
-    C[0, 2] = -im.shape[1] / 2  # x translation (pixels)
-    C[1, 2] = -im.shape[0] / 2  # y translation (pixels)
+    C[0, 2] = -shape[1] / 2  # x translation (pixels)
+    C[1, 2] = -shape[0] / 2  # y translation (pixels)
 
     # Perspective
     P = np.eye(3)
@@ -189,12 +216,11 @@ def random_perspective(
 
     # Combined rotation matrix
     M = T @ S @ R @ P @ C  # order of operations (right to left) is IMPORTANT
-    if (border[0] != 0) or (border[1] != 0) or (M != np.eye(3)).any():  # image changed
-        if perspective:
-            im = cv2.warpPerspective(im, M, dsize=(width, height), borderValue=(114, 114, 114))
-        else:  # affine
-            im = cv2.warpAffine(im, M[:2], dsize=(width, height), borderValue=(114, 114, 114))
+    return M, s, (height, width)
+
 
+def warp_targets(targets, segments, M, s, height, width, perspective=0.0):
+    """Applies perspective matrix `M` to pixel xyxy targets (or their segments), clipping and filtering candidates."""
     if n := len(targets):
         use_segments = any(x.any() for x in segments) and len(segments) == n
         new = np.zeros((n, 4))
@@ -229,7 +255,23 @@ def random_perspective(
         targets = targets[i]
         targets[:, 1:5] = new[i]
 
-    return im, targets
+    return targets
+
+
+def random_perspective(
+    im, targets=(), segments=(), degrees=10, translate=0.1, scale=0.1, shear=10, perspective=0.0, border=(0, 0)
+):
+    # torchvision.transforms.RandomAffine(degrees=(-10, 10), translate=(0.1, 0.1), scale=(0.9, 1.1), shear=(-10, 10))
+    # targets = [cls, xyxy]
+    """Applies random perspective transformation to an image, modifying the image and corresponding labels."""
+    M, s, (height, width) = random_perspective_matrix(im.shape, degrees, translate, scale, shear, perspective, border)
+    if (border[0] != 0) or (border[1] != 0) or (M != np.eye(3)).any():  # image changed
+        if perspective:
+            im = cv2.warpPerspective(im, M, dsize=(width, height), borderValue=(114, 114, 114))
+        else:  # affine
+            im = cv2.warpAffine(im, M[:2], dsize=(width, height), borderValue=(114, 114, 114))
+
+    return im, warp_targets(targets, segments, M, s, height, width, perspective)
 
 
 def copy_paste(im, labels, segments, p=0.5):
@@ -10,7 +10,6 @@ import os
 import random
 import shutil
 import time
-from itertools import repeat
 from multiprocessing.pool import Pool, ThreadPool
 from pathlib import Path
 from threading import Thread
@@ -35,12 +34,15 @@ from utils.augmentations import (
     letterbox,
     mixup,
     random_perspective,
+    random_perspective_matrix,
+    warp_targets,
 )
 from utils.general import (
     DATASETS_DIR,
     LOGGER,
     NUM_THREADS,
     TQDM_BAR_FORMAT,
+    Profile,
     check_dataset,
     check_requirements,
     check_yaml,
@@ -80,6 +82,15 @@ def get_hash(paths):
     return h.hexdigest()  # return hash
 
 
+def get_stamp(path):
+    """Returns (size, mtime_ns) of a file or None if it does not exist, to spot files changed since the last scan."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
 def exif_size(img):
     """Returns corrected PIL image size (width, height) considering EXIF orientation."""
     s = img.size  # (width, height)
@@ -174,6 +185,7 @@ def create_dataloader(
     prefix="",
     shuffle=False,
     seed=0,
+    fast_augment=False,
 ):
     """Creates and returns a configured DataLoader instance for loading and processing image datasets."""
     if rect and shuffle:
@@ -194,6 +206,7 @@ def create_dataloader(
             image_weights=image_weights,
             prefix=prefix,
             rank=rank,
+            fast_augment=fast_augment,
         )
 
     batch_size = min(batch_size, len(dataset))
@@ -551,6 +564,7 @@ class LoadImagesAndLabels(Dataset):
         prefix="",
         rank=-1,
         seed=0,
+        fast_augment=False,
     ):
         """Initializes the YOLOv5 dataset loader, handling images and their labels, caching, and preprocessing."""
         self.img_size = img_size
@@ -562,7 +576,9 @@ class LoadImagesAndLabels(Dataset):
         self.mosaic_border = [-img_size // 2, -img_size // 2]
         self.stride = stride
         self.path = path
-        self.albumentations = Albumentations(size=img_size) if augment else None
+        self.fast_augment = fast_augment  # cropped-canvas mosaic warp, albumentations skipped when nothing fires
+        self.albumentations = Albumentations(size=img_size, fast=fast_augment) if augment else None
+        self.timings = None  # {stage: Profile} when profiling augmentation stages, see timed()
 
         try:
             f = []  # image files
@@ -588,12 +604,14 @@ class LoadImagesAndLabels(Dataset):
         # Check cache
         self.label_files = img2label_paths(self.im_files)  # labels
         cache_path = (p if p.is_file() else Path(self.label_files[0]).parent).with_suffix(".cache")
+        cache = None
         try:
             cache, exists = np.load(cache_path, allow_pickle=True).item(), True  # load dict
             assert cache["version"] == self.cache_version  # matches current version
             assert cache["hash"] == get_hash(self.label_files + self.im_files)  # identical hash
         except Exception:
-            cache, exists = self.cache_labels(cache_path, prefix), False  # run cache ops
+            previous = cache if isinstance(cache, dict) and cache.get("version") == self.cache_version else None
+            cache, exists = self.cache_labels(cache_path, prefix, previous), False  # run cache ops, reuse unchanged
 
         # Display cache
         nf, nm, ne, nc, n = cache.pop("results")  # found, missing, empty, corrupt, total
@@ -605,7 +623,7 @@ class LoadImagesAndLabels(Dataset):
         assert nf > 0 or not augment, f"{prefix}No labels found in {cache_path}, can not start training. {HELP_URL}"
 
         # Read cache
-        [cache.pop(k) for k in ("hash", "version", "msgs")]  # remove items
+        [cache.pop(k, None) for k in ("hash", "version", "msgs", "files")]  # remove items
         labels, shapes, self.segments = zip(*cache.values())
         nl = len(np.concatenate(labels, 0))  # number of labels
         assert nl > 0 or not augment, f"{prefix}All labels empty in {cache_path}, can not start training. {HELP_URL}"
@@ -673,12 +691,15 @@ class LoadImagesAndLabels(Dataset):
 
             self.batch_shapes = np.ceil(np.array(shapes) * img_size / stride + pad).astype(int) * stride
 
-        # Cache images into RAM/disk for faster training
+        # Cache images into RAM/disk/mmap for faster training
         if cache_images == "ram" and not self.check_cache_ram(prefix=prefix):
             cache_images = False
         self.ims = [None] * n
         self.npy_files = [Path(f).with_suffix(".npy") for f in self.im_files]
-        if cache_images:
+        self.mmap_file, self.mmap_index, self._mmap = None, None, None
+        if cache_images == "mmap":
+            self.cache_images_to_mmap(cache_path.with_name(f"{cache_path.stem}_{img_size}.mmap"), prefix)
+        elif cache_images:
             b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
             self.im_hw0, self.im_hw = [None] * n, [None] * n
             fcn = self.cache_images_to_disk if cache_images == "disk" else self.load_image
@@ -713,30 +734,48 @@ class LoadImagesAndLabels(Dataset):
             )
         return cache
 
-    def cache_labels(self, path=Path("./labels.cache"), prefix=""):
-        """Caches dataset labels, verifies images, reads shapes, and tracks dataset integrity."""
+    def cache_labels(self, path=Path("./labels.cache"), prefix="", previous=None):
+        """Caches dataset labels, verifies images, reads shapes, and tracks dataset integrity.
+
+        Files whose image and label (size, mtime) match an entry of the `previous` cache are reused as is; only added
+        or changed files are verified again.
+        """
         x = {}  # dict
         nm, nf, ne, nc, msgs = 0, 0, 0, 0, []  # number missing, found, empty, corrupt, messages
         desc = f"{prefix}Scanning {path.parent / path.stem}..."
+        old = (previous or {}).get("files", {})
+        files, todo = {}, []  # {im_file: (stamp, verify_image_label result)}, files to verify
+        for im_file, lb_file in zip(self.im_files, self.label_files):
+            entry = old.get(im_file)
+            if entry and entry[0] == (get_stamp(im_file), get_stamp(lb_file)):
+                files[im_file] = entry
+            else:
+                todo.append((im_file, lb_file))
+        if files:
+            desc += f" {len(files)} unchanged,"
         with Pool(NUM_THREADS) as pool:
             pbar = tqdm(
-                pool.imap(verify_image_label, zip(self.im_files, self.label_files, repeat(prefix))),
+                pool.imap(verify_image_label, ((*f, prefix) for f in todo)),
                 desc=desc,
-                total=len(self.im_files),
+                total=len(todo),
                 bar_format=TQDM_BAR_FORMAT,
             )
-            for im_file, lb, shape, segments, nm_f, nf_f, ne_f, nc_f, msg in pbar:
-                nm += nm_f
-                nf += nf_f
-                ne += ne_f
-                nc += nc_f
-                if im_file:
-                    x[im_file] = [lb, shape, segments]
-                if msg:
-                    msgs.append(msg)
-                pbar.desc = f"{desc} {nf} images, {nm + ne} backgrounds, {nc} corrupt"
+            for (im_file, lb_file), result in zip(todo, pbar):
+                # stamped after verifying: a restored corrupt JPEG is rewritten by verify_image_label
+                files[im_file] = (get_stamp(im_file), get_stamp(lb_file)), result
+                pbar.desc = f"{desc} {len(files)}/{len(self.im_files)} files"
 
         pbar.close()
+        for f in self.im_files:
+            im_file, lb, shape, segments, nm_f, nf_f, ne_f, nc_f, msg = files[f][1]
+            nm += nm_f
+            nf += nf_f
+            ne += ne_f
+            nc += nc_f
+            if im_file:
+                x[im_file] = [lb, shape, segments]
+            if msg:
+                msgs.append(msg)
         if msgs:
             LOGGER.info("\n".join(msgs))
         if nf == 0:
@@ -745,6 +784,7 @@ class LoadImagesAndLabels(Dataset):
         x["results"] = nf, nm, ne, nc, len(self.im_files)
         x["msgs"] = msgs  # warnings
         x["version"] = self.cache_version  # cache version
+        x["files"] = files  # per-file stamps and results for the next incremental scan
         try:
             np.save(path, x)  # save cache for next time
             path.with_suffix(".cache.npy").rename(path)  # remove .npy suffix
@@ -753,6 +793,55 @@ class LoadImagesAndLabels(Dataset):
             LOGGER.warning(f"{prefix}WARNING ⚠️ Cache directory {path.parent} is not writeable: {e}")  # not writeable
         return x
 
+    def cache_images_to_mmap(self, path, prefix=""):
+        """Packs all resized images into one memory-mapped file with an offset/shape index, shared by all workers."""
+        index_path = path.with_suffix(".index")
+        # resized pixels depend on img_size and on the interpolation chosen by load_image()
+        h = hashlib.sha256(f"{get_hash(sorted(self.im_files))}{self.img_size}{self.augment}".encode()).hexdigest()
+        try:
+            index = np.load(index_path, allow_pickle=True).item()  # load dict
+            assert index["version"] == self.cache_version  # matches current version
+            assert index["hash"] == h  # identical hash
+            assert path.stat().st_size == index["size"]  # image file complete
+        except Exception:
+            files, offset, gb = {}, 0, 1 << 30  # {im_file: (offset, shape, hw_original)}, bytes written
+            tmp = path.with_suffix(".mmap.tmp")
+            try:
+                with open(tmp, "wb") as fh, ThreadPool(NUM_THREADS) as pool:
+                    results = pool.imap(self.load_image, range(self.n))
+                    pbar = tqdm(zip(self.im_files, results), total=self.n, bar_format=TQDM_BAR_FORMAT)
+                    for f, (im, hw0, _) in pbar:
+                        im = np.ascontiguousarray(im)
+                        fh.write(im.data)
+                        files[f] = (offset, im.shape, hw0)
+                        offset += im.nbytes
+                        pbar.desc = f"{prefix}Caching images ({offset / gb:.1f}GB mmap)"
+                    pbar.close()
+                tmp.replace(path)
+                index = {"files": files, "size": offset, "hash": h, "version": self.cache_version}
+                np.save(index_path, index)  # written last: a partial image file is never indexed
+                index_path.with_suffix(".index.npy").rename(index_path)  # remove .npy suffix
+                LOGGER.info(f"{prefix}New image cache created: {path}")
+            except Exception as e:
+                tmp.unlink(missing_ok=True)
+                LOGGER.warning(f"{prefix}WARNING ⚠️ Cache directory {path.parent} is not writeable: {e}")
+                return
+        self.mmap_file, self.mmap_index = path, index["files"]
+
+    def load_image_mmap(self, f):
+        """Returns a read-only view of a cached image (im, original hw, resized hw) from the mmap cache."""
+        if self._mmap is None:  # opened lazily, once per worker; pages are shared through the OS page cache
+            self._mmap = np.memmap(self.mmap_file, dtype=np.uint8, mode="r")
+        offset, shape, hw0 = self.mmap_index[f]
+        im = self._mmap[offset : offset + int(np.prod(shape))].reshape(shape)
+        return im, hw0, shape[:2]
+
+    def __getstate__(self):
+        """Drops the open memmap so spawned dataloader workers re-open the file instead of receiving a copy."""
+        state = self.__dict__.copy()
+        state["_mmap"] = None
+        return state
+
     def __len__(self):
         """Returns the number of images in the dataset."""
         return len(self.im_files)
@@ -763,43 +852,56 @@ class LoadImagesAndLabels(Dataset):
     #     #self.shuffled_vector = np.random.permutation(self.nF) if self.augment else np.arange(self.nF)
     #     return self
 
+    def timed(self, stage):
+        """Returns a context manager accumulating time spent in augmentation `stage` when profiling is enabled.
+
+        Profiling is enabled by setting `dataset.timings = {}`; each stage then maps to a Profile with total seconds.
+        """
+        if self.timings is None:
+            return contextlib.nullcontext()
+        return self.timings.setdefault(stage, Profile())
+
     def __getitem__(self, index):
         """Fetches the dataset item at the given index, considering linear, shuffled, or weighted sampling."""
         index = self.indices[index]  # linear, shuffled, or image_weights
 
         hyp = self.hyp
+        load_mosaic = self.load_mosaic_fused if self.fast_augment else self.load_mosaic
         if mosaic := self.mosaic and random.random() < hyp["mosaic"]:
             # Load mosaic
-            img, labels = self.load_mosaic(index)
+            img, labels = load_mosaic(index)
             shapes = None
 
             # MixUp augmentation
             if random.random() < hyp["mixup"]:
-                img, labels = mixup(img, labels, *self.load_mosaic(random.choice(self.indices)))
+                img, labels = mixup(img, labels, *load_mosaic(random.choice(self.indices)))
 
         else:
             # Load image
-            img, (h0, w0), (h, w) = self.load_image(index)
+            with self.timed("load"):
+                img, (h0, w0), (h, w) = self.load_image(index)
 
             # Letterbox
-            shape = self.batch_shapes[self.batch[index]] if self.rect else self.img_size  # final letterboxed shape
-            img, ratio, pad = letterbox(img, shape, auto=False, scaleup=self.augment)
-            shapes = (h0, w0), ((h / h0, w / w0), pad)  # for COCO mAP rescaling
+            with self.timed("letterbox"):
+                shape = self.batch_shapes[self.batch[index]] if self.rect else self.img_size  # final letterboxed shape
+                img, ratio, pad = letterbox(img, shape, auto=False, scaleup=self.augment)
+                shapes = (h0, w0), ((h / h0, w / w0), pad)  # for COCO mAP rescaling
 
-            labels = self.labels[index].copy()
-            if labels.size:  # normalized xywh to pixel xyxy format
-                labels[:, 1:] = xywhn2xyxy(labels[:, 1:], ratio[0] * w, ratio[1] * h, padw=pad[0], padh=pad[1])
+                labels = self.labels[index].copy()
+                if labels.size:  # normalized xywh to pixel xyxy format
+                    labels[:, 1:] = xywhn2xyxy(labels[:, 1:], ratio[0] * w, ratio[1] * h, padw=pad[0], padh=pad[1])
 
             if self.augment:
-                img, labels = random_perspective(
-                    img,
-                    labels,
-                    degrees=hyp["degrees"],
-                    translate=hyp["translate"],
-                    scale=hyp["scale"],
-                    shear=hyp["shear"],
-                    perspective=hyp["perspective"],
-                )
+                with self.timed("perspective"):
+                    img, labels = random_perspective(
+                        img,
+                        labels,
+                        degrees=hyp["degrees"],
+                        translate=hyp["translate"],
+                        scale=hyp["scale"],
+                        shear=hyp["shear"],
+                        perspective=hyp["perspective"],
+                    )
 
         nl = len(labels)  # number of labels
         if nl:
@@ -807,23 +909,26 @@ class LoadImagesAndLabels(Dataset):
 
         if self.augment:
             # Albumentations
-            img, labels = self.albumentations(img, labels)
-            nl = len(labels)  # update after albumentations
+            with self.timed("albumentations"):
+                img, labels = self.albumentations(img, labels)
+                nl = len(labels)  # update after albumentations
 
             # HSV color-space
-            augment_hsv(img, hgain=hyp["hsv_h"], sgain=hyp["hsv_s"], vgain=hyp["hsv_v"])
-
-            # Flip up-down
-            if random.random() < hyp["flipud"]:
-                img = np.flipud(img)
-                if nl:
-                    labels[:, 2] = 1 - labels[:, 2]
-
-            # Flip left-right
-            if random.random() < hyp["fliplr"]:
-                img = np.fliplr(img)
-                if nl:
-                    labels[:, 1] = 1 - labels[:, 1]
+            with self.timed("hsv"):
+                augment_hsv(img, hgain=hyp["hsv_h"], sgain=hyp["hsv_s"], vgain=hyp["hsv_v"])
+
+            with self.timed("flip"):
+                # Flip up-down
+                if random.random() < hyp["flipud"]:
+                    img = np.flipud(img)
+                    if nl:
+                        labels[:, 2] = 1 - labels[:, 2]
+
+                # Flip left-right
+                if random.random() < hyp["fliplr"]:
+                    img = np.fliplr(img)
+                    if nl:
+                        labels[:, 1] = 1 - labels[:, 1]
 
             # Cutouts
             # labels = cutout(img, labels, p=0.5)
@@ -834,8 +939,9 @@ class LoadImagesAndLabels(Dataset):
             labels_out[:, 1:] = torch.from_numpy(labels)
 
         # Convert
-        img = img.transpose((2, 0, 1))[::-1]  # HWC to CHW, BGR to RGB
-        img = np.ascontiguousarray(img)
+        with self.timed("convert"):
+            img = img.transpose((2, 0, 1))[::-1]  # HWC to CHW, BGR to RGB
+            img = np.ascontiguousarray(img)
 
         return torch.from_numpy(img), labels_out, self.im_files[index], shapes
 
@@ -850,6 +956,8 @@ class LoadImagesAndLabels(Dataset):
             self.npy_files[i],
         )
         if im is None:  # not cached in RAM
+            if self.mmap_index is not None:  # packed mmap cache
+                return self.load_image_mmap(f)
             if fn.exists():  # load npy
                 im = np.load(fn)
             else:  # read image
@@ -869,63 +977,127 @@ class LoadImagesAndLabels(Dataset):
         if not f.exists():
             np.save(f.as_posix(), cv2.imread(self.im_files[i]))
 
-    def load_mosaic(self, index):
-        """Loads a 4-image mosaic for YOLOv5, combining 1 selected and 3 random images, with labels and segments."""
-        labels4, segments4 = [], []
+    def mosaic_placement(self, i, xc, yc, h, w):
+        """Returns the img4 (large image) and tile (small image) xyxy regions of mosaic tile `i` for center xc, yc."""
+        s = self.img_size
+        if i == 0:  # top left
+            x1a, y1a, x2a, y2a = max(xc - w, 0), max(yc - h, 0), xc, yc  # xmin, ymin, xmax, ymax (large image)
+            x1b, y1b, x2b, y2b = w - (x2a - x1a), h - (y2a - y1a), w, h  # xmin, ymin, xmax, ymax (small image)
+        elif i == 1:  # top right
+            x1a, y1a, x2a, y2a = xc, max(yc - h, 0), min(xc + w, s * 2), yc
+            x1b, y1b, x2b, y2b = 0, h - (y2a - y1a), min(w, x2a - x1a), h
+        elif i == 2:  # bottom left
+            x1a, y1a, x2a, y2a = max(xc - w, 0), yc, xc, min(s * 2, yc + h)
+            x1b, y1b, x2b, y2b = w - (x2a - x1a), 0, w, min(y2a - y1a, h)
+        else:  # bottom right
+            x1a, y1a, x2a, y2a = xc, yc, min(xc + w, s * 2), min(s * 2, yc + h)
+            x1b, y1b, x2b, y2b = 0, 0, min(w, x2a - x1a), min(y2a - y1a, h)
+        return (x1a, y1a, x2a, y2a), (x1b, y1b, x2b, y2b)
+
+    def mosaic_tiles(self, index):
+        """Draws the mosaic center and images, returning (tile image, img4 region, tile region) and pixel labels."""
+        labels4, segments4, tiles = [], [], []
         s = self.img_size
         yc, xc = (int(random.uniform(-x, 2 * s + x)) for x in self.mosaic_border)  # mosaic center x, y
         indices = [index] + random.choices(self.indices, k=3)  # 3 additional image indices
         random.shuffle(indices)
-        for i, index in enumerate(indices):
-            # Load image
-            img, _, (h, w) = self.load_image(index)
+        with self.timed("load"):
+            ims = [self.load_image(index)[::2] for index in indices]  # (img, resized hw)
+
+        with self.timed("mosaic"):
+            for i, (index, (img, (h, w))) in enumerate(zip(indices, ims)):
+                a, b = self.mosaic_placement(i, xc, yc, h, w)
+                tiles.append((img, a, b))
+                padw = a[0] - b[0]
+                padh = a[1] - b[1]
+
+                # Labels
+                labels, segments = self.labels[index].copy(), self.segments[index].copy()
+                if labels.size:
+                    labels[:, 1:] = xywhn2xyxy(labels[:, 1:], w, h, padw, padh)  # normalized xywh to pixel xyxy format
+                    segments = [xyn2xy(x, w, h, padw, padh) for x in segments]
+                labels4.append(labels)
+                segments4.extend(segments)
+
+            # Concat/clip labels
+            labels4 = np.concatenate(labels4, 0)
+            for x in (labels4[:, 1:], *segments4):
+                np.clip(x, 0, 2 * s, out=x)  # clip when using random_perspective()
+        return tiles, labels4, segments4
 
-            # place img in img4
-            if i == 0:  # top left
-                img4 = np.full((s * 2, s * 2, img.shape[2]), 114, dtype=np.uint8)  # base image with 4 tiles
-                x1a, y1a, x2a, y2a = max(xc - w, 0), max(yc - h, 0), xc, yc  # xmin, ymin, xmax, ymax (large image)
-                x1b, y1b, x2b, y2b = w - (x2a - x1a), h - (y2a - y1a), w, h  # xmin, ymin, xmax, ymax (small image)
-            elif i == 1:  # top right
-                x1a, y1a, x2a, y2a = xc, max(yc - h, 0), min(xc + w, s * 2), yc
-                x1b, y1b, x2b, y2b = 0, h - (y2a - y1a), min(w, x2a - x1a), h
-            elif i == 2:  # bottom left
-                x1a, y1a, x2a, y2a = max(xc - w, 0), yc, xc, min(s * 2, yc + h)
-                x1b, y1b, x2b, y2b = w - (x2a - x1a), 0, w, min(y2a - y1a, h)
-            elif i == 3:  # bottom right
-                x1a, y1a, x2a, y2a = xc, yc, min(xc + w, s * 2), min(s * 2, yc + h)
-                x1b, y1b, x2b, y2b = 0, 0, min(w, x2a - x1a), min(y2a - y1a, h)
-
-            img4[y1a:y2a, x1a:x2a] = img[y1b:y2b, x1b:x2b]  # img4[ymin:ymax, xmin:xmax]
-            padw = x1a - x1b
-            padh = y1a - y1b
+    def load_mosaic(self, index):
+        """Loads a 4-image mosaic for YOLOv5, combining 1 selected and 3 random images, with labels and segments."""
+        s = self.img_size
+        tiles, labels4, segments4 = self.mosaic_tiles(index)
+        with self.timed("mosaic"):
+            img4 = np.full((s * 2, s * 2, tiles[0][0].shape[2]), 114, dtype=np.uint8)  # base image with 4 tiles
+            for img, (x1a, y1a, x2a, y2a), (x1b, y1b, x2b, y2b) in tiles:
+                img4[y1a:y2a, x1a:x2a] = img[y1b:y2b, x1b:x2b]  # img4[ymin:ymax, xmin:xmax]
+            # img4, labels4 = replicate(img4, labels4)  # replicate
+
+            # Augment
+            img4, labels4, segments4 = copy_paste(img4, labels4, segments4, p=self.hyp["copy_paste"])
+        with self.timed("perspective"):
+            img4, labels4 = random_perspective(
+                img4,
+                labels4,
+                segments4,
+                degrees=self.hyp["degrees"],
+                translate=self.hyp["translate"],
+                scale=self.hyp["scale"],
+                shear=self.hyp["shear"],
+                perspective=self.hyp["perspective"],
+                border=self.mosaic_border,
+            )  # border to remove
 
-            # Labels
-            labels, segments = self.labels[index].copy(), self.segments[index].copy()
-            if labels.size:
-                labels[:, 1:] = xywhn2xyxy(labels[:, 1:], w, h, padw, padh)  # normalized xywh to pixel xyxy format
-                segments = [xyn2xy(x, w, h, padw, padh) for x in segments]
-            labels4.append(labels)
-            segments4.extend(segments)
+        return img4, labels4
 
-        # Concat/clip labels
-        labels4 = np.concatenate(labels4, 0)
-        for x in (labels4[:, 1:], *segments4):
-            np.clip(x, 0, 2 * s, out=x)  # clip when using random_perspective()
-        # img4, labels4 = replicate(img4, labels4)  # replicate
+    def load_mosaic_fused(self, index):
+        """Loads the same mosaic as load_mosaic() with the same random draws, building only the img4 area it samples.
 
-        # Augment
-        img4, labels4, segments4 = copy_paste(img4, labels4, segments4, p=self.hyp["copy_paste"])
-        img4, labels4 = random_perspective(
-            img4,
-            labels4,
-            segments4,
-            degrees=self.hyp["degrees"],
-            translate=self.hyp["translate"],
-            scale=self.hyp["scale"],
-            shear=self.hyp["shear"],
-            perspective=self.hyp["perspective"],
-            border=self.mosaic_border,
-        )  # border to remove
+        The random_perspective() matrix is drawn first and the output corners are mapped back onto the 2s x 2s mosaic;
+        only that window (plus 1 px for bilinear interpolation) is filled with tiles and warped, once, with the window
+        offset folded into the matrix. Labels are identical and pixels match load_mosaic() up to interpolation rounding.
+        Copy-paste flips the full img4, so it falls back to load_mosaic().
+        """
+        if self.hyp["copy_paste"]:
+            return self.load_mosaic(index)
+        hyp, s = self.hyp, self.img_size
+        tiles, labels4, segments4 = self.mosaic_tiles(index)
+        with self.timed("perspective"):
+            M, scale, (height, width) = random_perspective_matrix(
+                (s * 2, s * 2),
+                degrees=hyp["degrees"],
+                translate=hyp["translate"],
+                scale=hyp["scale"],
+                shear=hyp["shear"],
+                perspective=hyp["perspective"],
+                border=self.mosaic_border,
+            )
+
+            # img4 window sampled by the warp
+            xy = np.array([[0, 0, 1], [width, 0, 1], [0, height, 1], [width, height, 1]], dtype=float)
+            xy = xy @ np.linalg.inv(M).T
+            xy = xy[:, :2] / xy[:, 2:3]
+            x0, y0 = np.clip(np.floor(xy.min(0)).astype(int) - 1, 0, s * 2)
+            x1, y1 = np.clip(np.ceil(xy.max(0)).astype(int) + 2, 0, s * 2)
+
+        with self.timed("mosaic"):  # same stage as the img4 fill in load_mosaic(), so the columns compare
+            window = np.full((max(y1 - y0, 1), max(x1 - x0, 1), tiles[0][0].shape[2]), 114, dtype=np.uint8)
+            for img, (x1a, y1a, x2a, y2a), (x1b, y1b, x2b, y2b) in tiles:
+                xa, ya, xb, yb = max(x1a, x0), max(y1a, y0), min(x2a, x1), min(y2a, y1)  # tile ∩ window
+                if xa < xb and ya < yb:
+                    window[ya - y0 : yb - y0, xa - x0 : xb - x0] = img[
+                        y1b + ya - y1a : y1b + yb - y1a, x1b + xa - x1a : x1b + xb - x1a
+                    ]
+
+        with self.timed("perspective"):
+            Mw = M @ np.array([[1, 0, x0], [0, 1, y0], [0, 0, 1]], dtype=float)  # window -> output
+            if hyp["perspective"]:
+                img4 = cv2.warpPerspective(window, Mw, dsize=(width, height), borderValue=(114, 114, 114))
+            else:  # affine
+                img4 = cv2.warpAffine(window, Mw[:2], dsize=(width, height), borderValue=(114, 114, 114))
+            labels4 = warp_targets(labels4, segments4, M, scale, height, width, hyp["perspective"])
 
         return img4, labels4
 
@@ -1115,6 +1115,49 @@ def non_max_suppression(
     return output
 
 
+def non_max_suppression_single(
+    prediction,
+    conf_thres=0.25,
+    iou_thres=0.45,
+    classes=None,
+    agnostic=False,
+    max_det=300,
+    topk=30000,
+):
+    """Fast NMS for a single image (batch size 1), best class per box, no masks or apriori labels.
+
+    Returns the same detections as `non_max_suppression(...)[0]` with `multi_label=False`, but filters by
+    objectness and by obj*cls confidence before converting boxes, allocates no per-image output list and has no
+    time limit check. `topk` caps the candidates kept before NMS (equivalent to `max_nms` in the batched version).
+
+    Returns:
+        (n,6) tensor [xyxy, conf, cls]
+    """
+    if isinstance(prediction, (list, tuple)):  # YOLOv5 model in validation model, output = (inference_out, loss_out)
+        prediction = prediction[0]
+    x = prediction[0] if prediction.dim() == 3 else prediction  # (n, 5+nc)
+
+    x = x[x[:, 4] > conf_thres]  # objectness candidates
+    conf, j = (x[:, 5:] * x[:, 4:5]).max(1)  # conf = obj_conf * cls_conf, best class only
+    keep = conf > conf_thres
+    if classes is not None:
+        keep &= (j[:, None] == torch.tensor(classes, device=x.device)).any(1)
+    x, conf, j = x[keep], conf[keep], j[keep]
+
+    n = conf.shape[0]
+    if not n:
+        return x.new_zeros((0, 6))
+    if n > topk:
+        conf, i = conf.topk(topk)
+    else:
+        conf, i = conf.sort(descending=True)
+    box, j = xywh2xyxy(x[i, :4]), j[i].float()
+
+    c = j[:, None] * (0 if agnostic else 7680)  # classes offset (max_wh)
+    i = torchvision.ops.nms(box + c, conf, iou_thres)[:max_det]
+    return torch.cat((box[i], conf[i, None], j[i, None]), 1)
+
+
 def strip_optimizer(f="best.pt", s=""):
     """Strips optimizer and optionally saves checkpoint to finalize training; arguments are file path 'f' and save path
     's'.
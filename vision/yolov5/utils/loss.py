@@ -137,6 +137,8 @@ class ComputeLoss:
         self.nl = m.nl  # number of layers
         self.anchors = m.anchors
         self.device = device
+        self.off = torch.tensor([[0, 0], [1, 0], [0, 1], [-1, 0], [0, -1]], device=device).float() * 0.5  # offsets
+        self.grids = {}  # per-layer grid shapes -> (xywh gain, max grid xy), see layer_grids()
 
     def __call__(self, p, targets):  # predictions, targets
         """Performs forward pass, calculating class, box, and object loss for given predictions and targets."""
@@ -190,9 +192,59 @@ class ComputeLoss:
 
         return (lbox + lobj + lcls) * bs, torch.cat((lbox, lobj, lcls)).detach()
 
+    def layer_grids(self, p):
+        """Returns per-layer xywh grid gains (nl, 4) and max grid xy (nl, 2) for predictions `p`, cached per image size."""
+        key = tuple(tuple(pi.shape[2:4]) for pi in p)
+        if key not in self.grids:
+            wh = torch.tensor([[pi.shape[3], pi.shape[2]] for pi in p], device=self.device)  # grid w, h per layer
+            self.grids[key] = (wh.repeat(1, 2).float(), wh - 1)
+        return self.grids[key]
+
     def build_targets(self, p, targets):
         """Prepares model targets from input targets (image,class,x,y,w,h) for loss computation, returning class, box,
         indices, and anchors.
+
+        All layers, anchors and neighbour-cell offsets are matched in one batched pass. Results are identical to
+        build_targets_loop(), in the same order: per layer, by offset, then anchor, then target.
+        """
+        g = 0.5  # bias
+        gain, grid_max = self.layer_grids(p)  # (nl, 4), (nl, 2)
+
+        # Targets in grid space of every layer
+        gxy = targets[None, :, 2:4] * gain[:, None, :2]  # (nl, nt, 2) grid xy
+        gwh = targets[None, :, 4:6] * gain[:, None, 2:]  # (nl, nt, 2) grid wh
+
+        # Matches
+        r = gwh[:, None] / self.anchors[:, :, None]  # (nl, na, nt, 2) wh ratio
+        match = torch.max(r, 1 / r).max(3)[0] < self.hyp["anchor_t"]  # (nl, na, nt)
+
+        # Offsets
+        gxi = gain[:, None, :2] - gxy  # inverse
+        j, k = ((gxy % 1 < g) & (gxy > 1)).unbind(2)
+        l, m = ((gxi % 1 < g) & (gxi > 1)).unbind(2)
+        cells = torch.stack((torch.ones_like(j), j, k, l, m), 1)  # (nl, 5, nt)
+        li, oi, a, ti = (cells[:, :, None] & match[:, None]).nonzero(as_tuple=True)  # layer, offset, anchor, target
+
+        # Define
+        gxy, gwh = gxy[li, ti], gwh[li, ti]
+        b, c = targets[ti, :2].long().T  # image, class
+        gij = (gxy - self.off[oi]).long()
+        gij = torch.minimum(gij.clamp_(0), grid_max[li])  # grid indices clamped to each layer's grid
+        gi, gj = gij.T
+        tbox = torch.cat((gxy - gij, gwh), 1)  # box
+        anch = self.anchors[li, a]  # anchors
+
+        # Split per layer
+        n = torch.bincount(li, minlength=self.nl).tolist()
+        tcls = list(c.split(n))
+        tbox, anch = list(tbox.split(n)), list(anch.split(n))
+        indices = list(zip(b.split(n), a.split(n), gj.split(n), gi.split(n)))  # image, anchor, grid
+        return tcls, tbox, indices, anch
+
+    def build_targets_loop(self, p, targets):
+        """Per-layer reference implementation of build_targets(), kept to validate the batched version.
+
+        Returns class, box, indices, and anchors.
         """
         na, nt = self.na, targets.shape[0]  # number of anchors, targets
         tcls, tbox, indices, anch = [], [], [], []